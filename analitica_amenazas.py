@@ -0,0 +1,152 @@
+"""
+Informe de amenazas de todo el roster: para cada pokemon, a cuántos contrarresta y cuántos le contrarrestan (grado de
+salida y de entrada del grafo de grafo_pokemon_counter.py contando solo las aristas con ponderación >= --umbral, 2 por
+defecto), y qué combinaciones de tipos son las más amenazantes.
+
+No hace falta el grafo ni llamar a encontrar_fuerte_contra con cada nombre: con el índice por clases (clases_tipos.py)
+los grados salen de un producto de la matriz de clases (sí/no supera el umbral) por el número de miembros de cada
+clase, quitando al propio pokemon. Las filas se escriben por bloques de --bloque pokemons, así que la memoria no depende
+del tamaño del informe.
+
+Uso: python analitica_amenazas.py [--db pokemon.db | --snapshot pokemon.snap] [--salida amenazas.csv] [--umbral 2]
+     [--formato csv|parquet] [--bloque 50000]
+Además de --salida escribe <salida>_combinaciones.csv (o .parquet) con los totales por combinación de tipos.
+Parquet necesita pyarrow (pip install pyarrow); CSV no necesita nada.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+
+import numpy as np
+
+# Columnas del informe por pokemon y del informe por combinación de tipos
+COLUMNAS_POKEMON = ('nombre', 'tipos', 'contrarresta', 'contrarrestado_por', 'grado_salida', 'grado_entrada',
+                    'amenaza_maxima')
+COLUMNAS_COMBINACION = ('tipos', 'pokemons', 'contrarresta', 'contrarrestado_por', 'proporcion_contrarrestada')
+
+# Grados por clase en una pasada: para cada clase, a cuántos pokemons del roster contrarresta un miembro y cuántos
+# le contrarrestan (ponderación >= umbral), cuántas aristas salen y entran (ponderación > 0) y la mayor ponderación que
+# recibe de otro pokemon. Todo sin contar al propio pokemon
+def grados_por_clase(indice, umbral=2.0):
+    pesos = indice['pesos']
+    tamanos = np.array([len(miembros) for miembros in indice['miembros']], dtype=np.int64)
+    fuertes = pesos >= umbral
+    aristas = pesos > 0
+    propios_fuertes = np.diagonal(fuertes).astype(np.int64)
+    propias_aristas = np.diagonal(aristas).astype(np.int64)
+
+    # Clases atacantes que tienen algún miembro distinto del defendido: todas, menos la propia si solo tiene uno
+    con_atacantes = np.broadcast_to(tamanos[:, None] > 0, pesos.shape).copy()
+    np.fill_diagonal(con_atacantes, tamanos > 1)
+    return {
+        'contrarresta': fuertes @ tamanos - propios_fuertes,
+        'contrarrestado_por': fuertes.T @ tamanos - propios_fuertes,
+        'grado_salida': aristas @ tamanos - propias_aristas,
+        'grado_entrada': aristas.T @ tamanos - propias_aristas,
+        'amenaza_maxima': np.where(con_atacantes, pesos, 0).max(axis=0),
+        'tamanos': tamanos,
+    }
+
+# Genera el informe por pokemon en bloques: cada bloque es un diccionario columna -> lista
+def bloques_pokemon(indice, grados, bloque=50000):
+    tipos_clase = ['/'.join(clase) for clase in indice['clases']]
+    for inicio in range(0, len(indice['clase_de']), bloque):
+        clases = indice['clase_de'][inicio:inicio + bloque]
+        yield {
+            'nombre': [indice['nombres'][i] for i in range(inicio, inicio + len(clases))],
+            'tipos': [tipos_clase[c] for c in clases],
+            'contrarresta': grados['contrarresta'][clases].tolist(),
+            'contrarrestado_por': grados['contrarrestado_por'][clases].tolist(),
+            'grado_salida': grados['grado_salida'][clases].tolist(),
+            'grado_entrada': grados['grado_entrada'][clases].tolist(),
+            'amenaza_maxima': grados['amenaza_maxima'][clases].astype(float).tolist(),
+        }
+
+# Informe por combinación de tipos, de la más amenazante (la que contrarresta a más pokemons) a la menos
+def filas_combinaciones(indice, grados):
+    total = len(indice['clase_de'])
+    orden = sorted(range(len(indice['clases'])),
+                   key=lambda c: (-grados['contrarresta'][c], grados['contrarrestado_por'][c], indice['clases'][c]))
+    return {
+        'tipos': ['/'.join(indice['clases'][c]) for c in orden],
+        'pokemons': [int(grados['tamanos'][c]) for c in orden],
+        'contrarresta': [int(grados['contrarresta'][c]) for c in orden],
+        'contrarrestado_por': [int(grados['contrarrestado_por'][c]) for c in orden],
+        'proporcion_contrarrestada': [round(int(grados['contrarresta'][c]) / max(total - 1, 1), 4) for c in orden],
+    }
+
+# Escribe los bloques en un CSV según se van generando
+def escribir_csv(ruta, columnas, bloques):
+    filas = 0
+    with open(ruta, 'w', newline='', encoding='utf-8') as fichero:
+        escritor = csv.writer(fichero)
+        escritor.writerow(columnas)
+        for bloque in bloques:
+            escritor.writerows(zip(*(bloque[columna] for columna in columnas)))
+            filas += len(bloque[columnas[0]])
+    return filas
+
+# Escribe los bloques en un Parquet (un grupo de filas por bloque). pyarrow solo hace falta para este formato
+def escribir_parquet(ruta, columnas, bloques):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("El formato parquet necesita pyarrow: pip install pyarrow (o usa --formato csv)")
+    filas = 0
+    escritor = None
+    try:
+        for bloque in bloques:
+            tabla = pa.table({columna: bloque[columna] for columna in columnas})
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla)
+            filas += tabla.num_rows
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe de amenazas (grados de entrada y salida) de todo el roster.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--snapshot", help="lee los datos de un snapshot de snapshot_pokemon.py en vez de pokemon.db")
+    parser.add_argument("--salida", default="amenazas.csv", help="fichero del informe por pokemon")
+    parser.add_argument("--formato", choices=("csv", "parquet"), default=None,
+                        help="formato de salida (por defecto, según la extensión de --salida)")
+    parser.add_argument("--umbral", type=float, default=2.0,
+                        help="ponderación mínima para que un pokemon cuente como counter de otro")
+    parser.add_argument("--bloque", type=int, default=50000, help="pokemons por bloque escrito")
+    args = parser.parse_args()
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+    escribir = escribir_parquet if formato == "parquet" else escribir_csv
+
+    if args.snapshot:
+        from snapshot_pokemon import abrir_snapshot, avisar_si_caducado, indice_desde_snapshot
+        snapshot = abrir_snapshot(args.snapshot)
+        avisar_si_caducado(snapshot, args.snapshot, args.db)
+        indice = indice_desde_snapshot(snapshot)
+    else:
+        from cache_counters import cargar_indice
+        conexion = sqlite3.connect(args.db)
+        indice = cargar_indice(conexion)
+        conexion.close()
+
+    grados = grados_por_clase(indice, args.umbral)
+    filas = escribir(args.salida, COLUMNAS_POKEMON, bloques_pokemon(indice, grados, args.bloque))
+    print(f"Informe de {filas} pokemons guardado en {args.salida}")
+
+    combinaciones = filas_combinaciones(indice, grados)
+    ruta_combinaciones = f"{os.path.splitext(args.salida)[0]}_combinaciones.{formato}"
+    escribir(ruta_combinaciones, COLUMNAS_COMBINACION, [combinaciones])
+    print(f"Totales de {len(combinaciones['tipos'])} combinaciones de tipos guardados en {ruta_combinaciones}")
+
+    print(f"\nCombinaciones más amenazantes (contrarrestan con ponderación >= {args.umbral:g}):")
+    for posicion in range(min(10, len(combinaciones['tipos']))):
+        print(f"  {posicion + 1}. {combinaciones['tipos'][posicion]}: contrarresta a "
+              f"{combinaciones['contrarresta'][posicion]} pokemons ({combinaciones['proporcion_contrarrestada'][posicion]:.0%}), "
+              f"le contrarrestan {combinaciones['contrarrestado_por'][posicion]}")
+
+if __name__ == "__main__":
+    main()
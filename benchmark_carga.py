@@ -0,0 +1,84 @@
+"""
+Compara el tiempo de construir pokemon.db con la inserción fila a fila original (INSERT OR IGNORE + SELECT id
+por cada tipo, estadística, habilidad y movimiento, un único commit) frente a CargadorPokemon (ids en memoria,
+executemany por tabla, commit por lotes y PRAGMAs de carga). Usa datos sintéticos, no descarga nada.
+
+Uso: python benchmark_carga.py [--pokemons 1300] [--lote 200]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from crear_pokemon import (CargadorPokemon, ajustar_pragmas_carga, crear_tablas, insertar_pokemon,
+                           restaurar_pragmas)
+from datos_sinteticos import generar_detalles
+
+# Carga original: una sentencia por fila
+def cargar_fila_a_fila(ruta, pokemons, detalles):
+    conexion = sqlite3.connect(ruta)
+    cursor = conexion.cursor()
+    crear_tablas(cursor)
+    for pokemon in pokemons:
+        pokemon_id = int(pokemon['url'].split('/')[-2])
+        insertar_pokemon(cursor, pokemon_id, pokemon['name'], pokemon['url'], detalles[pokemon_id])
+    conexion.commit()
+    conexion.close()
+
+# Carga masiva: igual que ingerir_pokemons pero sin la parte de red
+def cargar_masivo(ruta, pokemons, detalles, lote):
+    conexion = sqlite3.connect(ruta)
+    ajustar_pragmas_carga(conexion)
+    cursor = conexion.cursor()
+    crear_tablas(cursor)
+    cargador = CargadorPokemon(cursor)
+    for inicio in range(0, len(pokemons), lote):
+        for pokemon in pokemons[inicio:inicio + lote]:
+            pokemon_id = int(pokemon['url'].split('/')[-2])
+            cargador.agregar(pokemon_id, pokemon['name'], pokemon['url'], detalles[pokemon_id])
+        cargador.volcar()
+        conexion.commit()
+    restaurar_pragmas(conexion)
+    conexion.close()
+
+# Cuenta las filas de cada tabla, para comprobar que las dos cargas dejan lo mismo
+def contar_filas(ruta):
+    conexion = sqlite3.connect(ruta)
+    tablas = ('pokemon', 'types', 'pokemon_types', 'stats', 'pokemon_stats',
+              'abilities', 'pokemon_abilities', 'moves', 'pokemon_moves')
+    filas = {tabla: conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] for tabla in tablas}
+    conexion.close()
+    return filas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la construcción de pokemon.db")
+    parser.add_argument("--pokemons", type=int, default=1300)
+    parser.add_argument("--lote", type=int, default=200)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    pokemons, detalles = generar_detalles(args.pokemons, args.semilla)
+    print(f"{args.pokemons} Pokémon sintéticos, "
+          f"{sum(len(d['moves']) for d in detalles.values())} filas en pokemon_moves")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_filas = os.path.join(directorio, "fila_a_fila.db")
+        ruta_masivo = os.path.join(directorio, "masivo.db")
+
+        inicio = time.perf_counter()
+        cargar_fila_a_fila(ruta_filas, pokemons, detalles)
+        t_filas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        cargar_masivo(ruta_masivo, pokemons, detalles, args.lote)
+        t_masivo = time.perf_counter() - inicio
+
+        if contar_filas(ruta_filas) != contar_filas(ruta_masivo):
+            print("Aviso: las dos cargas no han dejado el mismo número de filas")
+
+    print(f"Fila a fila: {t_filas:.2f} s")
+    print(f"Masivo:      {t_masivo:.2f} s ({t_filas / t_masivo:.1f}x más rápido)")
+
+if __name__ == "__main__":
+    main()
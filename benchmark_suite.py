@@ -0,0 +1,252 @@
+"""
+Batería de benchmarks reproducible sobre bases de datos sintéticas (datos_sinteticos.py) de distintos tamaños, de
+1.000 a 100.000 pokemons. Para cada tamaño mide:
+
+  - carga: pokemons y filas por segundo del camino de inserción de crear_pokemon.py (CargadorPokemon por lotes)
+  - grafo: tiempo y pico de memoria (tracemalloc) de construir_grafo. El grafo tiene n² aristas, así que solo se
+    construye hasta --max-grafo pokemons; por encima se indica como omitido
+  - índice por clases: tiempo de construirlo desde la base de datos y de cargarlo de la caché (cache_counters.py)
+  - latencias (p50 y p99, en ms) de encontrar_fuerte_contra (grafo e índice por clases) y de encontrar_equipo_fuerte.
+    Las consultas se repiten --repeticiones veces; el p50 es el de todas las muestras y el p99 la mediana de los p99 de
+    cada pasada, para que un parón suelto de la máquina no lo dispare
+
+Los nombres y equipos consultados salen de --semilla, así que dos ejecuciones miden exactamente lo mismo. El
+resultado se guarda en JSON junto con el commit actual, y con --comparar se compara con un JSON anterior. Un p99 con
+menos de MIN_MUESTRAS_P99 muestras (en cualquiera de los dos) se muestra pero no se marca como peor: con pocas consultas
+el p99 es prácticamente el máximo y varía mucho de una ejecución a otra.
+
+Uso: python benchmark_suite.py [--tamanos 1000,10000] [--salida benchmark.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cache_counters import cargar_indice
+from clases_tipos import construir_clases, encontrar_fuerte_contra as fuerte_contra_clases
+from counter_equipo_random import encontrar_equipo_fuerte, obtener_equipo_por_nombres
+from crear_pokemon import CargadorPokemon, ajustar_pragmas_carga, crear_tablas, migrar_esquema, restaurar_pragmas
+from datos_sinteticos import iterar_detalles
+from grafo_pokemon_counter import construir_grafo, encontrar_fuerte_contra as fuerte_contra_grafo
+
+# Umbral a partir del cual --comparar marca una métrica como peor (un 10 % más lenta)
+UMBRAL_REGRESION = 1.10
+# Muestras mínimas (consultas x repeticiones) para que --comparar tenga en cuenta un p99: con 1000, el p99 sale de las
+# 10 más lentas y no de una sola
+MIN_MUESTRAS_P99 = 1000
+
+# Crea una base de datos sintética con el camino de inserción de crear_pokemon.py. Los datos se generan por lotes
+# (sin tenerlos todos en memoria) y solo se cronometra la escritura en SQLite
+def generar_db_sintetica(ruta, cantidad, semilla=0, lote=1000):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    conexion = sqlite3.connect(ruta)
+    ajustar_pragmas_carga(conexion)
+    cursor = conexion.cursor()
+    crear_tablas(cursor)
+    cargador = CargadorPokemon(cursor)
+
+    segundos = 0.0
+    filas = 0
+    bloque = []
+    generador = iterar_detalles(cantidad, semilla)
+    while True:
+        bloque.clear()
+        for pokemon, detalles in generador:
+            bloque.append((pokemon, detalles))
+            if len(bloque) == lote:
+                break
+        if not bloque:
+            break
+        inicio = time.perf_counter()
+        for pokemon, detalles in bloque:
+            cargador.agregar(detalles['id'], pokemon['name'], pokemon['url'], detalles)
+        filas += sum(len(filas_tabla) for filas_tabla in cargador.filas.values())
+        cargador.volcar()
+        conexion.commit()
+        segundos += time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    migrar_esquema(conexion)
+    restaurar_pragmas(conexion)
+    segundos_indices = time.perf_counter() - inicio
+    conexion.close()
+    return {
+        'segundos': round(segundos, 3),
+        'pokemons_por_segundo': round(cantidad / segundos, 1),
+        'filas_por_segundo': round(filas / segundos, 1),
+        'filas': filas,
+        'segundos_indices': round(segundos_indices, 3),
+        'tamano_mb': round(os.path.getsize(ruta) / 2 ** 20, 1),
+    }
+
+# Ejecuta una función y devuelve (resultado, segundos, pico de memoria en MB)
+def medir(funcion, *args, memoria=False):
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    pico = None
+    if memoria:
+        pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return resultado, segundos, pico
+
+# Percentiles de latencia de llamar a funcion con cada uno de los argumentos, repetido varias veces
+def latencias(funcion, lista_args, repeticiones=1):
+    pasadas = []
+    for _ in range(repeticiones):
+        tiempos = []
+        for args in lista_args:
+            inicio = time.perf_counter()
+            funcion(*args)
+            tiempos.append(time.perf_counter() - inicio)
+        pasadas.append(np.array(tiempos) * 1000)
+    todos = np.concatenate(pasadas)
+    p99 = np.median([np.percentile(tiempos, 99) for tiempos in pasadas])
+    return {'consultas': len(lista_args), 'repeticiones': repeticiones,
+            'p50_ms': round(float(np.percentile(todos, 50)), 4), 'p99_ms': round(float(p99), 4),
+            'media_ms': round(float(todos.mean()), 4)}
+
+# Todos los benchmarks de un tamaño de roster
+def medir_tamano(directorio, cantidad, semilla, consultas, consultas_equipo, max_grafo, repeticiones):
+    ruta = os.path.join(directorio, f"sintetica_{cantidad}.db")
+    print(f"[{cantidad}] generando la base de datos...")
+    resultado = {'pokemons': cantidad, 'carga': generar_db_sintetica(ruta, cantidad, semilla)}
+    print(f"[{cantidad}] carga: {resultado['carga']['pokemons_por_segundo']:.0f} pokemons/s")
+
+    conexion = sqlite3.connect(ruta)
+    cursor = conexion.cursor()
+    rng = random.Random(semilla)
+    nombres_consulta = [f"pokemon-{rng.randint(1, cantidad)}" for _ in range(consultas)]
+
+    # Índice por clases: construido desde cero y cargado de la caché
+    indice, segundos, pico = medir(construir_clases, cursor, memoria=True)
+    _, segundos_frio, _ = medir(cargar_indice, conexion, True)
+    _, segundos_cache, _ = medir(cargar_indice, conexion)
+    resultado['indice_clases'] = {'segundos': round(segundos, 4), 'memoria_pico_mb': round(pico, 2),
+                                  'segundos_cargar_y_guardar': round(segundos_frio, 4),
+                                  'segundos_desde_cache': round(segundos_cache, 4), 'clases': len(indice['clases'])}
+    resultado['latencias'] = {
+        'encontrar_fuerte_contra_clases': latencias(fuerte_contra_clases, [(n, indice) for n in nombres_consulta],
+                                                    repeticiones),
+    }
+
+    # Grafo: el tiempo se mide sin tracemalloc (lo ralentiza) y la memoria en una segunda construcción
+    if cantidad <= max_grafo:
+        print(f"[{cantidad}] construyendo el grafo...")
+        grafo, segundos, _ = medir(construir_grafo, cursor)
+        _, _, pico = medir(construir_grafo, cursor, memoria=True)
+        resultado['grafo'] = {'segundos': round(segundos, 3), 'memoria_pico_mb': round(pico, 1),
+                              'aristas': grafo.number_of_edges()}
+        resultado['latencias']['encontrar_fuerte_contra_grafo'] = latencias(
+            fuerte_contra_grafo, [(n, grafo) for n in nombres_consulta], repeticiones)
+        del grafo
+    else:
+        resultado['grafo'] = {'omitido': f"más de {max_grafo} pokemons (--max-grafo)"}
+
+    # Equipos rivales de 6 pokemons distintos; la información del rival se carga antes de cronometrar
+    print(f"[{cantidad}] consultas de equipos...")
+    rivales = []
+    for _ in range(consultas_equipo):
+        nombres = [f"pokemon-{i}" for i in rng.sample(range(1, cantidad + 1), min(6, cantidad))]
+        rivales.append((cursor, obtener_equipo_por_nombres(cursor, nombres)[0]))
+    resultado['latencias']['encontrar_equipo_fuerte'] = latencias(encontrar_equipo_fuerte, rivales, repeticiones)
+
+    conexion.close()
+    os.remove(ruta)
+    return resultado
+
+# Commit actual del repositorio (None si no se puede saber)
+def commit_actual():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+# Métricas comparables de un resultado: {(tamaño, nombre): (valor, True si más es mejor, True si se puede marcar)}
+def metricas(resultado):
+    valores = {}
+    for medida in resultado['resultados']:
+        tamano = medida['pokemons']
+        valores[(tamano, 'carga pokemons/s')] = (medida['carga']['pokemons_por_segundo'], True, True)
+        valores[(tamano, 'indice_clases s')] = (medida['indice_clases']['segundos'], False, True)
+        if 'segundos' in medida['grafo']:
+            valores[(tamano, 'grafo s')] = (medida['grafo']['segundos'], False, True)
+            valores[(tamano, 'grafo MB')] = (medida['grafo']['memoria_pico_mb'], False, True)
+        for consulta, datos in medida['latencias'].items():
+            muestras = datos['consultas'] * datos.get('repeticiones', 1)
+            valores[(tamano, f"{consulta} p50")] = (datos['p50_ms'], False, True)
+            valores[(tamano, f"{consulta} p99")] = (datos['p99_ms'], False, muestras >= MIN_MUESTRAS_P99)
+    return valores
+
+# Compara dos resultados y devuelve las métricas que han empeorado más que UMBRAL_REGRESION (los p99 con pocas
+# muestras no cuentan)
+def comparar(anterior, actual):
+    previas = metricas(anterior)
+    regresiones = []
+    print(f"\nComparación con {anterior.get('commit') or 'el resultado anterior'}:")
+    for clave, (valor, mas_es_mejor, marcable) in sorted(metricas(actual).items()):
+        if clave not in previas or not previas[clave][0] or not valor:
+            continue
+        cambio = valor / previas[clave][0] if not mas_es_mejor else previas[clave][0] / valor
+        marca = ""
+        if cambio > UMBRAL_REGRESION:
+            marca = "  <- peor" if marcable and previas[clave][2] else "  (pocas muestras para el p99, no se marca)"
+        print(f"  {clave[0]:>7} {clave[1]:<40} {previas[clave][0]:>12} -> {valor:<12} x{cambio:.2f}{marca}")
+        if marca == "  <- peor":
+            regresiones.append(clave)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, construcción del grafo/índice y consultas.")
+    parser.add_argument("--tamanos", default="1000,10000",
+                        help="tamaños del roster separados por comas (por ejemplo 1000,10000,100000)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--consultas", type=int, default=1000, help="consultas de encontrar_fuerte_contra por tamaño")
+    parser.add_argument("--consultas-equipo", type=int, default=200, help="consultas de encontrar_equipo_fuerte por tamaño")
+    parser.add_argument("--repeticiones", type=int, default=3, help="pasadas de cada lista de consultas de latencia")
+    parser.add_argument("--max-grafo", type=int, default=2000, help="tamaño máximo para construir el grafo de networkx")
+    parser.add_argument("--directorio", help="dónde crear las bases de datos sintéticas (por defecto, una carpeta temporal)")
+    parser.add_argument("--salida", default="benchmark.json", help="fichero JSON con los resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+
+    resultado = {
+        'commit': commit_actual(),
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'maquina': platform.machine(),
+        'semilla': args.semilla,
+        'repeticiones': args.repeticiones,
+        'resultados': [],
+    }
+    with tempfile.TemporaryDirectory(dir=args.directorio) as directorio:
+        for cantidad in (int(tamano) for tamano in args.tamanos.split(',')):
+            resultado['resultados'].append(medir_tamano(directorio, cantidad, args.semilla, args.consultas,
+                                                        args.consultas_equipo, args.max_grafo, args.repeticiones))
+
+    with open(args.salida, 'w', encoding='utf-8') as fichero:
+        json.dump(resultado, fichero, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as fichero:
+            regresiones = comparar(json.load(fichero), resultado)
+        print(f"{len(regresiones)} métricas han empeorado más de un {UMBRAL_REGRESION - 1:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmark de la ponderación entre dos pokemons: la versión original de calcular_ponderacion (hasta tres búsquedas
+con 'in' en las listas de efec por cada pareja de tipos) frente a tabla_tipos.py (ponderacion por nombres y
+ponderacion_combinaciones con los códigos ya calculados, que es lo que usa construir_grafo). Antes de medir comprueba
+que las tres dan lo mismo para todas las combinaciones de hasta dos tipos.
+
+Uso: python benchmark_tabla_tipos.py [--pares 1000000] [--semilla 0]
+"""
+import argparse
+import random
+import time
+
+from tabla_tipos import COMBINACIONES, TIPOS, codigo_combinacion, efec, ponderacion, ponderacion_combinaciones
+
+# La calcular_ponderacion de antes de tabla_tipos.py, recorriendo las listas
+def ponderacion_listas(tipos_atacante, tipos_defensor):
+    ponderacion = 1.0
+    for tipo_atacante in tipos_atacante:
+        for tipo_defensor in tipos_defensor:
+            if tipo_defensor in efec[tipo_atacante]['fuerte']:
+                ponderacion *= 2
+            elif tipo_defensor in efec[tipo_atacante]['debil']:
+                ponderacion *= 0.5
+            elif tipo_defensor in efec[tipo_atacante]['inmune']:
+                return 0
+    return ponderacion
+
+# Segundos que tarda en ponderar todos los pares
+def cronometrar(funcion, pares):
+    inicio = time.perf_counter()
+    for atacante, defensor in pares:
+        funcion(atacante, defensor)
+    return time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de la tabla de tipos")
+    parser.add_argument("--pares", type=int, default=1000000, help="pares de pokemons a ponderar")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    # Todas las combinaciones de uno o dos tipos (sin la vacía), como listas de nombres
+    combinaciones = [[TIPOS[t] for t in combinacion] for combinacion in COMBINACIONES[1:]]
+    for atacante in combinaciones:
+        for defensor in combinaciones:
+            if ponderacion_listas(atacante, defensor) != ponderacion(atacante, defensor):
+                raise SystemExit(f"Ponderación distinta para {atacante} contra {defensor}")
+    print(f"Las {len(combinaciones) ** 2} parejas de combinaciones ponderan igual.")
+
+    rng = random.Random(args.semilla)
+    pares = [(rng.choice(combinaciones), rng.choice(combinaciones)) for _ in range(args.pares)]
+    pares_codigos = [(codigo_combinacion(a), codigo_combinacion(d)) for a, d in pares]
+
+    t_listas = cronometrar(ponderacion_listas, pares)
+    t_nombres = cronometrar(ponderacion, pares)
+    t_codigos = cronometrar(ponderacion_combinaciones, pares_codigos)
+
+    print(f"{args.pares} pares")
+    print(f"Listas (calcular_ponderacion original): {t_listas:.3f} s ({t_listas / args.pares * 1e9:.0f} ns/par)")
+    print(f"tabla_tipos.ponderacion (nombres):       {t_nombres:.3f} s ({t_nombres / args.pares * 1e9:.0f} ns/par), "
+          f"x{t_listas / t_nombres:.1f}")
+    print(f"ponderacion_combinaciones (códigos):     {t_codigos:.3f} s ({t_codigos / args.pares * 1e9:.0f} ns/par), "
+          f"x{t_listas / t_codigos:.1f}")
+
+if __name__ == "__main__":
+    main()
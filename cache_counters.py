@@ -0,0 +1,109 @@
+"""
+Guarda en pokemon.db el índice por combinaciones de tipos de clases_tipos.py ya calculado, para no reconstruirlo en cada
+ejecución. El índice se guarda en la tabla cache_indice junto con una huella (sha256) de las filas pokemon/tipos de las
+que sale y de la tabla de efectividades. Al arrancar se calcula la huella de los datos actuales: si coincide, el índice
+se carga directamente de la base de datos; si no (han cambiado los tipos o los pokemons), se reconstruye y se guarda.
+"""
+import hashlib
+import io
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+
+from clases_tipos import construir_indice_clases
+from grafo_pokemon_counter import CONSULTA_TIPOS, agrupar_tipos
+from matriz_efectividad import codificar_tipos
+from tabla_tipos import efec
+
+# Si cambia la forma en la que se guarda el índice, se sube la versión y las cachés antiguas dejan de valer
+VERSION = 1
+NOMBRE_INDICE = 'clases'
+
+# Crea la tabla de la caché si no existe
+def crear_tabla_cache(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_indice (
+            nombre TEXT PRIMARY KEY,
+            huella TEXT NOT NULL,
+            datos BLOB NOT NULL,
+            creado TEXT NOT NULL
+        )
+    ''')
+
+# Huella de los datos de los que depende el índice: las filas de CONSULTA_TIPOS (en su orden) y la tabla efec
+def calcular_huella(datos):
+    huella = hashlib.sha256()
+    huella.update(f"v{VERSION}".encode())
+    huella.update(json.dumps(efec, sort_keys=True).encode())
+    for fila in datos:
+        huella.update(repr(fila).encode())
+    return huella.hexdigest()
+
+# Convierte el índice en un bloque de bytes (npz sin pickle); solo se guarda lo que no se puede derivar
+def serializar_indice(indice):
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        nombres=np.array(indice['nombres'], dtype=str),
+        clases=np.array(['/'.join(clase) for clase in indice['clases']], dtype=str),
+        clase_de=indice['clase_de'].astype(np.int32),
+        pesos=indice['pesos'],
+    )
+    return buffer.getvalue()
+
+# Reconstruye el índice a partir de los bytes guardados
+def deserializar_indice(datos):
+    archivo = np.load(io.BytesIO(datos), allow_pickle=False)
+    nombres = archivo['nombres'].tolist()
+    clases = [tuple(clase.split('/')) for clase in archivo['clases'].tolist()]
+    clase_de = archivo['clase_de'].astype(np.intp)
+
+    miembros = [[] for _ in clases]
+    for i, clase in enumerate(clase_de.tolist()):
+        miembros[clase].append(i)
+
+    return {
+        'nombres': nombres,
+        'indice': {nombre: i for i, nombre in enumerate(nombres)},
+        'clases': clases,
+        'id_clase': {clase: c for c, clase in enumerate(clases)},
+        'clase_de': clase_de,
+        'miembros': miembros,
+        'primero': np.array([m[0] for m in miembros], dtype=np.intp),
+        'segundo': np.array([m[1] if len(m) > 1 else -1 for m in miembros], dtype=np.intp),
+        'codigos': codificar_tipos(clases),
+        'pesos': archivo['pesos'],
+    }
+
+# Devuelve el índice por clases: desde la caché si los datos no han cambiado, o reconstruyéndolo y guardándolo si sí
+def cargar_indice(conexion, reconstruir=False):
+    cursor = conexion.cursor()
+    cursor.execute(CONSULTA_TIPOS)
+    datos = cursor.fetchall()
+    huella = calcular_huella(datos)
+
+    if not reconstruir:
+        try:
+            cursor.execute("SELECT huella, datos FROM cache_indice WHERE nombre = ?", (NOMBRE_INDICE,))
+            guardado = cursor.fetchone()
+        except sqlite3.OperationalError:
+            guardado = None  # Todavía no existe la tabla
+        if guardado and guardado[0] == huella:
+            return deserializar_indice(guardado[1])
+
+    indice = construir_indice_clases(agrupar_tipos(datos))
+
+    # Si la base de datos es de solo lectura, se usa el índice sin guardarlo
+    try:
+        crear_tabla_cache(cursor)
+        cursor.execute(
+            "INSERT OR REPLACE INTO cache_indice (nombre, huella, datos, creado) VALUES (?, ?, ?, ?)",
+            (NOMBRE_INDICE, huella, serializar_indice(indice), datetime.now(timezone.utc).isoformat()),
+        )
+        conexion.commit()
+    except sqlite3.OperationalError as e:
+        print(f"No se pudo guardar la caché del índice: {e}")
+
+    return indice
@@ -0,0 +1,103 @@
+"""
+La ponderación entre dos pokemons solo depende de sus tipos, y aunque hay más de mil pokemons, solo hay unas 170
+combinaciones de tipos distintas. Este script agrupa los pokemons en clases (una por combinación de tipos), calcula
+la tabla de ponderaciones entre clases (unas 170x170 en vez de 1300x1300) y guarda qué pokemons hay en cada clase.
+
+Buscar el counter de un pokemon es entonces mirar la columna de su clase en la tabla y expandir los miembros de las
+clases con mayor ponderación. Los empates se resuelven igual que en el grafo: gana el primer pokemon en el orden de
+carga, que es el primer miembro de su clase (o el segundo, si el primero es el propio pokemon buscado).
+"""
+import numpy as np
+
+from grafo_pokemon_counter import cargar_tipos_por_pokemon
+from matriz_efectividad import calcular_ponderaciones, codificar_tipos
+
+# Agrupa los pokemons por combinación de tipos y calcula la tabla de ponderaciones entre clases
+def construir_indice_clases(tipos_por_pokemon):
+    nombres = list(tipos_por_pokemon)
+    clases = []
+    id_clase = {}
+    clase_de = np.empty(len(nombres), dtype=np.intp)
+    miembros = []
+    for i, tipos in enumerate(tipos_por_pokemon.values()):
+        # El orden de los tipos no cambia la ponderación (es un producto), así que la clave va ordenada
+        clave = tuple(sorted(tipos))
+        if clave not in id_clase:
+            id_clase[clave] = len(clases)
+            clases.append(clave)
+            miembros.append([])
+        clase_de[i] = id_clase[clave]
+        miembros[id_clase[clave]].append(i)
+
+    # Primer y segundo miembro de cada clase (-1 si no hay), para resolver los empates sin recorrer los miembros
+    primero = np.array([m[0] for m in miembros], dtype=np.intp)
+    segundo = np.array([m[1] if len(m) > 1 else -1 for m in miembros], dtype=np.intp)
+
+    codigos = codificar_tipos(clases)
+    return {
+        'nombres': nombres,
+        'indice': {nombre: i for i, nombre in enumerate(nombres)},
+        'clases': clases,
+        'id_clase': id_clase,
+        'clase_de': clase_de,
+        'miembros': miembros,
+        'primero': primero,
+        'segundo': segundo,
+        'codigos': codigos,
+        'pesos': calcular_ponderaciones(codigos, codigos),
+    }
+
+# Igual que construir_matriz, pero con el índice por clases
+def construir_clases(cursor):
+    return construir_indice_clases(cargar_tipos_por_pokemon(cursor))
+
+# Para cada clase, el primer miembro que puede atacar al pokemon j (cualquiera menos él mismo), -1 si no hay
+def _primer_atacante(indice, j):
+    candidatos = indice['primero'].copy()
+    propia = indice['clase_de'][j]
+    if candidatos[propia] == j:
+        candidatos[propia] = indice['segundo'][propia]
+    return candidatos
+
+# Devuelve la ponderación máxima contra el pokemon j y el primer atacante de cada clase (None si no está en el "grafo")
+def _columna(indice, j):
+    candidatos = _primer_atacante(indice, j)
+    validos = candidatos >= 0
+    propia = indice['clase_de'][j]
+    entrantes = np.where(validos, indice['pesos'][:, propia], 0)
+    salientes = np.where(validos, indice['pesos'][propia, :], 0)
+    # Sin ninguna arista, el pokemon no sería un nodo del grafo
+    if not (entrantes > 0).any() and not (salientes > 0).any():
+        return None
+    return entrantes, candidatos
+
+# Función para buscar el pokémon más fuerte (mismo resultado que la versión con el grafo)
+def encontrar_fuerte_contra(pokemon, indice):
+    j = indice['indice'].get(pokemon)
+    columna = None if j is None else _columna(indice, j)
+    if columna is None:
+        return f"El Pokémon '{pokemon}' no está en la base de datos."
+
+    entrantes, candidatos = columna
+    maximo = entrantes.max()
+    if maximo <= 0:
+        return "No se encontraron atacantes efectivos."
+
+    # Entre las clases empatadas gana la que tiene el primer miembro en el orden de carga
+    mejor = int(candidatos[entrantes == maximo].min())
+    return indice['nombres'][mejor], float(maximo)
+
+# Devuelve todos los pokemons empatados con la ponderación máxima contra el pokemon dado, en el orden de carga
+def encontrar_empatados(pokemon, indice):
+    j = indice['indice'].get(pokemon)
+    columna = None if j is None else _columna(indice, j)
+    if columna is None:
+        return f"El Pokémon '{pokemon}' no está en la base de datos."
+
+    entrantes, _ = columna
+    maximo = entrantes.max()
+    if maximo <= 0:
+        return "No se encontraron atacantes efectivos."
+
+    empatados = [i for c in np.flatnonzero(entrantes == maximo) for i in indice['miembros'][c] if i != j]
+    return [indice['nombres'][i] for i in sorted(empatados)], float(maximo)
@@ -0,0 +1,203 @@
+"""
+Comprueba con EXPLAIN QUERY PLAN que las consultas más usadas de crear_pokemon.py, grafo_pokemon_counter.py y
+counter_equipo_random.py usan los índices que deben (los de las claves primarias o los que crea migrar_esquema en
+crear_pokemon.py) y no recorren tablas enteras. Además comprueba que los índices no cambian las respuestas: con otro
+plan SQLite puede devolver las filas en otro orden, y el orden decide los empates entre counters.
+
+No necesita pokemon.db: por defecto genera en memoria una base de datos sintética (datos_sinteticos.py) con las
+funciones de carga de crear_pokemon.py. Con --db se comprueba una copia en memoria de una base de datos real, con el
+esquema ya migrado (la base de datos original no se modifica).
+
+Las consultas no se copian aquí: se ejecutan las funciones reales de los scripts capturando el SQL que lanzan
+(set_trace_callback), y después se pide el plan de cada una. Si algún plan no es el esperado o alguna respuesta cambia,
+termina con código 1. test_planes.py hace las mismas comprobaciones como prueba automática.
+
+Uso: python comprobar_planes.py [--pokemons 1300] [--semilla 0] [--db pokemon.db]
+"""
+import argparse
+import sqlite3
+import sys
+
+from cache_counters import cargar_indice
+from clases_tipos import construir_clases, encontrar_fuerte_contra
+from counter_equipo_random import (encontrar_equipo_fuerte, generar_equipo_random, obtener_equipo_por_nombres,
+                                   obtener_informacion_equipo)
+from crear_pokemon import (COLUMNAS_RELACIONES, INDICES, TABLAS_NOMBRES, CargadorPokemon, aplicar_diferencias,
+                           completar_movimientos, crear_tablas, migrar_esquema, sincronizar_pokemons)
+from datos_sinteticos import detalles_movimiento, iterar_detalles
+from grafo_pokemon_counter import cargar_tipos_por_pokemon
+from indice_movimientos import construir_indice_movimientos
+from ranking_counters import cargar_estadisticas
+
+# Base de datos en memoria con la que se comprueban los planes: sintética (o una copia de ruta_db), con las columnas,
+# los movimientos completados y los índices y estadísticas de migrar_esquema, como queda después de crear_pokemon.py
+def crear_base_datos(cantidad=1300, semilla=0, ruta_db=None):
+    conexion = sqlite3.connect(':memory:')
+    if ruta_db:
+        origen = sqlite3.connect(ruta_db)
+        origen.backup(conexion)
+        origen.close()
+    cursor = conexion.cursor()
+    crear_tablas(cursor)
+    if not ruta_db:
+        cargador = CargadorPokemon(cursor)
+        for pokemon, detalles in iterar_detalles(cantidad, semilla):
+            cargador.agregar(detalles['id'], pokemon['name'], pokemon['url'], detalles)
+        cargador.volcar()
+        conexion.commit()
+    # Solo rellena los movimientos que falten (en la copia de una base de datos real, con datos sintéticos)
+    completar_movimientos(conexion, hilos=1, obtener_detalles=detalles_movimiento)
+    migrar_esquema(conexion)
+    return conexion
+
+# Ejecuta una función y devuelve las sentencias SELECT que ha lanzado (con los parámetros ya sustituidos)
+def capturar_consultas(conexion, funcion, *args):
+    sentencias = []
+    conexion.set_trace_callback(sentencias.append)
+    try:
+        funcion(conexion.cursor(), *args)
+    finally:
+        conexion.set_trace_callback(None)
+    return [sql for sql in sentencias if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+# Devuelve las líneas del plan de una consulta
+def obtener_plan(conexion, sql):
+    return [fila[3] for fila in conexion.execute("EXPLAIN QUERY PLAN " + sql)]
+
+# Consultas a comprobar: (descripción, función que las lanza, argumentos, lo que tiene que aparecer en el plan de cada
+# una, en el orden en que se ejecutan, tablas que sí se pueden recorrer enteras). Un 'SCAN' en una tabla que no está en
+# permitir_scan es un error (recorrer el resultado de una subconsulta, 'SCAN (subquery-N)', sí está permitido). Las
+# que cargan todo el roster de una vez pueden recorrer la tabla por la que empiezan, o la subconsulta con nombre de
+# la que salen sus filas
+def consultas_calientes(conexion):
+    pokemon_id, nombre, url = conexion.execute("SELECT id, name, url FROM pokemon LIMIT 1").fetchone()
+    move_id = conexion.execute("SELECT move_id FROM pokemon_moves LIMIT 1").fetchone()[0]
+    ability_id = conexion.execute("SELECT ability_id FROM pokemon_abilities LIMIT 1").fetchone()[0]
+    equipo = [{'types': ['fire', 'water']}]
+    # Las filas que ya tiene el pokemon: aplicar_diferencias las compara y no escribe nada
+    filas = {tabla: conexion.execute(f"SELECT {', '.join(columnas)} FROM {tabla} WHERE pokemon_id = ?",
+                                     (pokemon_id,)).fetchall()
+             for tabla, (columnas, _) in COLUMNAS_RELACIONES.items()}
+    indice = cargar_indice(conexion)  # deja el índice guardado para medir la lectura desde la caché
+
+    # Funciones que reciben la conexión en vez del cursor, y búsquedas inversas que no tienen función propia
+    sincronizar = lambda cursor: sincronizar_pokemons(cursor.connection, [])
+    completar = lambda cursor: completar_movimientos(cursor.connection, hilos=1, obtener_detalles=detalles_movimiento)
+    indice_guardado = lambda cursor: cargar_indice(cursor.connection)
+    quien_aprende = lambda cursor, move: cursor.execute(
+        "SELECT pokemon_id FROM pokemon_moves WHERE move_id = ?", (move,)).fetchall()
+    quien_tiene = lambda cursor, ability: cursor.execute(
+        "SELECT pokemon_id FROM pokemon_abilities WHERE ability_id = ?", (ability,)).fetchall()
+
+    # Consultas que repiten varias funciones
+    tipos = ['SCAN p', 'sqlite_autoindex_pokemon_types_1 (pokemon_id=?)']
+    por_pokemon = [[f'sqlite_autoindex_{tabla}_1 (pokemon_id=?)'] for tabla in COLUMNAS_RELACIONES]
+    # obtener_informacion_equipo: tipos, habilidades, movimientos y estadísticas
+    informacion = [por_pokemon[0], por_pokemon[2], por_pokemon[3], por_pokemon[1]]
+
+    return [
+        ("crear_pokemon: pokemons guardados y huellas de la sincronización", sincronizar, (),
+         [[]] * len(TABLAS_NOMBRES) + [[], []], set(TABLAS_NOMBRES) | {'pokemon', 'pokemon_sync'}),
+        ("crear_pokemon: diferencias de un pokemon", aplicar_diferencias, (pokemon_id, nombre, url, filas),
+         por_pokemon + [['SEARCH pokemon USING INTEGER PRIMARY KEY']], set()),
+        ("crear_pokemon: movimientos sin completar", completar, (), [[]], {'moves'}),
+        ("grafo_pokemon_counter: tipos de todos los pokemons", cargar_tipos_por_pokemon, (), [tipos], {'p', 'pokemon'}),
+        ("grafo_pokemon_counter: índice por clases desde la caché", indice_guardado, (),
+         [tipos, ['sqlite_autoindex_cache_indice_1 (nombre=?)']], {'p', 'pokemon'}),
+        ("grafo_pokemon_counter: movimientos de cobertura", construir_indice_movimientos, (indice,),
+         [['idx_moves_type (damage_class=?)', 'idx_pokemon_moves_move (move_id=?)']], {'mejores'}),
+        ("grafo_pokemon_counter: estadísticas para el ranking", cargar_estadisticas, (indice,),
+         [['sqlite_autoindex_pokemon_stats_1 (pokemon_id=?)']], {'p', 'pokemon'}),
+        ("counter_equipo_random: información del equipo", obtener_informacion_equipo, ([pokemon_id],),
+         informacion, set()),
+        ("counter_equipo_random: equipo rival al azar", generar_equipo_random, (), [[]] + informacion, {'p', 'pokemon'}),
+        ("counter_equipo_random: pokemons con tipos favorables", encontrar_equipo_fuerte, (equipo,),
+         [['idx_pokemon_types_type (type_id=?)']] + informacion, set()),
+        ("counter_equipo_random: equipo por nombres", obtener_equipo_por_nombres, ([nombre],),
+         [['idx_pokemon_name (name=?)']] + informacion, set()),
+        ("quién aprende un movimiento", quien_aprende, (move_id,),
+         [['idx_pokemon_moves_move (move_id=?)']], set()),
+        ("quién tiene una habilidad", quien_tiene, (ability_id,),
+         [['idx_pokemon_abilities_ability (ability_id=?)']], set()),
+    ]
+
+# Devuelve lo que falla en un plan: lo esperado que no aparece y las tablas recorridas enteras sin permiso
+def fallos_plan(plan, esperado, permitir_scan):
+    texto = ' | '.join(plan)
+    fallos = [f"falta '{patron}'" for patron in esperado if patron not in texto]
+    fallos += [f"recorre la tabla entera ('{linea}')" for linea in plan
+               if linea.startswith('SCAN ') and not linea.startswith('SCAN (subquery')
+               and linea.split()[1] not in permitir_scan]
+    return fallos
+
+# Respuestas que dependen del orden de las filas: el counter de cada pokemon (con empate, el primero en el orden de
+# carga) y su movimiento de cobertura de cada tipo
+def calcular_respuestas(conexion):
+    cursor = conexion.cursor()
+    indice = construir_clases(cursor)
+    counters = {nombre: encontrar_fuerte_contra(nombre, indice) for nombre in indice['nombres']}
+    return indice['nombres'], counters, construir_indice_movimientos(cursor, indice)['movimiento']
+
+# Compara las respuestas en dos copias en memoria de la base de datos: una con los índices de migrar_esquema y otra sin
+# ellos. Devuelve cuántos pokemons tienen otra respuesta
+def comprobar_respuestas(conexion):
+    con_indices = sqlite3.connect(':memory:')
+    sin_indices = sqlite3.connect(':memory:')
+    conexion.backup(con_indices)
+    conexion.backup(sin_indices)
+    migrar_esquema(con_indices)
+    for nombre in INDICES:
+        sin_indices.execute(f"DROP INDEX IF EXISTS {nombre}")
+    sin_indices.execute("ANALYZE")
+
+    nombres, counters, movimientos = calcular_respuestas(con_indices)
+    nombres_sin, counters_sin, movimientos_sin = calcular_respuestas(sin_indices)
+    con_indices.close()
+    sin_indices.close()
+    if nombres != nombres_sin:
+        return sum(a != b for a, b in zip(nombres, nombres_sin)) + abs(len(nombres) - len(nombres_sin))
+    cambiados = {nombre for nombre in nombres if counters[nombre] != counters_sin[nombre]}
+    cambiados |= {nombres[i] for i, _ in movimientos.items() ^ movimientos_sin.items()}
+    return len(cambiados)
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprueba los planes de las consultas más usadas.")
+    parser.add_argument("--pokemons", type=int, default=1300, help="pokemons de la base de datos sintética")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla de los datos sintéticos")
+    parser.add_argument("--db", help="comprueba una copia de esta base de datos en vez de una sintética")
+    args = parser.parse_args()
+
+    print(f"Preparando la base de datos ({args.db or f'{args.pokemons} pokemons sintéticos'})...")
+    conexion = crear_base_datos(args.pokemons, args.semilla, args.db)
+    errores = 0
+    for descripcion, funcion, argumentos, esperados, permitir_scan in consultas_calientes(conexion):
+        sentencias = capturar_consultas(conexion, funcion, *argumentos)
+        print(f"- {descripcion}")
+        if len(sentencias) != len(esperados):
+            print(f"    ERROR: se esperaban {len(esperados)} consultas y se lanzaron {len(sentencias)}")
+            errores += 1
+            continue
+        for sql, esperado in zip(sentencias, esperados):
+            plan = obtener_plan(conexion, sql)
+            fallos = fallos_plan(plan, esperado, permitir_scan)
+            print(f"    {'ERROR' if fallos else 'ok'}: {' | '.join(plan)}")
+            for fallo in fallos:
+                print(f"      {fallo}")
+            errores += bool(fallos)
+
+    cambiados = comprobar_respuestas(conexion)
+    print("- mismas respuestas con y sin los índices")
+    if cambiados:
+        print(f"    ERROR: {cambiados} pokemons tienen otra respuesta sin los índices")
+        errores += 1
+    else:
+        print("    ok")
+    conexion.close()
+
+    if errores:
+        print(f"{errores} comprobaciones han fallado")
+        sys.exit(1)
+    print("Todos los planes son los esperados y los índices no cambian las respuestas.")
+
+if __name__ == "__main__":
+    main()
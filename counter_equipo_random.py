@@ -3,34 +3,12 @@ Este script, crea un equipo fuerte contra el equipo generado de manera aleatoria
 De esta forma, este script encuentra en función de los tipos, habilidades y estadísticas 
 del equipo random, un equipo de pokemons con muy buenas fortalezas contra el equipo generado
 """
-import sqlite3
+import argparse
 import random
+import sqlite3
 
-# Conexión a la base de datos
-conexion = sqlite3.connect("pokemon.db")
-cursor = conexion.cursor()
-
-# Tabla de efectividades entre tipos
-efec = {
-    'normal': {'fuerte': [], 'debil': ['rock', 'steel'], 'inmune': ['ghost']},
-    'fire': {'fuerte': ['grass', 'ice', 'bug', 'steel'], 'debil': ['fire', 'water', 'rock', 'dragon'], 'inmune': []},
-    'water': {'fuerte': ['fire', 'ground', 'rock'], 'debil': ['water', 'grass', 'dragon'], 'inmune': []},
-    'electric': {'fuerte': ['water', 'flying'], 'debil': ['electric', 'grass', 'dragon'], 'inmune': ['ground']},
-    'grass': {'fuerte': ['water', 'ground', 'rock'], 'debil': ['fire', 'grass', 'poison', 'flying', 'bug', 'dragon', 'steel'], 'inmune': []},
-    'ice': {'fuerte': ['grass', 'ground', 'flying', 'dragon'], 'debil': ['fire', 'water', 'ice', 'steel'], 'inmune': []},
-    'fighting': {'fuerte': ['normal', 'ice', 'rock', 'dark', 'steel'], 'debil': ['poison', 'flying', 'psychic', 'bug', 'fairy'], 'inmune': ['ghost']},
-    'poison': {'fuerte': ['grass', 'fairy'], 'debil': ['poison', 'ground', 'rock', 'ghost'], 'inmune': ['steel']},
-    'ground': {'fuerte': ['fire', 'electric', 'poison', 'rock', 'steel'], 'debil': ['grass', 'bug'], 'inmune': ['flying']},
-    'flying': {'fuerte': ['grass', 'fighting', 'bug'], 'debil': ['electric', 'rock', 'steel'], 'inmune': []},
-    'psychic': {'fuerte': ['fighting', 'poison'], 'debil': ['psychic', 'steel'], 'inmune': ['dark']},
-    'bug': {'fuerte': ['grass', 'psychic', 'dark'], 'debil': ['fire', 'fighting', 'poison', 'flying', 'ghost', 'steel', 'fairy'], 'inmune': []},
-    'rock': {'fuerte': ['fire', 'ice', 'flying', 'bug'], 'debil': ['fighting', 'ground', 'steel'], 'inmune': []},
-    'ghost': {'fuerte': ['ghost', 'psychic'], 'debil': ['dark'], 'inmune': ['normal']},
-    'dragon': {'fuerte': ['dragon'], 'debil': ['steel'], 'inmune': ['fairy']},
-    'dark': {'fuerte': ['psychic', 'ghost'], 'debil': ['fighting', 'dark', 'fairy'], 'inmune': []},
-    'steel': {'fuerte': ['ice', 'rock', 'fairy'], 'debil': ['fire', 'water', 'electric', 'steel'], 'inmune': ['poison']},
-    'fairy': {'fuerte': ['fighting', 'dragon', 'dark'], 'debil': ['fire', 'poison', 'steel'], 'inmune': ['dragon']}
-}
+import instrumentacion
+from tabla_tipos import FUERTE_CONTRA
 
 # Función para obtener los tipos fuertes contra un conjunto de tipos
 def obtener_tipos_fuertes(tipos_rivales):
@@ -39,70 +17,90 @@ def obtener_tipos_fuertes(tipos_rivales):
     """
     tipos_favorables = set()
     for tipo_rival in tipos_rivales:
-        if tipo_rival in efec:
-            tipos_favorables.update(efec[tipo_rival]['fuerte'])
+        if tipo_rival in FUERTE_CONTRA:
+            tipos_favorables.update(FUERTE_CONTRA[tipo_rival])
 
     # Filtrar los tipos que ya están representados en el equipo rival
     tipos_favorables.difference_update(tipos_rivales)
     
     return list(tipos_favorables)
 
+# Función para obtener la información completa de varios Pokémon a la vez (una consulta por tabla con IN (...))
+def obtener_informacion_equipo(cursor, pokemon_ids):
+    pokemon_ids = list(pokemon_ids)
+    informacion = {pokemon_id: {'types': [], 'ability': None, 'moves': [], 'stats': {}} for pokemon_id in pokemon_ids}
+    if not pokemon_ids:
+        return informacion
+    instrumentacion.contar('equipo.pokemons', len(pokemon_ids))
+    marcadores = ', '.join('?' for _ in pokemon_ids)
+
+    with instrumentacion.etapa('sql.equipo.tipos'):
+        cursor.execute(f'''
+            SELECT pt.pokemon_id, t.name
+            FROM pokemon_types pt
+            JOIN types t ON pt.type_id = t.id
+            WHERE pt.pokemon_id IN ({marcadores})
+        ''', pokemon_ids)
+        for pokemon_id, tipo in cursor.fetchall():
+            informacion[pokemon_id]['types'].append(tipo)
+
+    # Una habilidad al azar por Pokémon, elegida en SQL
+    with instrumentacion.etapa('sql.equipo.habilidades'):
+        cursor.execute(f'''
+            SELECT pokemon_id, name FROM (
+                SELECT pa.pokemon_id, a.name,
+                       ROW_NUMBER() OVER (PARTITION BY pa.pokemon_id ORDER BY RANDOM()) AS n
+                FROM pokemon_abilities pa
+                JOIN abilities a ON pa.ability_id = a.id
+                WHERE pa.pokemon_id IN ({marcadores})
+            )
+            WHERE n = 1
+        ''', pokemon_ids)
+        for pokemon_id, habilidad in cursor.fetchall():
+            informacion[pokemon_id]['ability'] = habilidad
+
+    # Cuatro movimientos al azar por Pokémon, elegidos en SQL en vez de traer todos para hacer random.sample
+    # (DISTINCT porque un mismo movimiento puede aparecer con varios métodos de aprendizaje)
+    with instrumentacion.etapa('sql.equipo.movimientos'):
+        cursor.execute(f'''
+            SELECT pokemon_id, name FROM (
+                SELECT pokemon_id, name,
+                       ROW_NUMBER() OVER (PARTITION BY pokemon_id ORDER BY RANDOM()) AS n
+                FROM (
+                    SELECT DISTINCT pm.pokemon_id, m.name
+                    FROM pokemon_moves pm
+                    JOIN moves m ON pm.move_id = m.id
+                    WHERE pm.pokemon_id IN ({marcadores})
+                )
+            )
+            WHERE n <= 4
+        ''', pokemon_ids)
+        for pokemon_id, movimiento in cursor.fetchall():
+            informacion[pokemon_id]['moves'].append(movimiento)
+
+    with instrumentacion.etapa('sql.equipo.estadisticas'):
+        cursor.execute(f'''
+            SELECT ps.pokemon_id, s.name, ps.value
+            FROM pokemon_stats ps
+            JOIN stats s ON ps.stat_id = s.id
+            WHERE ps.pokemon_id IN ({marcadores})
+        ''', pokemon_ids)
+        for pokemon_id, stat_name, value in cursor.fetchall():
+            informacion[pokemon_id]['stats'][stat_name] = value
+
+    return informacion
+
 # Función para obtener la información completa de un Pokémon
-def obtener_informacion_pokemon(pokemon_id):
-    cursor.execute(''' 
-        SELECT t.name
-        FROM pokemon_types pt
-        JOIN types t ON pt.type_id = t.id
-        WHERE pt.pokemon_id = ?
-    ''', (pokemon_id,))
-    tipos = [tipo[0] for tipo in cursor.fetchall()]
-
-    cursor.execute(''' 
-        SELECT a.name
-        FROM pokemon_abilities pa
-        JOIN abilities a ON pa.ability_id = a.id
-        WHERE pa.pokemon_id = ?
-    ''', (pokemon_id,))
-    habilidades = [habilidad[0] for habilidad in cursor.fetchall()]
-    habilidad_random = random.choice(habilidades) if habilidades else None
-
-    cursor.execute(''' 
-        SELECT m.name
-        FROM pokemon_moves pm
-        JOIN moves m ON pm.move_id = m.id
-        WHERE pm.pokemon_id = ?
-    ''', (pokemon_id,))
-    movimientos = [movimiento[0] for movimiento in cursor.fetchall()]
-    movimientos_random = random.sample(movimientos, min(4, len(movimientos)))
-
-    cursor.execute(''' 
-        SELECT s.name, ps.value
-        FROM pokemon_stats ps
-        JOIN stats s ON ps.stat_id = s.id
-        WHERE ps.pokemon_id = ?
-    ''', (pokemon_id,))
-    estadisticas = {stat_name: value for stat_name, value in cursor.fetchall()}
-
-    return {
-        'types': tipos,
-        'ability': habilidad_random,
-        'moves': movimientos_random,
-        'stats': estadisticas
-    }
+def obtener_informacion_pokemon(cursor, pokemon_id):
+    return obtener_informacion_equipo(cursor, [pokemon_id])[pokemon_id]
 
-# Función para obtener un equipo aleatorio
-def generar_equipo_random():
-    cursor.execute('''
-        SELECT p.id, p.name
-        FROM pokemon p
-        ORDER BY RANDOM()
-        LIMIT 6
-    ''')
-    pokemons_seleccionados = cursor.fetchall()
+# Función para montar un equipo a partir de filas (id, nombre), cargando la información de todos de una vez
+def montar_equipo(cursor, pokemons_seleccionados):
+    informacion = obtener_informacion_equipo(cursor, [pokemon_id for pokemon_id, _ in pokemons_seleccionados])
 
     equipo = []
     for pokemon_id, pokemon_name in pokemons_seleccionados:
-        info_pokemon = obtener_informacion_pokemon(pokemon_id)
+        info_pokemon = informacion[pokemon_id]
         pokemon = {
             'id': pokemon_id,
             'name': pokemon_name,
@@ -115,8 +113,20 @@ def generar_equipo_random():
 
     return equipo
 
+# Función para obtener un equipo aleatorio
+def generar_equipo_random(cursor):
+    with instrumentacion.etapa('sql.equipo_random'):
+        cursor.execute('''
+            SELECT p.id, p.name
+            FROM pokemon p
+            ORDER BY RANDOM()
+            LIMIT 6
+        ''')
+        seleccionados = cursor.fetchall()
+    return montar_equipo(cursor, seleccionados)
+
 # Función para encontrar un equipo fuerte
-def encontrar_equipo_fuerte(equipo_rival):
+def encontrar_equipo_fuerte(cursor, equipo_rival):
     """
     Genera un equipo que contrarreste eficientemente los tipos del equipo rival.
     """
@@ -126,57 +136,166 @@ def encontrar_equipo_fuerte(equipo_rival):
 
     tipos_favorables = obtener_tipos_fuertes(tipos_rivales)
 
-    equipo_fuerte = []
-    
+    if not tipos_favorables:
+        return []
+
+    with instrumentacion.etapa('sql.tipos_favorables'):
+        cursor.execute('''
+            SELECT p.id, p.name
+            FROM pokemon p
+            JOIN pokemon_types pt ON p.id = pt.pokemon_id
+            JOIN types t ON pt.type_id = t.id
+            WHERE t.name IN ({})
+            GROUP BY p.id
+            ORDER BY RANDOM()
+            LIMIT 6
+        '''.format(', '.join('?' for _ in tipos_favorables)), tipos_favorables)
+        seleccionados = cursor.fetchall()
+
+    return montar_equipo(cursor, seleccionados)
+
+# Función para obtener un equipo a partir de los nombres de sus pokemons (los que no existen se devuelven aparte)
+def obtener_equipo_por_nombres(cursor, nombres):
+    if not nombres:
+        return [], []
     cursor.execute('''
-        SELECT p.id, p.name
-        FROM pokemon p
-        JOIN pokemon_types pt ON p.id = pt.pokemon_id
-        JOIN types t ON pt.type_id = t.id
-        WHERE t.name IN ({})
-        GROUP BY p.id
-        ORDER BY RANDOM()
-        LIMIT 6
-    '''.format(', '.join('?' for _ in tipos_favorables)), tipos_favorables)
-
-    pokemons_seleccionados = cursor.fetchall()
+        SELECT id, name FROM pokemon WHERE name IN ({})
+    '''.format(', '.join('?' for _ in nombres)), nombres)
+    id_por_nombre = {nombre: pokemon_id for pokemon_id, nombre in cursor.fetchall()}
 
-    for pokemon_id, pokemon_name in pokemons_seleccionados:
-        info_pokemon = obtener_informacion_pokemon(pokemon_id)
-        pokemon = {
-            'id': pokemon_id,
-            'name': pokemon_name,
-            'types': info_pokemon['types'],
-            'ability': info_pokemon['ability'],
-            'moves': info_pokemon['moves'],
-            'stats': info_pokemon['stats']
-        }
-        equipo_fuerte.append(pokemon)
+    no_encontrados = [nombre for nombre in nombres if nombre not in id_por_nombre]
+    encontrados = [(id_por_nombre[nombre], nombre) for nombre in nombres if nombre in id_por_nombre]
+    return montar_equipo(cursor, encontrados), no_encontrados
 
-    return equipo_fuerte
+# Resuelve los nombres del rival escritos por el usuario (admite alias y erratas, ver indice_nombres.py).
+# Devuelve None si alguno no está claro, después de mostrar las sugerencias
+def resolver_rival(texto, nombres):
+    from indice_nombres import IndiceNombres, mensaje_no_encontrado
+    consultas = [consulta.strip() for consulta in texto.split(',') if consulta.strip()]
+    resueltos, dudosos = IndiceNombres(nombres).resolver_todos(consultas)
+    for consulta, sugerencias in dudosos.items():
+        print(mensaje_no_encontrado(consulta, sugerencias))
+    return None if dudosos else resueltos
 
-# Generar equipo rival
-print("Generando equipo rival...")
-equipo_rival = generar_equipo_random()
+# Mensaje de cada resultado de simulador_combate.combate_equipos (desde el punto de vista del mejor equipo)
+RESULTADOS_COMBATE = {1: "gana el mejor equipo", -1: "gana el equipo rival", 0: "empate"}
 
-# Encontrar el mejor equipo contra el rival
-print("Buscando mejor equipo contra el rival...")
-equipo_fuerte = encontrar_equipo_fuerte(equipo_rival)
+# Función para simular el combate entre el mejor equipo y el rival con simulador_combate.py
+def simular_combate(datos, equipo_fuerte, equipo_rival):
+    """
+    Devuelve (resultado, turnos, ps_restantes) o None si algún equipo se queda vacío (los pokemons sin tipos no están
+    en el índice y no combaten).
+    """
+    from simulador_combate import combate_equipos
+    propios = [pokemon['name'] for pokemon in equipo_fuerte if pokemon['name'] in datos['indice']]
+    rivales = [pokemon['name'] for pokemon in equipo_rival if pokemon['name'] in datos['indice']]
+    if not propios or not rivales:
+        return None
+    with instrumentacion.etapa('combate'):
+        return combate_equipos(datos, propios, rivales)
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un equipo random y busca el equipo más fuerte contra él.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--estrategia", choices=("optima", "aleatoria"), default="optima",
+                        help="optima: busca el mejor equipo (optimizador_equipo.py); aleatoria: 6 al azar con tipos favorables")
+    parser.add_argument("--semilla", type=int, default=None,
+                        help="semilla del optimizador (mismo rival -> mismo equipo) y, con --snapshot, del equipo rival")
+    parser.add_argument("--tiempo", type=float,
+                        help="corta la búsqueda del optimizador a los N segundos (el resultado ya no se repite con --semilla)")
+    parser.add_argument("--snapshot",
+                        help="con la estrategia optima, lee los datos de un snapshot de snapshot_pokemon.py en vez de pokemon.db")
+    parser.add_argument("--rival", help="nombres del equipo rival separados por comas (si no se da, se genera al azar)")
+    parser.add_argument("--perfil", nargs="?", const="tiempos",
+                        help="mide las etapas (tiempos) y opcionalmente guarda cprofile/tracemalloc, p. ej. "
+                             "--perfil tiempos,cprofile (ver instrumentacion.py)")
+    args = parser.parse_args()
+    if args.perfil:
+        instrumentacion.activar(args.perfil)
+    if args.snapshot and args.estrategia != "optima":
+        parser.error("--snapshot solo está disponible con la estrategia optima")
+
+    # Conexión a la base de datos (con un snapshot no hace falta)
+    conexion = None if args.snapshot else instrumentacion.vigilar_conexion(sqlite3.connect(args.db))
+    cursor = None if args.snapshot else conexion.cursor()
+    semilla = args.semilla if args.semilla is not None else random.randrange(2 ** 32)
+
+    if args.snapshot:
+        from optimizador_equipo import elegir_equipo_optimo
+        from simulador_combate import preparar_datos_combate
+        from snapshot_pokemon import (abrir_snapshot, avisar_si_caducado, estadisticas_desde_snapshot,
+                                      indice_desde_snapshot, informacion_pokemon)
+        snapshot = abrir_snapshot(args.snapshot)
+        avisar_si_caducado(snapshot, args.snapshot, args.db)
+        indice = indice_desde_snapshot(snapshot)
+        datos_combate = preparar_datos_combate(indice, snapshot['estadisticas'])
+        generador = random.Random(semilla)  # con --semilla, mismo rival y mismos movimientos
+        if args.rival:
+            rival = resolver_rival(args.rival, indice['nombres'])
+            if rival is None:
+                return
+            equipo_rival = [informacion_pokemon(snapshot, indice['indice'][nombre], generador) for nombre in rival]
+        else:
+            print("Generando equipo rival...")
+            equipo_rival = [informacion_pokemon(snapshot, i, generador)
+                            for i in generador.sample(range(len(indice['nombres'])), min(6, len(indice['nombres'])))]
+        print("Buscando mejor equipo contra el rival...")
+        with instrumentacion.etapa('optimizador'):
+            nombres = elegir_equipo_optimo(equipo_rival, indice, estadisticas_desde_snapshot(snapshot), semilla, args.tiempo)
+        equipo_fuerte = [informacion_pokemon(snapshot, indice['indice'][nombre], generador) for nombre in nombres]
+    else:
+        if args.rival:
+            cursor.execute("SELECT name FROM pokemon")
+            rival = resolver_rival(args.rival, [fila[0] for fila in cursor.fetchall()])
+            if rival is None:
+                conexion.close()
+                return
+            equipo_rival, _ = obtener_equipo_por_nombres(cursor, rival)
+        else:
+            # Generar equipo rival
+            print("Generando equipo rival...")
+            equipo_rival = generar_equipo_random(cursor)
+
+        # Encontrar el mejor equipo contra el rival
+        print("Buscando mejor equipo contra el rival...")
+        from cache_counters import cargar_indice
+        from simulador_combate import cargar_datos_combate
+        indice = cargar_indice(conexion)
+        if args.estrategia == "optima":
+            from optimizador_equipo import encontrar_equipo_optimo
+            from ranking_counters import cargar_estadisticas
+            estadisticas = cargar_estadisticas(cursor, indice)
+            with instrumentacion.etapa('optimizador'):
+                equipo_fuerte = encontrar_equipo_optimo(cursor, equipo_rival, indice, estadisticas, semilla, args.tiempo)
+        else:
+            equipo_fuerte = encontrar_equipo_fuerte(cursor, equipo_rival)
+        datos_combate = cargar_datos_combate(cursor, indice)
+
+
+    print("\nEquipo Rival:")
+    for pokemon in equipo_rival:
+        print(f"{pokemon['name']} - Tipos: {', '.join(pokemon['types'])}")
 
+    print("\nMejor Equipo:")
+    for pokemon in equipo_fuerte:
+        print(f"{pokemon['name']} - Tipos: {', '.join(pokemon['types'])}")
+        print(f"  Habilidad: {pokemon['ability']}")
+        print(f"  Movimientos: {', '.join(pokemon['moves'])}")
+        print("  Estadísticas:")
+        for stat, value in pokemon['stats'].items():
+            print(f"    {stat}: {value}")
+        print()
 
-print("\nEquipo Rival:")
-for pokemon in equipo_rival:
-    print(f"{pokemon['name']} - Tipos: {', '.join(pokemon['types'])}")
+    # Combate simulado entre los dos equipos (estadísticas base, STAB y tipos)
+    combate = simular_combate(datos_combate, equipo_fuerte, equipo_rival)
+    if combate is not None:
+        resultado, turnos, ps_restantes = combate
+        print(f"Combate simulado: {RESULTADOS_COMBATE[resultado]} en {turnos} turnos "
+              f"(al mejor equipo le queda el {ps_restantes:.0%} de los PS)")
 
-print("\nMejor Equipo:")
-for pokemon in equipo_fuerte:
-    print(f"{pokemon['name']} - Tipos: {', '.join(pokemon['types'])}")
-    print(f"  Habilidad: {pokemon['ability']}")
-    print(f"  Movimientos: {', '.join(pokemon['moves'])}")
-    print("  Estadísticas:")
-    for stat, value in pokemon['stats'].items():
-        print(f"    {stat}: {value}")
-    print()
+    # Cerrar la conexión
+    if conexion is not None:
+        conexion.close()
 
-# Cerrar la conexión
-conexion.close()
+if __name__ == "__main__":
+    main()
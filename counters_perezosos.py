@@ -0,0 +1,71 @@
+"""
+Motor perezoso para grafo_pokemon_counter.py (--motor perezoso). El grafo calcula las ~1,7 millones de aristas antes de
+la primera pregunta, aunque en una sesión solo se consulten unos pocos pokemons. Aquí solo se cargan los tipos de
+cada pokemon y, al consultar uno, se calcula su columna (la ponderación de todos los pokemons contra él) con una sola
+pasada vectorizada sobre el roster.
+
+Las columnas se guardan en una caché LRU limitada (functools.lru_cache) cuya clave es la combinación de tipos del
+defensor, porque todos los pokemons con los mismos tipos tienen la misma columna. Así la memoria no crece en un proceso
+largo y cache_info() dice cuántas consultas se han servido de la caché.
+
+encontrar_fuerte_contra devuelve exactamente lo mismo que la versión del grafo.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+import instrumentacion
+from matriz_efectividad import MULTIPLICADORES, codificar_tipos
+from tabla_tipos import ID_TIPO, SIN_TIPO
+
+# Columnas que se guardan como mucho (hay unas 170 combinaciones de tipos; cada columna ocupa 4 bytes por pokemon)
+TAMANO_CACHE = 128
+
+class CountersPerezosos:
+    """
+    Roster codificado (pokemons x tipos, como en matriz_efectividad.py) y caché de columnas por combinación de tipos.
+    Cada entrada de la caché es (columna, salientes): la ponderación de cada pokemon contra esa combinación y cuántos
+    pokemons recibe con ponderación mayor que 0 un pokemon con esos tipos.
+    """
+    def __init__(self, tipos_por_pokemon, tamano_cache=TAMANO_CACHE):
+        self.nombres = list(tipos_por_pokemon)
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.tipos = list(tipos_por_pokemon.values())
+        self.codigos = codificar_tipos(self.tipos)
+        self._columna = lru_cache(maxsize=tamano_cache)(self._calcular_columna)
+
+    # Una pasada sobre el roster: producto de los multiplicadores de cada tipo del roster contra cada tipo de la clave
+    def _calcular_columna(self, clave):
+        with instrumentacion.etapa('perezoso.columna'):
+            propios = [ID_TIPO.get(tipo, SIN_TIPO) for tipo in clave]
+            columna = np.ones(len(self.nombres), dtype=np.float32)
+            salientes = np.ones(len(self.nombres), dtype=np.float32)
+            for k in range(self.codigos.shape[1]):
+                for tipo in propios:
+                    columna *= MULTIPLICADORES[self.codigos[:, k], tipo]
+                    salientes *= MULTIPLICADORES[tipo, self.codigos[:, k]]
+            columna.flags.writeable = False  # se comparte entre todas las consultas de la misma combinación
+            return columna, int(np.count_nonzero(salientes))
+
+    # Estadísticas de la caché (aciertos, fallos, tamaño máximo y actual)
+    def cache_info(self):
+        return self._columna.cache_info()
+
+    # Función para buscar el pokémon más fuerte (mismo resultado que la versión con el grafo)
+    def encontrar_fuerte_contra(self, pokemon):
+        j = self.indice.get(pokemon)
+        if j is None:
+            return f"El Pokémon '{pokemon}' no está en la base de datos."
+        # El orden de los tipos no cambia la ponderación (es un producto), así que la clave va ordenada
+        columna, salientes = self._columna(tuple(sorted(self.tipos[j])))
+
+        # Sin lazos: el propio pokemon no cuenta ni como atacante ni como defendido
+        propia = columna[j]
+        entrantes = columna.copy()
+        entrantes[j] = 0
+        salientes -= propia > 0
+        mejor = int(np.argmax(entrantes))  # con empate, el primero en el orden de carga, como en el grafo
+        if entrantes[mejor] <= 0:
+            # Sin ninguna arista, el pokemon no sería un nodo del grafo
+            return "No se encontraron atacantes efectivos." if salientes else f"El Pokémon '{pokemon}' no está en la base de datos."
+        return self.nombres[mejor], float(entrantes[mejor])
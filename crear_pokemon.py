@@ -3,16 +3,71 @@ Este script, contiene las llamadas a la api para la creación de las tablas en l
 Por un lado creo unas tablas simples que contienen los distintos pokemons, habilidades, movimientos, tipos y estadísticas, y su id asignado.
 El resto de tablas relacionan a los pokemons con sus tipos, estadísticas, movimientos y habilidades, de esta forma puedo implementar un sistema
 que sea capaz de encontar cual es el mejor counter contra un equipo random, generado con el script: counter_equipo_random.py
+
+Los detalles de cada Pokémon se descargan en paralelo con un número limitado de hilos, cada uno con su propia sesión HTTP
+(reutiliza conexiones y reintenta con espera exponencial si la API falla). Los datos se guardan por lotes, haciendo commit
+al final de cada lote, así que si la ejecución se corta, al volver a lanzarla continúa por donde se quedó.
+Cada lote se escribe con CargadorPokemon (executemany + ids cacheados en memoria), ver benchmark_carga.py.
+
+Con --sincronizar se actualiza una base de datos ya creada: para cada Pokémon se guarda en pokemon_sync el ETag de la
+API, una huella del contenido y la fecha de descarga; solo se vuelven a procesar los nuevos o cambiados, y sus
+relaciones se corrigen borrando e insertando únicamente las filas que difieren, todo en una transacción. Si cambian
+tipos o nombres se borra el índice guardado por cache_counters.py.
+
+Uso: python crear_pokemon.py [--db pokemon.db] [--api https://pokeapi.co/api/v2] [--hilos 8] [--lote 200] [--sincronizar]
 """
-import requests
+import argparse
+import hashlib
 import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentacion
+
+API_POR_DEFECTO = "https://pokeapi.co/api/v2"
+TIMEOUT = 30
+
+# Cada hilo guarda aquí su sesión HTTP, para reutilizar las conexiones abiertas entre peticiones
+_hilo_local = threading.local()
+
+# Función para crear una sesión HTTP con pool de conexiones y reintentos con espera exponencial
+def crear_sesion(conexiones=10):
+    sesion = requests.Session()
+    reintentos = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=reintentos)
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+# Devuelve la sesión del hilo actual (la crea la primera vez)
+def obtener_sesion():
+    if not hasattr(_hilo_local, "sesion"):
+        _hilo_local.sesion = crear_sesion()
+    return _hilo_local.sesion
 
 # Función para obtener todos los Pokémon desde la API
-def obtener_pokemons():
-    url = "https://pokeapi.co/api/v2/pokemon?limit=100&offset=0"
+def obtener_pokemons(api=API_POR_DEFECTO):
+    url = f"{api}/pokemon?limit=100&offset=0"
     pokemons = []
+    sesion = obtener_sesion()
     while url:
-        respuesta = requests.get(url)
+        try:
+            with instrumentacion.etapa('http.lista'):
+                respuesta = sesion.get(url, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            print(f"Error al obtener datos: {e}")
+            break
         if respuesta.status_code == 200:
             datos = respuesta.json()
             pokemons.extend(datos.get('results', []))  # Agrega los resultados a la lista
@@ -24,222 +79,635 @@ def obtener_pokemons():
 
 # Función para obtener los detalles de un Pokémon desde su URL
 def obtener_detalles_pokemon(url):
-    respuesta = requests.get(url)
+    try:
+        with instrumentacion.etapa('http.detalles'):
+            respuesta = obtener_sesion().get(url, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error al obtener detalles del Pokémon: {e}")
+        return None
     if respuesta.status_code == 200:
         return respuesta.json()
     else:
         print(f"Error al obtener detalles del Pokémon: {respuesta.status_code}")
         return None
 
-# Conexión a la base de datos SQLite
-conexion = sqlite3.connect("pokemon.db")
-cursor = conexion.cursor()
+# Descarga condicional para la sincronización: se manda el ETag guardado y, si el Pokémon no ha cambiado, la API
+# responde 304 sin cuerpo. Devuelve (estado, detalles, etag) con estado 'nuevo', 'sin_cambios' o 'error'
+def obtener_detalles_condicional(url, etag=None):
+    cabeceras = {'If-None-Match': etag} if etag else {}
+    try:
+        with instrumentacion.etapa('http.detalles'):
+            respuesta = obtener_sesion().get(url, headers=cabeceras, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error al obtener detalles del Pokémon: {e}")
+        return 'error', None, etag
+    if respuesta.status_code == 304:
+        instrumentacion.contar('http.304')
+        return 'sin_cambios', None, etag
+    if respuesta.status_code == 200:
+        return 'nuevo', respuesta.json(), respuesta.headers.get('ETag')
+    print(f"Error al obtener detalles del Pokémon: {respuesta.status_code}")
+    return 'error', None, etag
 
-# Creación de las distintas tablas para la base de datos tablas
+# Función para obtener el tipo, la potencia y la clase de daño de un movimiento (la API admite el nombre en la url)
+def obtener_detalles_movimiento(api, nombre):
+    try:
+        with instrumentacion.etapa('http.movimientos'):
+            respuesta = obtener_sesion().get(f"{api}/move/{nombre}/", timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error al obtener el movimiento {nombre}: {e}")
+        return None
+    if respuesta.status_code == 200:
+        return respuesta.json()
+    print(f"Error al obtener el movimiento {nombre}: {respuesta.status_code}")
+    return None
 
-# Tabla para los Pokémon (id, nombre y url)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pokemon (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL,
-        url TEXT NOT NULL
-    )
-''')
+# Columnas de moves que se añadieron después (ALTER TABLE no admite FOREIGN KEY como restricción de tabla)
+COLUMNAS_MOVIMIENTOS = {'type_id': 'INTEGER REFERENCES types (id)', 'power': 'INTEGER', 'damage_class': 'TEXT'}
 
-#Tabla para los tipos (id y nombre del tipo)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS types (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-    )
-''')
-
-# Tabla que relaciona pokemons con sus posibles movimientos (id pokemon e id tipo)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pokemon_types (
-        pokemon_id INTEGER,
-        type_id INTEGER,
-        PRIMARY KEY (pokemon_id, type_id),
-        FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
-        FOREIGN KEY (type_id) REFERENCES types (id)
-    )
-''')
+# Creación de las distintas tablas para la base de datos
+def crear_tablas(cursor):
+    # Tabla para los Pokémon (id, nombre y url)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL
+        )
+    ''')
 
-# Tabla para las estadísticas (id y nombre de la estadística)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS stats (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-    )
-''')
-
-# Tabla que relaciona pokemons con sus estadísticas (id pokemon e id estadística)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pokemon_stats (
-        pokemon_id INTEGER,
-        stat_id INTEGER,
-        value INTEGER NOT NULL,
-        PRIMARY KEY (pokemon_id, stat_id),
-        FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
-        FOREIGN KEY (stat_id) REFERENCES stats (id)
-    )
-''')
+    #Tabla para los tipos (id y nombre del tipo)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
 
-# Tabla para las habilidades (id y nombre de la habilidad)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS abilities (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-    )
-''')
-
-# Tabla que relaciona pokemons con sus habilidades (id pokemon e id habilidad) y si es escondida (0 si no lo es (false), 1 si lo es (true))
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pokemon_abilities (
-        pokemon_id INTEGER,
-        ability_id INTEGER,
-        is_hidden BOOLEAN NOT NULL,
-        PRIMARY KEY (pokemon_id, ability_id),
-        FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
-        FOREIGN KEY (ability_id) REFERENCES abilities (id)
-    )
+    # Tabla que relaciona pokemons con sus posibles movimientos (id pokemon e id tipo)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon_types (
+            pokemon_id INTEGER,
+            type_id INTEGER,
+            PRIMARY KEY (pokemon_id, type_id),
+            FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
+            FOREIGN KEY (type_id) REFERENCES types (id)
+        )
+    ''')
 
-# Tabla para los movimientos (id y nombre del movimiento)
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS moves (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL
-    )
-''')
-
-
-# Tabla que relaciona pokemons con sus movimientos (id pokemon, id movimiento, método de aprendizaje, y nivel a partir del cual se puede aprender)
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pokemon_moves (
-        pokemon_id INTEGER,
-        move_id INTEGER,
-        method TEXT,
-        level INTEGER,
-        PRIMARY KEY (pokemon_id, move_id, method, level),
-        FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
-        FOREIGN KEY (move_id) REFERENCES moves (id)
-    )
-''')
+    # Tabla para las estadísticas (id y nombre de la estadística)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
 
+    # Tabla que relaciona pokemons con sus estadísticas (id pokemon e id estadística)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon_stats (
+            pokemon_id INTEGER,
+            stat_id INTEGER,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (pokemon_id, stat_id),
+            FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
+            FOREIGN KEY (stat_id) REFERENCES stats (id)
+        )
+    ''')
 
-# Obtener los datos de la API
-pokemons = obtener_pokemons()
+    # Tabla para las habilidades (id y nombre de la habilidad)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS abilities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
 
-# Insertar Pokémon en la base de datos
-if pokemons:
-    print(f"Se obtuvieron {len(pokemons)} Pokémon.")
-    for pokemon in pokemons:
-        try:
-            # Extraer el ID y nombre del Pokémon
-            pokemon_id = int(pokemon['url'].split('/')[-2])  # Extrae el número antes de la última '/'
-            pokemon_name = pokemon['name']
-            pokemon_url = pokemon['url']
-
-            # Insertar en la tabla pokemon
-            cursor.execute('''
-                INSERT OR IGNORE INTO pokemon (id, name, url)
-                VALUES (?, ?, ?)
-            ''', (pokemon_id, pokemon_name, pokemon_url))
-
-            # Obtener los detalles del Pokémon
-            detalles = obtener_detalles_pokemon(pokemon_url)
-            if detalles:
-                # Obtener los tipos del Pokémon
-                tipos = detalles.get('types', [])
-                for tipo in tipos:
-                    tipo_name = tipo['type']['name']
-                    
-                    # Insertar el tipo en la tabla types si no existe
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO types (name)
-                        VALUES (?)
-                    ''', (tipo_name,))
-
-                    # Obtener el ID del tipo
-                    cursor.execute('''
-                        SELECT id FROM types WHERE name = ?
-                    ''', (tipo_name,))
-                    tipo_id = cursor.fetchone()[0]
-
-                    # Insertar la relación en pokemon_types
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO pokemon_types (pokemon_id, type_id)
-                        VALUES (?, ?)
-                    ''', (pokemon_id, tipo_id))
-                     # Obtener estadísticas del Pokémon
-                estadisticas = detalles.get('stats', [])
-                for estadistica in estadisticas:
-                    stat_name = estadistica['stat']['name']
-                    stat_value = estadistica['base_stat']
-
-                    # Insertar la estadística en la tabla stats si no existe
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO stats (name)
-                        VALUES (?)
-                    ''', (stat_name,))
-
-                    # Obtener el ID de la estadística
-                    cursor.execute('''
-                        SELECT id FROM stats WHERE name = ?
-                    ''', (stat_name,))
-                    stat_id = cursor.fetchone()[0]
-
-                    # Insertar la relación en pokemon_stats
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO pokemon_stats (pokemon_id, stat_id, value)
-                        VALUES (?, ?, ?)
-                    ''', (pokemon_id, stat_id, stat_value))
-
-                # Obtener habilidades del Pokémon
-                habilidades = detalles.get('abilities', [])
-                for habilidad in habilidades:
-                    ability_name = habilidad['ability']['name']
-                    is_hidden = habilidad['is_hidden']
-
-                    # Insertar la habilidad en la tabla abilities si no existe
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO abilities (name)
-                        VALUES (?)
-                    ''', (ability_name,))
-
-                    # Obtener el ID de la habilidad
-                    cursor.execute('''
-                        SELECT id FROM abilities WHERE name = ?
-                    ''', (ability_name,))
-                    ability_id = cursor.fetchone()[0]
-
-                    # Insertar la relación en pokemon_abilities
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO pokemon_abilities (pokemon_id, ability_id, is_hidden)
-                        VALUES (?, ?, ?)
-                    ''', (pokemon_id, ability_id, is_hidden))
-                     # Insertar movimientos del Pokémon
-                movimientos = detalles.get('moves', [])
-                for movimiento in movimientos:
-                    move_name = movimiento['move']['name']
-                    method = movimiento['version_group_details'][0]['move_learn_method']['name']
-                    level = movimiento['version_group_details'][0].get('level_learned_at', None)
-                    cursor.execute('INSERT OR IGNORE INTO moves (name) VALUES (?)', (move_name,))
-                    cursor.execute('SELECT id FROM moves WHERE name = ?', (move_name,))
-                    move_id = cursor.fetchone()[0]
-                    cursor.execute(
-                        '''INSERT OR IGNORE INTO pokemon_moves (pokemon_id, move_id, method, level) 
-                        VALUES (?, ?, ?, ?)''' 
-                        ,(pokemon_id, move_id, method, level))
-
-        # Control de error
-        except Exception as e:
-            print(f"Error procesando Pokémon: {pokemon} - {e}")
+    # Tabla que relaciona pokemons con sus habilidades (id pokemon e id habilidad) y si es escondida (0 si no lo es (false), 1 si lo es (true))
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon_abilities (
+            pokemon_id INTEGER,
+            ability_id INTEGER,
+            is_hidden BOOLEAN NOT NULL,
+            PRIMARY KEY (pokemon_id, ability_id),
+            FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
+            FOREIGN KEY (ability_id) REFERENCES abilities (id)
+        )
+    ''')
+
+    # Tabla para los movimientos (id, nombre, tipo, potencia y clase de daño: physical, special o status).
+    # El tipo, la potencia y la clase se rellenan después con completar_movimientos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS moves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            type_id INTEGER,
+            power INTEGER,
+            damage_class TEXT,
+            FOREIGN KEY (type_id) REFERENCES types (id)
+        )
+    ''')
+
+    # Tabla que relaciona pokemons con sus movimientos (id pokemon, id movimiento, método de aprendizaje, y nivel a partir del cual se puede aprender)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon_moves (
+            pokemon_id INTEGER,
+            move_id INTEGER,
+            method TEXT,
+            level INTEGER,
+            PRIMARY KEY (pokemon_id, move_id, method, level),
+            FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
+            FOREIGN KEY (move_id) REFERENCES moves (id)
+        )
+    ''')
+
+    # Tabla para la sincronización incremental (ETag de la API, huella del contenido y cuándo se descargó por última vez)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pokemon_sync (
+            pokemon_id INTEGER PRIMARY KEY,
+            etag TEXT,
+            huella TEXT NOT NULL,
+            obtenido TEXT NOT NULL,
+            FOREIGN KEY (pokemon_id) REFERENCES pokemon (id)
+        )
+    ''')
+
+    migrar_columnas(cursor)
+
+# Añade las columnas que falten a las bases de datos creadas antes de que moves tuviera tipo, potencia y clase de daño
+def migrar_columnas(cursor):
+    cursor.execute("PRAGMA table_info(moves)")
+    existentes = {fila[1] for fila in cursor.fetchall()}
+    for columna, definicion in COLUMNAS_MOVIMIENTOS.items():
+        if columna not in existentes:
+            cursor.execute(f"ALTER TABLE moves ADD COLUMN {columna} {definicion}")
+
+# Índices secundarios: las claves primarias empiezan por pokemon_id, así que las búsquedas inversas (por tipo, movimiento,
+# habilidad o nombre) recorrían la tabla entera. Los de las tablas de relaciones llevan pokemon_id para que las
+# consultas se resuelvan solo con el índice (covering); en pokemon y moves no hace falta añadir id, porque es el rowid
+# y ya va en todos los índices. idx_moves_type empieza por damage_class y lleva el tipo, la potencia y el nombre: la
+# consulta de cobertura de indice_movimientos.py lee solo los movimientos de daño y no toca la tabla. Se crean después
+# de la carga, que así es más rápida, y ANALYZE actualiza las estadísticas que usa SQLite para elegir el plan. Ver
+# comprobar_planes.py.
+INDICES = {
+    'idx_pokemon_name': 'pokemon (name)',
+    'idx_pokemon_types_type': 'pokemon_types (type_id, pokemon_id)',
+    'idx_pokemon_abilities_ability': 'pokemon_abilities (ability_id, pokemon_id)',
+    'idx_pokemon_moves_move': 'pokemon_moves (move_id, pokemon_id)',
+    'idx_moves_type': 'moves (damage_class, type_id, power, name)',
+}
+
+# Migración del esquema: añade las columnas y crea los índices que falten (o los vuelve a crear si su definición ha
+# cambiado, porque CREATE INDEX IF NOT EXISTS no toca uno que ya existe), y ejecuta ANALYZE (se puede repetir sin
+# problema). Las columnas van antes porque idx_moves_type usa las de moves
+def migrar_esquema(conexion):
+    migrar_columnas(conexion.cursor())
+    existentes = dict(conexion.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'"))
+    for nombre, definicion in INDICES.items():
+        sql = f"CREATE INDEX {nombre} ON {definicion}"
+        if nombre in existentes and existentes[nombre] != sql:
+            conexion.execute(f"DROP INDEX {nombre}")
+        elif nombre in existentes:
+            continue
+        conexion.execute(sql)
+    conexion.execute("ANALYZE")
+    conexion.commit()
+
+# Inserta un Pokémon y todas sus relaciones fila a fila (forma original, se conserva para comparar en benchmark_carga.py)
+def insertar_pokemon(cursor, pokemon_id, pokemon_name, pokemon_url, detalles):
+    # Obtener los tipos del Pokémon
+    tipos = detalles.get('types', [])
+    for tipo in tipos:
+        tipo_name = tipo['type']['name']
+
+        # Insertar el tipo en la tabla types si no existe
+        cursor.execute('''
+            INSERT OR IGNORE INTO types (name)
+            VALUES (?)
+        ''', (tipo_name,))
+
+        # Obtener el ID del tipo
+        cursor.execute('''
+            SELECT id FROM types WHERE name = ?
+        ''', (tipo_name,))
+        tipo_id = cursor.fetchone()[0]
+
+        # Insertar la relación en pokemon_types
+        cursor.execute('''
+            INSERT OR IGNORE INTO pokemon_types (pokemon_id, type_id)
+            VALUES (?, ?)
+        ''', (pokemon_id, tipo_id))
+
+    # Obtener estadísticas del Pokémon
+    estadisticas = detalles.get('stats', [])
+    for estadistica in estadisticas:
+        stat_name = estadistica['stat']['name']
+        stat_value = estadistica['base_stat']
+
+        # Insertar la estadística en la tabla stats si no existe
+        cursor.execute('''
+            INSERT OR IGNORE INTO stats (name)
+            VALUES (?)
+        ''', (stat_name,))
+
+        # Obtener el ID de la estadística
+        cursor.execute('''
+            SELECT id FROM stats WHERE name = ?
+        ''', (stat_name,))
+        stat_id = cursor.fetchone()[0]
+
+        # Insertar la relación en pokemon_stats
+        cursor.execute('''
+            INSERT OR IGNORE INTO pokemon_stats (pokemon_id, stat_id, value)
+            VALUES (?, ?, ?)
+        ''', (pokemon_id, stat_id, stat_value))
+
+    # Obtener habilidades del Pokémon
+    habilidades = detalles.get('abilities', [])
+    for habilidad in habilidades:
+        ability_name = habilidad['ability']['name']
+        is_hidden = habilidad['is_hidden']
+
+        # Insertar la habilidad en la tabla abilities si no existe
+        cursor.execute('''
+            INSERT OR IGNORE INTO abilities (name)
+            VALUES (?)
+        ''', (ability_name,))
+
+        # Obtener el ID de la habilidad
+        cursor.execute('''
+            SELECT id FROM abilities WHERE name = ?
+        ''', (ability_name,))
+        ability_id = cursor.fetchone()[0]
+
+        # Insertar la relación en pokemon_abilities
+        cursor.execute('''
+            INSERT OR IGNORE INTO pokemon_abilities (pokemon_id, ability_id, is_hidden)
+            VALUES (?, ?, ?)
+        ''', (pokemon_id, ability_id, is_hidden))
+
+    # Insertar movimientos del Pokémon
+    movimientos = detalles.get('moves', [])
+    for movimiento in movimientos:
+        move_name = movimiento['move']['name']
+        method = movimiento['version_group_details'][0]['move_learn_method']['name']
+        level = movimiento['version_group_details'][0].get('level_learned_at', None)
+        cursor.execute('INSERT OR IGNORE INTO moves (name) VALUES (?)', (move_name,))
+        cursor.execute('SELECT id FROM moves WHERE name = ?', (move_name,))
+        move_id = cursor.fetchone()[0]
+        cursor.execute(
+            '''INSERT OR IGNORE INTO pokemon_moves (pokemon_id, move_id, method, level)
+            VALUES (?, ?, ?, ?)'''
+            ,(pokemon_id, move_id, method, level))
+
+    # El Pokémon se inserta al final: si está en la tabla pokemon, sus relaciones están completas
+    # y se puede saltar al reanudar una ejecución cortada
+    cursor.execute('''
+        INSERT OR IGNORE INTO pokemon (id, name, url)
+        VALUES (?, ?, ?)
+    ''', (pokemon_id, pokemon_name, pokemon_url))
+
+# Tablas simples (nombre -> id) que se cachean en memoria durante la carga
+TABLAS_NOMBRES = ('types', 'stats', 'abilities', 'moves')
+
+class CargadorPokemon:
+    """
+    Carga masiva: en vez de hacer INSERT OR IGNORE + SELECT por cada tipo, estadística, habilidad y movimiento,
+    guarda en memoria un diccionario nombre -> id por tabla, asigna los ids nuevos y acumula las filas de cada tabla
+    para escribirlas de golpe con executemany al llamar a volcar().
+    """
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.ids = {}
+        self.siguiente_id = {}
+        for tabla in TABLAS_NOMBRES:
+            cursor.execute(f"SELECT name, id FROM {tabla}")
+            self.ids[tabla] = dict(cursor.fetchall())
+            self.siguiente_id[tabla] = max(self.ids[tabla].values(), default=0) + 1
+        self._vaciar()
+
+    def _vaciar(self):
+        self.nuevos = {tabla: [] for tabla in TABLAS_NOMBRES}
+        self.filas = {'pokemon': [], 'pokemon_types': [], 'pokemon_stats': [], 'pokemon_abilities': [], 'pokemon_moves': []}
+
+    # Devuelve el id de un nombre, asignándole uno nuevo si no estaba
+    def obtener_id(self, tabla, nombre):
+        ids = self.ids[tabla]
+        if nombre not in ids:
+            ids[nombre] = self.siguiente_id[tabla]
+            self.siguiente_id[tabla] += 1
+            self.nuevos[tabla].append((ids[nombre], nombre))
+        return ids[nombre]
+
+    # Devuelve las filas de cada tabla de relaciones para un Pokémon (lanza excepción si los detalles están mal formados)
+    def filas_pokemon(self, pokemon_id, detalles):
+        tipos = [(pokemon_id, self.obtener_id('types', tipo['type']['name']))
+                 for tipo in detalles.get('types', [])]
+        estadisticas = [(pokemon_id, self.obtener_id('stats', estadistica['stat']['name']), estadistica['base_stat'])
+                        for estadistica in detalles.get('stats', [])]
+        habilidades = [(pokemon_id, self.obtener_id('abilities', habilidad['ability']['name']), habilidad['is_hidden'])
+                       for habilidad in detalles.get('abilities', [])]
+        movimientos = []
+        for movimiento in detalles.get('moves', []):
+            detalle = movimiento['version_group_details'][0]
+            movimientos.append((pokemon_id, self.obtener_id('moves', movimiento['move']['name']),
+                                detalle['move_learn_method']['name'], detalle.get('level_learned_at', None)))
+        return {'pokemon_types': tipos, 'pokemon_stats': estadisticas,
+                'pokemon_abilities': habilidades, 'pokemon_moves': movimientos}
+
+    # Acumula las filas de un Pokémon (si los detalles están mal formados no se añade nada)
+    def agregar(self, pokemon_id, pokemon_name, pokemon_url, detalles):
+        for tabla, filas in self.filas_pokemon(pokemon_id, detalles).items():
+            self.filas[tabla].extend(filas)
+        self.filas['pokemon'].append((pokemon_id, pokemon_name, pokemon_url))
+
+    # Escribe todo lo acumulado (el commit lo hace quien llama)
+    def volcar(self):
+        for tabla in TABLAS_NOMBRES:
+            self.cursor.executemany(f"INSERT OR IGNORE INTO {tabla} (id, name) VALUES (?, ?)", self.nuevos[tabla])
+        self.cursor.executemany("INSERT OR IGNORE INTO pokemon_types (pokemon_id, type_id) VALUES (?, ?)",
+                                self.filas['pokemon_types'])
+        self.cursor.executemany("INSERT OR IGNORE INTO pokemon_stats (pokemon_id, stat_id, value) VALUES (?, ?, ?)",
+                                self.filas['pokemon_stats'])
+        self.cursor.executemany("INSERT OR IGNORE INTO pokemon_abilities (pokemon_id, ability_id, is_hidden) VALUES (?, ?, ?)",
+                                self.filas['pokemon_abilities'])
+        self.cursor.executemany("INSERT OR IGNORE INTO pokemon_moves (pokemon_id, move_id, method, level) VALUES (?, ?, ?, ?)",
+                                self.filas['pokemon_moves'])
+        # Igual que en insertar_pokemon, la tabla pokemon va al final
+        self.cursor.executemany("INSERT OR IGNORE INTO pokemon (id, name, url) VALUES (?, ?, ?)", self.filas['pokemon'])
+        self._vaciar()
+
+# PRAGMAs para la carga: WAL y synchronous=NORMAL evitan un fsync por commit sin arriesgar la base de datos
+# si el proceso se corta (solo se perdería el último lote ante un corte de luz)
+def ajustar_pragmas_carga(conexion):
+    conexion.execute("PRAGMA journal_mode = WAL")
+    conexion.execute("PRAGMA synchronous = NORMAL")
+    conexion.execute("PRAGMA temp_store = MEMORY")
+    conexion.execute("PRAGMA cache_size = -65536")  # 64 MB
+
+# Vuelve a dejar pokemon.db como un único fichero (sin -wal), para poder abrirlo con cualquier visor
+def restaurar_pragmas(conexion):
+    conexion.execute("PRAGMA journal_mode = DELETE")
+    conexion.execute("PRAGMA synchronous = FULL")
+
+# Descarga los detalles en paralelo e inserta los Pokémon que faltan, haciendo commit por lotes
+def ingerir_pokemons(conexion, pokemons, hilos=8, lote=200):
+    cursor = conexion.cursor()
+    cargador = CargadorPokemon(cursor)
+
+    # Los Pokémon que ya están en la base de datos se guardaron en un lote anterior
+    cursor.execute("SELECT id FROM pokemon")
+    completados = {fila[0] for fila in cursor.fetchall()}
+    pendientes = [p for p in pokemons if int(p['url'].split('/')[-2]) not in completados]
+    if completados:
+        print(f"Reanudando: {len(pokemons) - len(pendientes)} Pokémon ya estaban guardados.")
+
+    insertados = 0
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        for inicio in range(0, len(pendientes), lote):
+            bloque = pendientes[inicio:inicio + lote]
+            futuros = {ejecutor.submit(obtener_detalles_pokemon, p['url']): p for p in bloque}
+            for futuro in as_completed(futuros):
+                pokemon = futuros[futuro]
+                detalles = futuro.result()
+                if not detalles:
+                    continue  # Se volverá a intentar en la siguiente ejecución
+                try:
+                    # Extraer el ID del Pokémon
+                    pokemon_id = int(pokemon['url'].split('/')[-2])  # Extrae el número antes de la última '/'
+                    cargador.agregar(pokemon_id, pokemon['name'], pokemon['url'], detalles)
+                    insertados += 1
+                # Control de error
+                except Exception as e:
+                    print(f"Error procesando Pokémon: {pokemon} - {e}")
+
+            # Punto de control: lo guardado hasta aquí no se vuelve a descargar
+            with instrumentacion.etapa('sql.volcar'):
+                cargador.volcar()
+            with instrumentacion.etapa('sql.commit'):
+                conexion.commit()
+            print(f"Progreso: {min(inicio + lote, len(pendientes))}/{len(pendientes)}")
+
+    return insertados
+
+# Descarga el tipo, la potencia y la clase de daño de los movimientos que aún no los tienen (la primera vez todos;
+# después, solo los que hayan aparecido nuevos). Devuelve (completados, errores). obtener_detalles se puede cambiar
+# por datos_sinteticos.detalles_movimiento para rellenarlos sin descargar nada
+def completar_movimientos(conexion, api=API_POR_DEFECTO, hilos=8, obtener_detalles=obtener_detalles_movimiento):
+    cursor = conexion.cursor()
+    cursor.execute("SELECT id, name FROM moves WHERE damage_class IS NULL")
+    pendientes = cursor.fetchall()
+    if not pendientes:
+        return 0, 0
+
+    cargador = CargadorPokemon(cursor)  # para los ids de los tipos (y por si aparece alguno nuevo)
+    filas = []
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        futuros = {ejecutor.submit(obtener_detalles, api, nombre): move_id for move_id, nombre in pendientes}
+        for futuro in as_completed(futuros):
+            detalles = futuro.result()
+            if not detalles:
+                continue  # Se volverá a intentar en la siguiente ejecución
+            try:
+                tipo = cargador.obtener_id('types', detalles['type']['name'])
+                filas.append((tipo, detalles.get('power'), detalles['damage_class']['name'], futuros[futuro]))
+            except (KeyError, TypeError) as e:
+                print(f"Error procesando el movimiento {detalles.get('name')}: {e}")
+
+    with conexion:
+        cargador.volcar()
+        cursor.executemany("UPDATE moves SET type_id = ?, power = ?, damage_class = ? WHERE id = ?", filas)
+    return len(filas), len(pendientes) - len(filas)
+
+# Columnas de cada tabla de relaciones, en el mismo orden que las filas de CargadorPokemon.filas_pokemon,
+# y cuántas de ellas forman la clave primaria
+COLUMNAS_RELACIONES = {
+    'pokemon_types': (('pokemon_id', 'type_id'), 2),
+    'pokemon_stats': (('pokemon_id', 'stat_id', 'value'), 2),
+    'pokemon_abilities': (('pokemon_id', 'ability_id', 'is_hidden'), 2),
+    'pokemon_moves': (('pokemon_id', 'move_id', 'method', 'level'), 4),
+}
+
+# Se queda con la primera fila de cada clave primaria, igual que INSERT OR IGNORE al cargar
+def _filas_unicas(filas, longitud_clave):
+    unicas = {}
+    for fila in filas:
+        unicas.setdefault(tuple(fila[:longitud_clave]), tuple(fila))
+    return set(unicas.values())
+
+# Huella del contenido de un Pokémon (nombre, url y filas de relaciones, sin importar el orden en que las da la API)
+def huella_pokemon(pokemon_name, pokemon_url, filas):
+    huella = hashlib.sha256(f"{pokemon_name}|{pokemon_url}".encode())
+    for tabla in COLUMNAS_RELACIONES:
+        huella.update(tabla.encode())
+        for fila in sorted(repr(tuple(fila)) for fila in set(filas[tabla])):
+            huella.update(fila.encode())
+    return huella.hexdigest()
+
+# Deja las relaciones de un Pokémon como en filas, borrando e insertando solo las que cambian.
+# Devuelve las tablas que se han modificado
+def aplicar_diferencias(cursor, pokemon_id, pokemon_name, pokemon_url, filas):
+    modificadas = []
+    for tabla, (columnas, longitud_clave) in COLUMNAS_RELACIONES.items():
+        cursor.execute(f"SELECT {', '.join(columnas)} FROM {tabla} WHERE pokemon_id = ?", (pokemon_id,))
+        antes = set(cursor.fetchall())
+        despues = _filas_unicas(filas[tabla], longitud_clave)
+        if antes == despues:
+            continue
+        condicion = ' AND '.join(f"{columna} IS ?" for columna in columnas)  # IS para que level NULL también coincida
+        cursor.executemany(f"DELETE FROM {tabla} WHERE {condicion}", antes - despues)
+        cursor.executemany(f"INSERT OR IGNORE INTO {tabla} ({', '.join(columnas)}) "
+                           f"VALUES ({', '.join('?' * len(columnas))})", despues - antes)
+        modificadas.append(tabla)
+
+    cursor.execute("SELECT name, url FROM pokemon WHERE id = ?", (pokemon_id,))
+    if cursor.fetchone() != (pokemon_name, pokemon_url):
+        cursor.execute("INSERT OR REPLACE INTO pokemon (id, name, url) VALUES (?, ?, ?)",
+                       (pokemon_id, pokemon_name, pokemon_url))
+        modificadas.append('pokemon')
+    return modificadas
+
+# Borra los índices precalculados que dependen de los tipos o de los nombres (cache_counters.py los reconstruye
+# la próxima vez que se carguen). Los que dependen solo de estadísticas o movimientos no se guardan en la base de datos
+def invalidar_precalculados(cursor):
+    try:
+        cursor.execute("DELETE FROM cache_indice")
+    except sqlite3.OperationalError:
+        pass  # No se ha creado nunca la caché
+
+# Sincronización incremental: descarga solo lo nuevo o cambiado (petición condicional con el ETag guardado y, si la
+# API no manda ETag, comparando la huella del contenido) y aplica todas las diferencias en una sola transacción
+def sincronizar_pokemons(conexion, pokemons, hilos=8):
+    cursor = conexion.cursor()
+    cargador = CargadorPokemon(cursor)
+    cursor.execute("SELECT id FROM pokemon")
+    guardados = {fila[0] for fila in cursor.fetchall()}
+    cursor.execute("SELECT pokemon_id, etag, huella FROM pokemon_sync")
+    sincronizados = {pokemon_id: (etag, huella) for pokemon_id, etag, huella in cursor.fetchall()}
+
+    resumen = Counter()
+    cambios = []  # (pokemon_id, nombre, url, filas) de los Pokémon nuevos o cambiados
+    vistos = []   # filas para pokemon_sync
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        futuros = {}
+        for pokemon in pokemons:
+            pokemon_id = int(pokemon['url'].split('/')[-2])
+            # Solo se manda el ETag si el Pokémon está guardado (si no, hay que descargarlo aunque no haya cambiado)
+            etag = sincronizados.get(pokemon_id, (None, None))[0] if pokemon_id in guardados else None
+            futuros[ejecutor.submit(obtener_detalles_condicional, pokemon['url'], etag)] = (pokemon_id, pokemon)
+
+        for futuro in as_completed(futuros):
+            pokemon_id, pokemon = futuros[futuro]
+            estado, detalles, etag = futuro.result()
+            huella_anterior = sincronizados.get(pokemon_id, (None, None))[1]
+            if estado == 'error':
+                resumen['errores'] += 1  # Se volverá a intentar en la siguiente sincronización
+                continue
+            if estado == 'sin_cambios':
+                vistos.append((pokemon_id, etag, huella_anterior))
+                resumen['sin_cambios'] += 1
+                continue
+            try:
+                filas = cargador.filas_pokemon(pokemon_id, detalles)
+            except Exception as e:
+                print(f"Error procesando Pokémon: {pokemon} - {e}")
+                resumen['errores'] += 1
+                continue
+            huella = huella_pokemon(pokemon['name'], pokemon['url'], filas)
+            vistos.append((pokemon_id, etag, huella))
+            if pokemon_id in guardados and huella == huella_anterior:
+                resumen['sin_cambios'] += 1
+            else:
+                cambios.append((pokemon_id, pokemon['name'], pokemon['url'], filas))
+
+    # Todo en una transacción: o se aplica la sincronización entera o nada
+    modificadas = Counter()
+    ahora = datetime.now(timezone.utc).isoformat()
+    with instrumentacion.etapa('sql.sincronizar'), conexion:
+        cargador.volcar()  # Tipos, estadísticas, habilidades y movimientos nuevos
+        for pokemon_id, pokemon_name, pokemon_url, filas in cambios:
+            tablas = aplicar_diferencias(cursor, pokemon_id, pokemon_name, pokemon_url, filas)
+            modificadas.update(tablas)
+            if pokemon_id not in guardados:
+                resumen['nuevos'] += 1
+            elif tablas:
+                resumen['cambiados'] += 1
+            else:
+                resumen['sin_cambios'] += 1  # Solo faltaba la huella (base de datos anterior a la sincronización)
+        cursor.executemany("INSERT OR REPLACE INTO pokemon_sync (pokemon_id, etag, huella, obtenido) VALUES (?, ?, ?, ?)",
+                           [(pokemon_id, etag, huella, ahora) for pokemon_id, etag, huella in vistos])
+        if modificadas['pokemon_types'] or modificadas['pokemon']:
+            invalidar_precalculados(cursor)
+            resumen['precalculados_invalidados'] = 1
+
+    # Los que ya no están en la lista no se borran: la lista puede venir incompleta si la API ha fallado a mitad
+    resumen['no_listados'] = len(guardados - {pokemon_id for pokemon_id, _ in futuros.values()})
+    return resumen, modificadas
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea (o completa) pokemon.db con los datos de la PokeAPI.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--api", default=API_POR_DEFECTO, help="url base de la API (útil para probar contra un servidor local)")
+    parser.add_argument("--hilos", type=int, default=8, help="descargas simultáneas")
+    parser.add_argument("--lote", type=int, default=200, help="Pokémon por commit")
+    parser.add_argument("--sincronizar", action="store_true",
+                        help="actualiza una base de datos existente descargando solo los Pokémon nuevos o cambiados")
+    parser.add_argument("--sin-movimientos", action="store_true",
+                        help="no descarga el tipo, la potencia y la clase de daño de los movimientos")
+    parser.add_argument("--solo-migrar", action="store_true",
+                        help="no descarga nada: solo añade las columnas y los índices que falten y ejecuta ANALYZE en "
+                             "una base de datos existente")
+    parser.add_argument("--perfil", nargs="?", const="tiempos",
+                        help="mide las etapas (tiempos) y opcionalmente guarda cprofile/tracemalloc, p. ej. "
+                             "--perfil tiempos,cprofile (ver instrumentacion.py)")
+    args = parser.parse_args()
+    if args.perfil:
+        instrumentacion.activar(args.perfil)
+
+    # Conexión a la base de datos SQLite
+    conexion = instrumentacion.vigilar_conexion(sqlite3.connect(args.db))
+    if args.solo_migrar:
+        migrar_esquema(conexion)
+        print("Columnas e índices creados y estadísticas actualizadas.")
+        conexion.close()
+        return
+
+    ajustar_pragmas_carga(conexion)
+    crear_tablas(conexion.cursor())
     conexion.commit()
-    print("Los datos se han insertado correctamente.")
-else:
-    print("No se obtuvieron datos de Pokémon.")
 
-# Cerrar la conexión
-conexion.close()
+    # Obtener los datos de la API
+    pokemons = obtener_pokemons(args.api.rstrip('/'))
+
+    # Insertar Pokémon en la base de datos
+    if pokemons and args.sincronizar:
+        print(f"Se obtuvieron {len(pokemons)} Pokémon, sincronizando...")
+        resumen, modificadas = sincronizar_pokemons(conexion, pokemons, args.hilos)
+        print(f"Nuevos: {resumen['nuevos']}, cambiados: {resumen['cambiados']}, sin cambios: {resumen['sin_cambios']}, "
+              f"errores: {resumen['errores']}, guardados que ya no aparecen en la API: {resumen['no_listados']}")
+        if modificadas:
+            print("Pokémon con cambios por tabla: " + ", ".join(f"{tabla}={n}" for tabla, n in modificadas.items()))
+        if resumen['precalculados_invalidados']:
+            print("Han cambiado tipos o nombres: el índice de counters guardado se reconstruirá al usarlo.")
+    elif pokemons:
+        print(f"Se obtuvieron {len(pokemons)} Pokémon.")
+        insertados = ingerir_pokemons(conexion, pokemons, args.hilos, args.lote)
+        print(f"Los datos se han insertado correctamente ({insertados} nuevos).")
+    else:
+        print("No se obtuvieron datos de Pokémon.")
+
+    # Tipo, potencia y clase de daño de los movimientos (solo los que faltan)
+    if pokemons and not args.sin_movimientos:
+        completados, errores = completar_movimientos(conexion, args.api.rstrip('/'), args.hilos)
+        if completados or errores:
+            print(f"Movimientos completados: {completados} (errores: {errores}, se reintentan en la siguiente ejecución).")
+
+    with instrumentacion.etapa('sql.migrar_esquema'):
+        migrar_esquema(conexion)
+
+    # Cerrar la conexión
+    restaurar_pragmas(conexion)
+    conexion.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Genera datos de Pokémon sintéticos con la misma forma que las respuestas de la PokeAPI (/pokemon/{id}),
+para poder medir y probar los scripts sin descargar nada. Con la misma semilla siempre se generan los mismos datos.
+"""
+import random
+
+TIPOS = ['normal', 'fire', 'water', 'electric', 'grass', 'ice', 'fighting', 'poison', 'ground',
+         'flying', 'psychic', 'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy']
+ESTADISTICAS = ['hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed']
+METODOS = ['level-up', 'machine', 'egg', 'tutor']
+CLASES_DANO = ['physical', 'special', 'status']
+POTENCIAS = [None, 40, 60, 80, 90, 120]
+
+# Genera los Pokémon uno a uno como (pokemon, detalles), sin tenerlos todos en memoria (para rosters muy grandes)
+def iterar_detalles(cantidad, semilla=0, movimientos=900, habilidades=300, api="https://pokeapi.co/api/v2"):
+    rng = random.Random(semilla)
+    for pokemon_id in range(1, cantidad + 1):
+        nombre = f"pokemon-{pokemon_id}"
+        url = f"{api}/pokemon/{pokemon_id}/"
+        tipos = rng.sample(TIPOS, rng.choice((1, 2)))
+        # Los movimientos aprendibles van de unas decenas a varios cientos, como en los datos reales
+        aprendibles = rng.sample(range(1, movimientos + 1), min(movimientos, int(rng.triangular(10, 400, 60))))
+        yield {'name': nombre, 'url': url}, {
+            'id': pokemon_id,
+            'name': nombre,
+            'types': [{'slot': i + 1, 'type': {'name': tipo}} for i, tipo in enumerate(tipos)],
+            'stats': [{'base_stat': rng.randint(5, 180), 'stat': {'name': stat}} for stat in ESTADISTICAS],
+            'abilities': [{'ability': {'name': f"ability-{rng.randint(1, habilidades)}"}, 'is_hidden': i == 2}
+                          for i in range(rng.randint(1, 3))],
+            'moves': [{'move': {'name': f"move-{move}"},
+                       'version_group_details': [{'level_learned_at': rng.randint(0, 100),
+                                                  'move_learn_method': {'name': rng.choice(METODOS)}}]}
+                      for move in aprendibles],
+        }
+
+# Genera la lista de Pokémon (nombre y url) y un diccionario id -> detalles, parecido a lo que devuelve la API
+def generar_detalles(cantidad, semilla=0, movimientos=900, habilidades=300, api="https://pokeapi.co/api/v2"):
+    pokemons = []
+    detalles = {}
+    for pokemon, detalle in iterar_detalles(cantidad, semilla, movimientos, habilidades, api):
+        pokemons.append(pokemon)
+        detalles[detalle['id']] = detalle
+    return pokemons, detalles
+
+# Detalles de un movimiento con la misma forma que /move/{nombre} (tipo, potencia y clase de daño). Tiene la misma
+# firma que crear_pokemon.obtener_detalles_movimiento y siempre da lo mismo para el mismo nombre
+def detalles_movimiento(api, nombre):
+    rng = random.Random(nombre)
+    return {
+        'name': nombre,
+        'type': {'name': rng.choice(TIPOS)},
+        'power': rng.choice(POTENCIAS),
+        'damage_class': {'name': rng.choice(CLASES_DANO)},
+    }
@@ -9,61 +9,39 @@ Las posibles ponderaciones son las siguientes: 4 (el pokemon tiene un tipo fuert
 al que se dirije o tiene un tipo fuerte y un tipo débil (2 * 1/2), 1/2 (el pokemon tiene un tipo debil  y ningún tipo fuerte contra el pokemon al que se dirije), 
 1/4 (el pokemon tiene dos tipos debiles contra el pokemon al que se dirije) y 0 (el pokemon tiene a menos un tipo "sin efecto" contra el pokemon al que se dirije).
 """
+import argparse
 import sqlite3
-import networkx as nx
-
-# Conexión a la base de datos
-conexion = sqlite3.connect("pokemon.db")
-cursor = conexion.cursor()
-
-# Efectividades entre tipos
-efec = {
-    'normal': {'fuerte': [], 'debil': ['rock', 'steel'], 'inmune': ['ghost']},
-    'fire': {'fuerte': ['grass', 'ice', 'bug', 'steel'], 'debil': ['fire', 'water', 'rock', 'dragon'], 'inmune': []},
-    'water': {'fuerte': ['fire', 'ground', 'rock'], 'debil': ['water', 'grass', 'dragon'], 'inmune': []},
-    'electric': {'fuerte': ['water', 'flying'], 'debil': ['electric', 'grass', 'dragon'], 'inmune': ['ground']},
-    'grass': {'fuerte': ['water', 'ground', 'rock'], 'debil': ['fire', 'grass', 'poison', 'flying', 'bug', 'dragon', 'steel'], 'inmune': []},
-    'ice': {'fuerte': ['grass', 'ground', 'flying', 'dragon'], 'debil': ['fire', 'water', 'ice', 'steel'], 'inmune': []},
-    'fighting': {'fuerte': ['normal', 'ice', 'rock', 'dark', 'steel'], 'debil': ['poison', 'flying', 'psychic', 'bug', 'fairy'], 'inmune': ['ghost']},
-    'poison': {'fuerte': ['grass', 'fairy'], 'debil': ['poison', 'ground', 'rock', 'ghost'], 'inmune': ['steel']},
-    'ground': {'fuerte': ['fire', 'electric', 'poison', 'rock', 'steel'], 'debil': ['grass', 'bug'], 'inmune': ['flying']},
-    'flying': {'fuerte': ['grass', 'fighting', 'bug'], 'debil': ['electric', 'rock', 'steel'], 'inmune': []},
-    'psychic': {'fuerte': ['fighting', 'poison'], 'debil': ['psychic', 'steel'], 'inmune': ['dark']},
-    'bug': {'fuerte': ['grass', 'psychic', 'dark'], 'debil': ['fire', 'fighting', 'poison', 'flying', 'ghost', 'steel', 'fairy'], 'inmune': []},
-    'rock': {'fuerte': ['fire', 'ice', 'flying', 'bug'], 'debil': ['fighting', 'ground', 'steel'], 'inmune': []},
-    'ghost': {'fuerte': ['ghost', 'psychic'], 'debil': ['dark'], 'inmune': ['normal']},
-    'dragon': {'fuerte': ['dragon'], 'debil': ['steel'], 'inmune': ['fairy']},
-    'dark': {'fuerte': ['psychic', 'ghost'], 'debil': ['fighting', 'dark', 'fairy'], 'inmune': []},
-    'steel': {'fuerte': ['ice', 'rock', 'fairy'], 'debil': ['fire', 'water', 'electric', 'steel'], 'inmune': ['poison']},
-    'fairy': {'fuerte': ['fighting', 'dragon', 'dark'], 'debil': ['fire', 'poison', 'steel'], 'inmune': ['dragon']}
-}
-
-# Función para calcular la efectividad contra tipos
+
+import instrumentacion
+from tabla_tipos import codigo_combinacion, ponderacion, ponderacion_combinaciones
+
+# Función para calcular la efectividad contra tipos (la tabla efec está compilada en tabla_tipos.py)
 def calcular_ponderacion(tipos_atacante, tipos_defensor):
-    ponderacion = 1.0
-    for tipo_atacante in tipos_atacante:
-        for tipo_defensor in tipos_defensor:
-            if tipo_defensor in efec[tipo_atacante]['fuerte']:
-                ponderacion *= 2
-            elif tipo_defensor in efec[tipo_atacante]['debil']:
-                ponderacion *= 0.5
-            elif tipo_defensor in efec[tipo_atacante]['inmune']:
-                return 0
-    return ponderacion
+    return ponderacion(tipos_atacante, tipos_defensor)
 
-# Cargo datos en memoria para optimizar el tiempo a la hora de construir el grafo
-def construir_grafo():
-    G = nx.DiGraph()
+# Consulta con los Pokémon y sus tipos (cache_counters.py calcula la huella de los datos sobre estas mismas filas).
+# El orden de las filas decide los empates ("el primero en el orden de carga"), así que va explícito: sin ORDER BY,
+# el plan con idx_pokemon_types_type devolvería las filas agrupadas por tipo. pt.rowid mantiene el orden de los tipos
+# de cada Pokémon tal como se insertaron
+CONSULTA_TIPOS = """
+    SELECT p.id, p.name, t.name
+    FROM pokemon p
+    JOIN pokemon_types pt ON p.id = pt.pokemon_id
+    JOIN types t ON pt.type_id = t.id
+    ORDER BY p.id, pt.rowid
+"""
 
+# Cargo los tipos de todos los Pokémon en memoria (nombre -> lista de tipos), en el orden en que los devuelve la consulta
+def cargar_tipos_por_pokemon(cursor):
     # Obtener Pokémon y sus tipos de una vez
-    cursor.execute("""
-        SELECT p.id, p.name, t.name
-        FROM pokemon p
-        JOIN pokemon_types pt ON p.id = pt.pokemon_id
-        JOIN types t ON pt.type_id = t.id
-    """)
-    datos = cursor.fetchall()
+    with instrumentacion.etapa('sql.tipos'):
+        cursor.execute(CONSULTA_TIPOS)
+        datos = cursor.fetchall()
+    instrumentacion.contar('sql.filas_tipos', len(datos))
+    return agrupar_tipos(datos)
 
+# Agrupa las filas (id, nombre, tipo) de CONSULTA_TIPOS por Pokémon
+def agrupar_tipos(datos):
     # Cachear tipos por Pokémon
     tipos_por_pokemon = {}
     for id_pokemon, nombre, tipo in datos:
@@ -71,16 +49,38 @@ def construir_grafo():
             tipos_por_pokemon[nombre] = []
         tipos_por_pokemon[nombre].append(tipo)
 
-    # Construir el grafo
+    return tipos_por_pokemon
+
+# Cargo datos en memoria para optimizar el tiempo a la hora de construir el grafo
+def construir_grafo(cursor):
+    # networkx solo hace falta para el motor grafo; importarlo aquí ahorra su tiempo de carga al resto de motores y scripts
+    import networkx as nx
+
+    G = nx.DiGraph()
+    tipos_por_pokemon = cargar_tipos_por_pokemon(cursor)
+
+    # Cada Pokémon se codifica una vez como su combinación de tipos, y la ponderación de cada par es un acceso a la
+    # tabla de tabla_tipos.py. Si alguno tuviera más de dos tipos se pondera por nombres con calcular_ponderacion
     nombres = list(tipos_por_pokemon.keys())
-    for i, nombre1 in enumerate(nombres):
-        tipos1 = tipos_por_pokemon[nombre1]
-        for j, nombre2 in enumerate(nombres):
-            if i != j:  # Evitar lazos
-                tipos2 = tipos_por_pokemon[nombre2]
-                ponderacion = calcular_ponderacion(tipos1, tipos2)
-                if ponderacion > 0:  # Solo agrega conexiones relevantes
-                    G.add_edge(nombre1, nombre2, weight=ponderacion)
+    codigos = [codigo_combinacion(tipos) for tipos in tipos_por_pokemon.values()]
+    if None in codigos:
+        codigos, ponderar = list(tipos_por_pokemon.values()), calcular_ponderacion
+    else:
+        ponderar = ponderacion_combinaciones
+    # Con la instrumentación apagada, ponderar es la propia función sin envolver
+    ponderar = instrumentacion.medir_llamadas('grafo.calcular_ponderacion', ponderar)
+
+    # Construir el grafo
+    with instrumentacion.etapa('grafo.bucle_pares'):
+        for i, nombre1 in enumerate(nombres):
+            codigo1 = codigos[i]
+            for j, nombre2 in enumerate(nombres):
+                if i != j:  # Evitar lazos
+                    peso = ponderar(codigo1, codigos[j])
+                    if peso > 0:  # Solo agrega conexiones relevantes
+                        G.add_edge(nombre1, nombre2, weight=peso)
+    instrumentacion.contar('grafo.pares', len(nombres) * (len(nombres) - 1))
+    instrumentacion.contar('grafo.aristas', G.number_of_edges())
 
     return G
 
@@ -101,22 +101,156 @@ def encontrar_fuerte_contra(pokemon, grafo):
     mejor_pokemon = max(fortaleza, key=fortaleza.get)
     return mejor_pokemon, fortaleza[mejor_pokemon]
 
-# Construcción del grafo
-print("Construyendo el grafo...")
-grafo_pokemon = construir_grafo()
-print("Grafo construido")
-
-# Pregunta al usuario por un pokemon, si el usuario introduce "0", para
-while True:
-    pokemon_usuario = input("Ingresa el nombre de un Pokémon (o '0' para salir): ").strip().lower()
-    if pokemon_usuario == '0':
-        print("si quiere saber más pokemons counters, vuelva a ejecutar el código")
-        break
-    
-    resultado = encontrar_fuerte_contra(pokemon_usuario, grafo_pokemon)
-    if isinstance(resultado, tuple):
-        print(f"El Pokémon más fuerte contra '{pokemon_usuario}' es '{resultado[0]}' con efectividad de {resultado[1]:.2f}.")
+def main():
+    parser = argparse.ArgumentParser(description="Busca el Pokémon más fuerte contra el que introduzcas.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--motor", choices=("clases", "matriz", "grafo", "combate", "perezoso"), default="clases",
+                        help="clases: tabla por combinación de tipos (lo más rápido); matriz: efectividades con numpy; "
+                             "grafo: el grafo de networkx original; combate: ordena por combates simulados con "
+                             "estadísticas (simulador_combate.py); perezoso: calcula cada consulta al hacerla, con "
+                             "caché (counters_perezosos.py)")
+    parser.add_argument("--reconstruir", action="store_true",
+                        help="con el motor clases, ignora el índice guardado en pokemon.db y lo vuelve a calcular")
+    parser.add_argument("--top", type=int, default=1,
+                        help="con el motor clases, muestra los K mejores counters desempatando por estadísticas")
+    parser.add_argument("--snapshot",
+                        help="con los motores clases y combate, lee los datos de un snapshot de snapshot_pokemon.py "
+                             "en vez de pokemon.db (arranca en milisegundos)")
+    parser.add_argument("--movimientos", action="store_true",
+                        help="con el motor clases, puntúa también los movimientos de cobertura de cada atacante "
+                             "(indice_movimientos.py; hace falta que crear_pokemon.py haya guardado sus tipos)")
+    parser.add_argument("--tamano-cache", type=int, default=None,
+                        help="con el motor perezoso, combinaciones de tipos que se guardan en la caché")
+    parser.add_argument("--perfil", nargs="?", const="tiempos",
+                        help="mide las etapas (tiempos) y opcionalmente guarda cprofile/tracemalloc, p. ej. "
+                             "--perfil tiempos,cprofile (ver instrumentacion.py)")
+    args = parser.parse_args()
+    if args.perfil:
+        instrumentacion.activar(args.perfil)
+    if args.top > 1 and args.motor not in ("clases", "combate"):
+        parser.error("--top solo está disponible con los motores clases y combate")
+    if args.snapshot and args.motor not in ("clases", "combate"):
+        parser.error("--snapshot solo está disponible con los motores clases y combate")
+    if args.movimientos and (args.motor != "clases" or args.snapshot):
+        parser.error("--movimientos solo está disponible con el motor clases y pokemon.db")
+
+    # Conexión a la base de datos (con un snapshot no hace falta)
+    conexion = None if args.snapshot else instrumentacion.vigilar_conexion(sqlite3.connect(args.db))
+    cursor = None if args.snapshot else conexion.cursor()
+
+    if args.snapshot:
+        from snapshot_pokemon import abrir_snapshot, avisar_si_caducado, estadisticas_desde_snapshot, indice_desde_snapshot
+        print(f"Abriendo el snapshot {args.snapshot}...")
+        snapshot = abrir_snapshot(args.snapshot)
+        avisar_si_caducado(snapshot, args.snapshot, args.db)
+        indice = indice_desde_snapshot(snapshot)
+        if args.motor == "combate":
+            from simulador_combate import preparar_datos_combate, rankear_por_combate
+            grafo_pokemon = preparar_datos_combate(indice, snapshot['estadisticas'])
+            buscar = lambda pokemon, datos: rankear_por_combate(pokemon, datos, args.top)
+        else:
+            from clases_tipos import encontrar_fuerte_contra as buscar
+            from ranking_counters import top_counters
+            grafo_pokemon = indice
+            print(f"{len(indice['clases'])} combinaciones de tipos")
+            if args.top > 1:
+                estadisticas = estadisticas_desde_snapshot(snapshot)
+                buscar = lambda pokemon, indice: top_counters(pokemon, indice, estadisticas, args.top)
+    elif args.motor == "grafo":
+        # Construcción del grafo
+        print("Construyendo el grafo...")
+        grafo_pokemon = construir_grafo(cursor)
+        print("Grafo construido")
+        buscar = encontrar_fuerte_contra
+    elif args.motor == "perezoso":
+        from counters_perezosos import TAMANO_CACHE, CountersPerezosos
+        grafo_pokemon = CountersPerezosos(cargar_tipos_por_pokemon(cursor), args.tamano_cache or TAMANO_CACHE)
+        buscar = lambda pokemon, motor: motor.encontrar_fuerte_contra(pokemon)
+    elif args.motor == "matriz":
+        from matriz_efectividad import construir_matriz, encontrar_fuerte_contra as buscar
+        print("Construyendo la matriz de efectividades...")
+        grafo_pokemon = construir_matriz(cursor)
+        print("Matriz construida")
+    elif args.motor == "combate":
+        from cache_counters import cargar_indice
+        from simulador_combate import cargar_datos_combate, rankear_por_combate
+        print("Cargando las estadísticas para los combates...")
+        grafo_pokemon = cargar_datos_combate(cursor, cargar_indice(conexion, reconstruir=args.reconstruir))
+        buscar = lambda pokemon, datos: rankear_por_combate(pokemon, datos, args.top)
+    else:
+        from cache_counters import cargar_indice
+        from clases_tipos import encontrar_fuerte_contra as buscar
+        print("Cargando el índice por combinación de tipos...")
+        grafo_pokemon = cargar_indice(conexion, reconstruir=args.reconstruir)
+        print(f"{len(grafo_pokemon['clases'])} combinaciones de tipos")
+        if args.movimientos:
+            from indice_movimientos import construir_indice_movimientos
+            from ranking_counters import cargar_estadisticas, top_counters_movimientos
+            estadisticas = cargar_estadisticas(cursor, grafo_pokemon)
+            movimientos = construir_indice_movimientos(cursor, grafo_pokemon)
+            if not any(len(aprendices) for aprendices in movimientos['aprendices']):
+                print("La base de datos no tiene los tipos de los movimientos: ejecuta crear_pokemon.py para completarlos.")
+            buscar = lambda pokemon, indice: top_counters_movimientos(pokemon, indice, estadisticas, movimientos, args.top)
+        elif args.top > 1:
+            from ranking_counters import cargar_estadisticas, top_counters
+            estadisticas = cargar_estadisticas(cursor, grafo_pokemon)
+            buscar = lambda pokemon, indice: top_counters(pokemon, indice, estadisticas, args.top)
+
+    # Si el nombre no es exacto se busca con indice_nombres.py (alias, prefijos y erratas); se construye la primera vez
+    if args.motor == "grafo":
+        nombres, existe = grafo_pokemon.nodes, lambda nombre: nombre in grafo_pokemon
+    elif args.motor == "perezoso":
+        nombres, existe = grafo_pokemon.nombres, lambda nombre: nombre in grafo_pokemon.indice
     else:
-        print(resultado)
+        nombres, existe = grafo_pokemon['nombres'], lambda nombre: nombre in grafo_pokemon['indice']
+    indice_nombres = None
+
+    # Pregunta al usuario por un pokemon, si el usuario introduce "0", para
+    while True:
+        pokemon_usuario = input("Ingresa el nombre de un Pokémon (o '0' para salir): ").strip().lower()
+        if pokemon_usuario == '0':
+            print("si quiere saber más pokemons counters, vuelva a ejecutar el código")
+            break
+
+        if not existe(pokemon_usuario):
+            from indice_nombres import IndiceNombres, mensaje_no_encontrado
+            if indice_nombres is None:
+                indice_nombres = IndiceNombres(nombres)
+            resuelto = indice_nombres.resolver(pokemon_usuario)
+            if resuelto is None:
+                sugerencias = [nombre for nombre, _ in indice_nombres.buscar(pokemon_usuario)]
+                print(mensaje_no_encontrado(pokemon_usuario, sugerencias))
+                continue
+            print(f"Se busca '{resuelto}'.")
+            pokemon_usuario = resuelto
+
+        with instrumentacion.etapa('consulta'):
+            resultado = buscar(pokemon_usuario, grafo_pokemon)
+        if isinstance(resultado, list):
+            print(f"Los {len(resultado)} Pokémon más fuertes contra '{pokemon_usuario}':")
+            for posicion, fila in enumerate(resultado, 1):
+                if args.motor == "combate":
+                    nombre, resultado_combate, ps_restantes = fila
+                    desenlace = {1: "gana", 0: "empata", -1: "pierde"}[resultado_combate]
+                    print(f"  {posicion}. {nombre} ({desenlace} el combate con el {ps_restantes:.0%} de sus PS)")
+                elif args.movimientos:
+                    nombre, ponderacion, movimiento = fila
+                    con = f" con {movimiento}" if movimiento else " por sus tipos"
+                    print(f"  {posicion}. {nombre} (efectividad {ponderacion:.2f}{con})")
+                else:
+                    nombre, ponderacion = fila
+                    print(f"  {posicion}. {nombre} (efectividad {ponderacion:.2f})")
+        elif isinstance(resultado, tuple):
+            print(f"El Pokémon más fuerte contra '{pokemon_usuario}' es '{resultado[0]}' con efectividad de {resultado[1]:.2f}.")
+        else:
+            print(resultado)
+
+    if args.motor == "perezoso":
+        info = grafo_pokemon.cache_info()
+        print(f"Caché de counters: {info.hits} aciertos, {info.misses} cálculos, {info.currsize}/{info.maxsize} combinaciones guardadas")
+
+    if conexion is not None:
+        conexion.close()
 
-conexion.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
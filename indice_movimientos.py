@@ -0,0 +1,93 @@
+"""
+Índice invertido de movimientos para que los counters tengan en cuenta los ataques de cobertura: un pokemon de agua que
+aprende ice-beam es un buen counter de un dragón aunque sus tipos no lo sean. Con las columnas type_id, power y
+damage_class de moves (las rellena crear_pokemon.py) se hace una sola consulta al arrancar y se guarda:
+
+  - aprendices: para cada tipo de ataque, los pokemons que aprenden algún movimiento de daño de ese tipo (array de
+    posiciones en el índice por clases, ordenado)
+  - potencia y movimiento: el movimiento de daño más potente de cada pokemon para cada tipo
+
+Así cada consulta solo recorre los 18 tipos de ataque y las listas de aprendices, sin tocar SQLite. El multiplicador de
+un movimiento contra el defensor es el producto de los multiplicadores de su tipo contra cada tipo del defensor, y la
+puntuación de un atacante es la mayor entre su ponderación por tipos (la de siempre) y la de su mejor movimiento.
+"""
+import numpy as np
+
+from matriz_efectividad import MULTIPLICADORES
+from tabla_tipos import ID_TIPO, SIN_TIPO, TIPOS
+
+# Movimientos de daño de cada pokemon agrupados por tipo: el más potente de cada tipo y, si empatan en potencia, el de
+# menor id (así el movimiento no depende del orden en que el plan lea las filas). Los de potencia variable (power NULL)
+# cuentan con potencia 0. La subconsulta empieza por moves para que SQLite lea los movimientos de daño de
+# idx_moves_type (damage_class, type_id, power, name) sin tocar la tabla; los nombres del pokemon y del tipo se buscan
+# después, solo para las filas que quedan. Si se une types dentro, SQLite prefiere recorrer los 18 tipos y crear un
+# índice automático de moves para cada consulta
+CONSULTA_COBERTURA = """
+    SELECT p.name, t.name, mejores.movimiento, mejores.poder FROM (
+        SELECT pm.pokemon_id, m.type_id, m.name AS movimiento, COALESCE(m.power, 0) AS poder,
+               ROW_NUMBER() OVER (PARTITION BY pm.pokemon_id, m.type_id
+                                  ORDER BY COALESCE(m.power, 0) DESC, m.id) AS n
+        FROM moves m
+        JOIN pokemon_moves pm ON pm.move_id = m.id
+        WHERE m.damage_class IN ('physical', 'special')
+    ) AS mejores
+    JOIN types t ON mejores.type_id = t.id
+    JOIN pokemon p ON mejores.pokemon_id = p.id
+    WHERE mejores.n = 1
+"""
+
+# Construye el índice de movimientos sobre los pokemons del índice por clases (mismas posiciones)
+def construir_indice_movimientos(cursor, indice):
+    cursor.execute(CONSULTA_COBERTURA)
+    potencia = np.full((len(indice['nombres']), len(TIPOS)), -1, dtype=np.int16)  # -1: no aprende ninguno de ese tipo
+    movimiento = {}
+    for nombre, tipo, nombre_movimiento, poder in cursor.fetchall():
+        i = indice['indice'].get(nombre)
+        t = ID_TIPO.get(tipo)
+        if i is None or t is None:
+            continue  # Pokémon sin tipos o tipo que no está en la tabla (shadow, stellar...)
+        potencia[i, t] = poder
+        movimiento[i, t] = nombre_movimiento
+
+    return {
+        'aprendices': [np.flatnonzero(potencia[:, t] >= 0) for t in range(len(TIPOS))],
+        'potencia': potencia,
+        'movimiento': movimiento,
+    }
+
+# Multiplicador de cada tipo de ataque contra una combinación de tipos (lista de nombres)
+def multiplicadores_contra(tipos_defensor):
+    defensores = [ID_TIPO.get(tipo, SIN_TIPO) for tipo in tipos_defensor]
+    return MULTIPLICADORES[:len(TIPOS), defensores].prod(axis=1)
+
+# Mejor multiplicador de movimiento de cada pokemon contra el defensor y el tipo de ese movimiento (-1 si no tiene).
+# Se recorren los tipos de ataque de más a menos efectivos; cada pokemon se queda con el primero que aprende y, entre
+# tipos igual de efectivos, con el de su movimiento más potente
+def mejor_movimiento(movimientos, tipos_defensor):
+    multiplicadores = multiplicadores_contra(tipos_defensor)
+    potencia = movimientos['potencia']
+    mejor = np.zeros(len(potencia), dtype=np.float32)
+    tipo_mejor = np.full(len(potencia), -1, dtype=np.intp)
+    for t in np.argsort(-multiplicadores, kind='stable'):
+        if multiplicadores[t] == 0:
+            break
+        aprendices = movimientos['aprendices'][t]
+        actual = mejor[aprendices]
+        mejora = (actual < multiplicadores[t]) | ((actual == multiplicadores[t]) &
+                                                  (potencia[aprendices, t] > potencia[aprendices, tipo_mejor[aprendices]]))
+        nuevos = aprendices[mejora]
+        mejor[nuevos] = multiplicadores[t]
+        tipo_mejor[nuevos] = t
+    return mejor, tipo_mejor
+
+# Puntuación de cada pokemon del índice contra el pokemon j: la mayor entre su ponderación por tipos y su mejor
+# movimiento. Devuelve (puntuaciones, tipo del movimiento que la da o -1 si la da la ponderación por tipos)
+def puntuaciones_con_movimientos(indice, movimientos, j):
+    por_tipos = indice['pesos'][indice['clase_de'], indice['clase_de'][j]]
+    por_movimiento, tipo_mejor = mejor_movimiento(movimientos, indice['clases'][indice['clase_de'][j]])
+    tipo_mejor = np.where(por_movimiento > por_tipos, tipo_mejor, -1)
+    return np.maximum(por_tipos, por_movimiento), tipo_mejor
+
+# Nombre del movimiento de tipo t del pokemon i (None si t es -1)
+def nombre_movimiento(movimientos, i, t):
+    return None if t < 0 else movimientos['movimiento'][i, t]
@@ -0,0 +1,235 @@
+"""
+Índice de nombres de pokemons para no depender del nombre exacto: la PokeAPI usa nombres como 'deoxys-normal',
+'raichu-alola' o 'mr-mime', y si el usuario escribe 'deoxys', 'raichu de alola', 'Mr. Mime' o 'pikahcu' la búsqueda
+exacta falla. El índice se construye una vez con la lista de nombres y combina:
+
+  - alias: nombre normalizado (minúsculas, sin acentos ni signos, espacios como '-'), forma base (lo que va antes
+    del primer '-', p. ej. 'deoxys' -> 'deoxys-normal') y formas regionales ('alolan raichu' -> 'raichu-alola')
+  - trie: nombres que empiezan por lo escrito
+  - trigramas: candidatos que comparten trozos de 3 letras con lo escrito. Una errata cambia como mucho 3 trigramas,
+    así que solo se calcula la distancia de edición (erratas) con los que comparten suficientes, y si no hay
+    ninguno cerca se sugieren los que comparten más
+
+buscar() devuelve sugerencias ordenadas y resolver() el nombre exacto cuando no hay duda. Lo usan
+grafo_pokemon_counter.py, counter_equipo_random.py y servicio_counters.py.
+"""
+import heapq
+import unicodedata
+
+import numpy as np
+
+# Adjetivos de las formas regionales y el sufijo que usa la PokeAPI
+REGIONES = {
+    'alolan': 'alola', 'alola': 'alola',
+    'galarian': 'galar', 'galar': 'galar',
+    'hisuian': 'hisui', 'hisui': 'hisui',
+    'paldean': 'paldea', 'paldea': 'paldea',
+}
+# Palabras que se ignoran al escribir la forma regional ('raichu de alola')
+PALABRAS_VACIAS = {'de', 'of', 'forma', 'form'}
+# Sufijos de la forma por defecto: con 'deoxys' se elige 'deoxys-normal' aunque haya otras formas
+FORMAS_POR_DEFECTO = ('normal', 'incarnate', 'altered', 'land', 'ordinary', 'average', 'standard', 'male', 'shield',
+                      'midday', 'disguised', 'amped', 'plant', 'red-striped', 'solo', 'aria', 'baile', 'full-belly')
+# Se compara con el guion delante para que 'male' no coincida con 'meowstic-female'
+SUFIJOS_POR_DEFECTO = tuple('-' + forma for forma in FORMAS_POR_DEFECTO)
+# Erratas que se toleran: una en nombres cortos (hasta LARGO_CORTO letras) y MAX_ERRATAS en el resto
+MAX_ERRATAS = 2
+LARGO_CORTO = 5
+
+# Normaliza lo que escribe el usuario al estilo de los nombres de la PokeAPI
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto.strip().lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = ''.join(c if c.isalnum() else ('-' if c in ' _-' else '') for c in texto)
+    return '-'.join(parte for parte in texto.split('-') if parte)
+
+# Variante regional: 'alolan-raichu' o 'raichu-de-alola' -> 'raichu-alola' (None si no nombra ninguna región)
+def _forma_regional(normalizado):
+    partes = normalizado.split('-')
+    regiones = [REGIONES[p] for p in partes if p in REGIONES]
+    if not regiones:
+        return None
+    resto = [p for p in partes if p not in REGIONES and p not in PALABRAS_VACIAS]
+    return '-'.join(resto + [regiones[0]]) if resto else None
+
+# Distancia de edición (Levenshtein) con dos filas; si es mayor que tope, devuelve en cuanto se sabe un valor mayor que tope
+def distancia_edicion(a, b, tope=None):
+    if len(a) < len(b):
+        a, b = b, a
+    if tope is not None and len(a) - len(b) > tope:
+        return tope + 1
+    # El principio y el final comunes no cuentan ('pokemon-12' y 'pokemon-13' se comparan como '2' y '3')
+    inicio = 0
+    while inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    a, b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if tope is not None and min(actual) > tope:
+            return tope + 1
+        anterior = actual
+    return anterior[-1]
+
+# Trigramas de un nombre (con bordes, para que cuenten el principio y el final)
+def trigramas(nombre):
+    relleno = f"  {nombre} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+class IndiceNombres:
+    """
+    Índice de búsqueda sobre una lista de nombres. El trie es un diccionario de diccionarios (la clave '' guarda los
+    nombres que terminan en ese nodo) y por_trigrama guarda, para cada trigrama, los nombres que lo contienen.
+    """
+    def __init__(self, nombres):
+        self.nombres = list(dict.fromkeys(nombres))
+        self.exactos = set(self.nombres)
+
+        # Alias: normalizado y forma base -> nombres
+        self.alias = {}
+        for nombre in self.nombres:
+            normalizado = normalizar(nombre)
+            if normalizado != nombre:
+                self.alias.setdefault(normalizado, []).append(nombre)
+            if '-' in nombre:
+                self.alias.setdefault(nombre.split('-')[0], []).append(nombre)
+
+        self.trie = {}
+        for nombre in self.nombres:
+            nodo = self.trie
+            for letra in nombre:
+                nodo = nodo.setdefault(letra, {})
+            nodo.setdefault('', []).append(nombre)
+
+        # Listas invertidas trigrama -> posiciones de los nombres que lo tienen (arrays, para contar con bincount)
+        por_trigrama = {}
+        self.num_trigramas = np.empty(len(self.nombres), dtype=np.int32)
+        for i, nombre in enumerate(self.nombres):
+            propios = trigramas(nombre)
+            self.num_trigramas[i] = len(propios)
+            for trigrama in propios:
+                por_trigrama.setdefault(trigrama, []).append(i)
+        self.por_trigrama = {trigrama: np.array(posiciones, dtype=np.int32) for trigrama, posiciones in por_trigrama.items()}
+        self.longitudes = np.array([len(nombre) for nombre in self.nombres], dtype=np.int32)
+
+    # Cuántos trigramas comparte cada nombre con el texto (array con una posición por nombre)
+    def _comunes(self, propios):
+        listas = [self.por_trigrama[trigrama] for trigrama in propios if trigrama in self.por_trigrama]
+        if not listas:
+            return np.zeros(len(self.nombres), dtype=np.intp)
+        return np.bincount(np.concatenate(listas), minlength=len(self.nombres))
+
+    # Nombres que empiezan por prefijo, los más cortos primero
+    def por_prefijo(self, prefijo, limite=5):
+        nodo = self.trie
+        for letra in prefijo:
+            if letra not in nodo:
+                return []
+            nodo = nodo[letra]
+        # Recorrido en anchura: los nombres más cortos salen antes
+        encontrados = []
+        nivel = [nodo]
+        while nivel and len(encontrados) < limite:
+            siguiente = []
+            for actual in nivel:
+                for clave, hijo in actual.items():
+                    if clave == '':
+                        encontrados.extend(hijo)
+                    else:
+                        siguiente.append(hijo)
+            nivel = siguiente
+        return sorted(encontrados, key=lambda n: (len(n), n))[:limite]
+
+    # Nombres a distancia de edición <= tolerancia, como [(distancia, nombre)] ordenados
+    def por_erratas(self, texto, tolerancia=None, comunes=None):
+        if tolerancia is None:
+            tolerancia = 1 if len(texto) <= LARGO_CORTO else MAX_ERRATAS
+        propios = trigramas(texto)
+        comunes = self._comunes(propios) if comunes is None else comunes
+        # Cada edición rompe como mucho 3 trigramas: con menos comunes que esto no puede estar tan cerca.
+        # Tampoco si la longitud se diferencia en más que la tolerancia
+        posibles = (comunes >= len(propios) - 3 * tolerancia) & (np.abs(self.longitudes - len(texto)) <= tolerancia)
+        encontrados = []
+        for i in np.flatnonzero(posibles):
+            nombre = self.nombres[i]
+            distancia = distancia_edicion(texto, nombre, tolerancia)
+            if distancia <= tolerancia:
+                encontrados.append((distancia, nombre))
+        return sorted(encontrados)
+
+    # Nombres que comparten más trigramas con el texto, como [(similitud, nombre)] de mayor a menor
+    def por_trigramas(self, texto, limite=5, comunes=None):
+        propios = trigramas(texto)
+        comunes = self._comunes(propios) if comunes is None else comunes
+        # Similitud de Jaccard: comunes / (propios + del nombre - comunes)
+        similitud = comunes / (len(propios) + self.num_trigramas - comunes)
+        candidatos = np.flatnonzero(comunes)
+        mejores = heapq.nsmallest(limite, candidatos, key=lambda i: (-similitud[i], self.nombres[i]))
+        return [(float(similitud[i]), self.nombres[i]) for i in mejores]
+
+    # Nombres a los que apunta un alias, con la forma por defecto primero
+    def _por_alias(self, texto):
+        destinos = list(self.alias.get(texto, []))
+        regional = _forma_regional(texto)
+        if regional in self.exactos:
+            destinos.insert(0, regional)
+        por_defecto = [n for n in destinos if n.endswith(SUFIJOS_POR_DEFECTO)]
+        return list(dict.fromkeys(por_defecto + destinos))
+
+    # Sugerencias ordenadas [(nombre, motivo), ...]: exacto, alias, prefijo, erratas y, si no hay nada, trigramas
+    def buscar(self, consulta, limite=5):
+        texto = normalizar(consulta)
+        if not texto:
+            return []
+        sugerencias = {}
+        if texto in self.exactos:
+            sugerencias[texto] = 'exacto'
+        for nombre in self._por_alias(texto):
+            sugerencias.setdefault(nombre, 'alias')
+        for nombre in self.por_prefijo(texto, limite):
+            sugerencias.setdefault(nombre, 'prefijo')
+        comunes = self._comunes(trigramas(texto))
+        for _, nombre in self.por_erratas(texto, comunes=comunes):
+            sugerencias.setdefault(nombre, 'errata')
+        if len(sugerencias) < limite:
+            for _, nombre in self.por_trigramas(texto, limite, comunes):
+                sugerencias.setdefault(nombre, 'parecido')
+        return list(sugerencias.items())[:limite]
+
+    # Nombre exacto al que se refiere la consulta, o None si no está claro (entonces conviene mostrar buscar())
+    def resolver(self, consulta):
+        texto = normalizar(consulta)
+        if texto in self.exactos:
+            return texto
+        destinos = self._por_alias(texto)
+        if len(destinos) == 1 or (destinos and destinos[0].endswith(SUFIJOS_POR_DEFECTO)):
+            return destinos[0]
+        erratas = self.por_erratas(texto, 1)
+        # Una sola errata y un solo candidato: se corrige sin preguntar
+        if len(erratas) == 1 and len(texto) > 3:
+            return erratas[0][1]
+        return None
+
+    # Resuelve varias consultas: devuelve (nombres resueltos, {consulta sin resolver: sugerencias})
+    def resolver_todos(self, consultas, limite=5):
+        resueltos = []
+        dudosos = {}
+        for consulta in consultas:
+            nombre = self.resolver(consulta)
+            if nombre is None:
+                dudosos[consulta] = [sugerencia for sugerencia, _ in self.buscar(consulta, limite)]
+            else:
+                resueltos.append(nombre)
+        return resueltos, dudosos
+
+# Mensaje para un nombre que no se ha podido resolver
+def mensaje_no_encontrado(consulta, sugerencias):
+    mensaje = f"El Pokémon '{consulta}' no está en la base de datos."
+    if sugerencias:
+        mensaje += f" ¿Quizás quisiste decir: {', '.join(sugerencias)}?"
+    return mensaje
@@ -0,0 +1,165 @@
+"""
+Instrumentación de los puntos calientes de los scripts para saber dónde se va el tiempo de una consulta lenta
+(SQLite, construcción del grafo o cálculo de ponderaciones). Está desactivada por defecto y entonces no cuesta casi
+nada: etapa() devuelve siempre el mismo contexto vacío, contar() solo comprueba una variable y medir_llamadas()
+devuelve la función original sin envolver.
+
+Se activa con la variable de entorno POKEMON_PERFIL o con la opción --perfil de crear_pokemon.py,
+grafo_pokemon_counter.py y counter_equipo_random.py. El valor es una lista de modos separados por comas:
+  - tiempos (o 1): tiempo y número de llamadas de cada etapa, contadores y consultas SQL por tipo
+  - cprofile: además guarda un perfil de cProfile en <prefijo>.prof (se ve con python -m pstats o snakeviz)
+  - tracemalloc: además guarda en <prefijo>_memoria.txt las líneas que más memoria reservan y el pico
+Con 0, false, no, off o vacía sigue apagada. Un modo desconocido en la variable de entorno solo se avisa (no debe
+impedir que arranque ningún script); en --perfil es un error.
+Al terminar el programa se escribe el resumen por la salida de error y en <prefijo>.json. El prefijo es 'perfil'
+o el valor de POKEMON_PERFIL_SALIDA.
+
+Ejemplo: POKEMON_PERFIL=tiempos,cprofile python grafo_pokemon_counter.py --motor grafo
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+VARIABLE = 'POKEMON_PERFIL'
+VARIABLE_SALIDA = 'POKEMON_PERFIL_SALIDA'
+MODOS = ('tiempos', 'cprofile', 'tracemalloc')
+ACTIVADO = {'1', 'si', 'sí', 'true', 'yes', 'on'}  # equivalen a 'tiempos'
+APAGADO = {'0', 'false', 'no', 'off'}
+
+activa = False
+_modos = set()
+_nada = nullcontext()
+_cerrojo = threading.Lock()  # las descargas de crear_pokemon.py se miden desde varios hilos
+_tiempos = defaultdict(float)
+_llamadas = defaultdict(int)
+_contadores = defaultdict(int)
+_perfilador = None
+
+class _Etapa:
+    """Contexto que suma el tiempo que pasa dentro a la etapa con ese nombre."""
+    __slots__ = ('nombre', 'inicio')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        transcurrido = time.perf_counter() - self.inicio
+        with _cerrojo:
+            _tiempos[self.nombre] += transcurrido
+            _llamadas[self.nombre] += 1
+        return False
+
+# Mide un bloque: with etapa('sql.tipos'): ...
+def etapa(nombre):
+    return _Etapa(nombre) if activa else _nada
+
+# Suma una cantidad a un contador (filas leídas, aristas, pares comparados...)
+def contar(nombre, cantidad=1):
+    if activa:
+        with _cerrojo:
+            _contadores[nombre] += cantidad
+
+# Devuelve la función envuelta para medir cada llamada, o la misma función si la instrumentación está apagada.
+# Se llama justo antes del bucle caliente (no al importar), para que también funcione con --perfil
+def medir_llamadas(nombre, funcion):
+    if not activa:
+        return funcion
+
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            transcurrido = time.perf_counter() - inicio
+            with _cerrojo:
+                _tiempos[nombre] += transcurrido
+                _llamadas[nombre] += 1
+    return medida
+
+# Cuenta las sentencias SQL que se ejecutan en una conexión, por tipo (SELECT, INSERT...)
+def vigilar_conexion(conexion):
+    if activa:
+        conexion.set_trace_callback(lambda sql: contar(f"sql.{sql.lstrip().split(None, 1)[0].upper()}"))
+    return conexion
+
+# Activa la instrumentación con los modos dados ('tiempos', 'cprofile', 'tracemalloc' o '1'). Con '0', 'false',
+# 'no', 'off' o nada se queda apagada. Un modo desconocido lanza ValueError si es estricto (la opción --perfil); si no
+# (la variable de entorno, que se lee al importar), se avisa por la salida de error y se ignora ese modo
+def activar(modos='tiempos', estricto=True):
+    global activa, _perfilador
+    pedidos = {modo.strip().lower() for modo in modos.split(',') if modo.strip()}
+    pedidos = {'tiempos' if modo in ACTIVADO else modo for modo in pedidos} - APAGADO
+    desconocidos = pedidos - set(MODOS)
+    if desconocidos:
+        mensaje = f"Modos de {VARIABLE} desconocidos: {', '.join(sorted(desconocidos))} (válidos: {', '.join(MODOS)})"
+        if estricto:
+            raise ValueError(mensaje)
+        print(f"Aviso: {mensaje}; se ignoran", file=sys.stderr)
+        pedidos -= desconocidos
+    if activa or not pedidos:
+        return
+    activa = True
+    _modos.update(pedidos | {'tiempos'})
+
+    if 'cprofile' in _modos:
+        import cProfile
+        _perfilador = cProfile.Profile()
+        _perfilador.enable()
+    if 'tracemalloc' in _modos:
+        import tracemalloc
+        tracemalloc.start(10)
+    atexit.register(informe)
+
+# Resumen de lo medido hasta ahora
+def resumen():
+    with _cerrojo:
+        etapas = {nombre: {'llamadas': _llamadas[nombre], 'total_ms': round(_tiempos[nombre] * 1000, 3),
+                           'media_us': round(_tiempos[nombre] / _llamadas[nombre] * 1e6, 3)}
+                  for nombre in sorted(_tiempos, key=_tiempos.get, reverse=True)}
+        return {'etapas': etapas, 'contadores': dict(sorted(_contadores.items()))}
+
+# Escribe el resumen por la salida de error y los volcados que se hayan pedido
+def informe():
+    prefijo = os.environ.get(VARIABLE_SALIDA, 'perfil')
+    datos = resumen()
+
+    print("\n--- perfil ---", file=sys.stderr)
+    print(f"{'etapa':<40} {'llamadas':>10} {'total ms':>12} {'media µs':>12}", file=sys.stderr)
+    for nombre, etapa_medida in datos['etapas'].items():
+        print(f"{nombre:<40} {etapa_medida['llamadas']:>10} {etapa_medida['total_ms']:>12.1f} "
+              f"{etapa_medida['media_us']:>12.1f}", file=sys.stderr)
+    if datos['contadores']:
+        print(f"\n{'contador':<40} {'valor':>10}", file=sys.stderr)
+    for nombre, valor in datos['contadores'].items():
+        print(f"{nombre:<40} {valor:>10}", file=sys.stderr)
+
+    if _perfilador is not None:
+        _perfilador.disable()
+        _perfilador.dump_stats(f"{prefijo}.prof")
+        print(f"Perfil de cProfile guardado en {prefijo}.prof", file=sys.stderr)
+    if 'tracemalloc' in _modos:
+        import tracemalloc
+        actual, pico = tracemalloc.get_traced_memory()
+        datos['memoria'] = {'actual_mb': round(actual / 2 ** 20, 2), 'pico_mb': round(pico / 2 ** 20, 2)}
+        with open(f"{prefijo}_memoria.txt", 'w', encoding='utf-8') as fichero:
+            fichero.write(f"Pico: {pico / 2 ** 20:.1f} MB, al terminar: {actual / 2 ** 20:.1f} MB\n\n")
+            for estadistica in tracemalloc.take_snapshot().statistics('lineno')[:25]:
+                fichero.write(f"{estadistica}\n")
+        tracemalloc.stop()
+        print(f"Memoria: pico {pico / 2 ** 20:.1f} MB (detalle en {prefijo}_memoria.txt)", file=sys.stderr)
+
+    with open(f"{prefijo}.json", 'w', encoding='utf-8') as fichero:
+        json.dump(datos, fichero, indent=2, ensure_ascii=False)
+
+# Se activa al importar si está la variable de entorno (sin fallar: un valor mal escrito no debe impedir arrancar)
+if os.environ.get(VARIABLE):
+    activar(os.environ[VARIABLE], estricto=False)
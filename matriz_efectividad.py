@@ -0,0 +1,70 @@
+"""
+Versión vectorizada del grafo de grafo_pokemon_counter.py. En vez de llamar a calcular_ponderacion para cada par de
+pokemons (más de un millón de llamadas), uso la tabla de tabla_tipos.py como matriz 18x18 de multiplicadores
+(2, 0.5, 0 o 1 por cada tipo atacante contra cada tipo defensor) y codifico los tipos de cada pokemon como índices.
+La ponderación de un pokemon contra otro es el producto de los multiplicadores de todas sus parejas de tipos, así que
+la matriz completa atacante x defensor sale de multiplicar unas pocas submatrices con indexado de numpy.
+
+La posición [i, j] de la matriz es la ponderación de la arista i -> j del grafo (0 si no hay arista), por lo que
+encontrar_fuerte_contra devuelve exactamente lo mismo que la versión del grafo.
+"""
+import numpy as np
+
+from grafo_pokemon_counter import cargar_tipos_por_pokemon
+from tabla_tipos import ANCHO, ID_TIPO, SIN_TIPO, TIPOS
+from tabla_tipos import MULTIPLICADORES as MULTIPLICADORES_PLANOS
+
+# La tabla compilada de tabla_tipos.py como matriz (ANCHO x ANCHO, con la fila y la columna de SIN_TIPO a 1)
+MULTIPLICADORES = np.array(MULTIPLICADORES_PLANOS, dtype=np.float32).reshape(ANCHO, ANCHO)
+
+# Convierte una lista de listas de tipos en un array (pokemons x tipos) de índices, rellenando con SIN_TIPO
+def codificar_tipos(lista_tipos):
+    ancho = max((len(tipos) for tipos in lista_tipos), default=1)
+    codigos = np.full((len(lista_tipos), ancho), SIN_TIPO, dtype=np.intp)
+    for i, tipos in enumerate(lista_tipos):
+        for k, tipo in enumerate(tipos):
+            codigos[i, k] = ID_TIPO.get(tipo, SIN_TIPO)
+    return codigos
+
+# Matriz de ponderaciones atacante x defensor: producto de los multiplicadores de cada pareja de tipos
+def calcular_ponderaciones(codigos_atacantes, codigos_defensores):
+    pesos = np.ones((len(codigos_atacantes), len(codigos_defensores)), dtype=np.float32)
+    for a in range(codigos_atacantes.shape[1]):
+        for d in range(codigos_defensores.shape[1]):
+            pesos *= MULTIPLICADORES[np.ix_(codigos_atacantes[:, a], codigos_defensores[:, d])]
+    return pesos
+
+# Equivalente a construir_grafo: devuelve los nombres, su índice y la matriz de ponderaciones
+def construir_matriz(cursor):
+    tipos_por_pokemon = cargar_tipos_por_pokemon(cursor)
+    nombres = list(tipos_por_pokemon)
+    codigos = codificar_tipos(list(tipos_por_pokemon.values()))
+
+    pesos = calcular_ponderaciones(codigos, codigos)
+    np.fill_diagonal(pesos, 0)  # Evitar lazos
+
+    # Un pokemon sin ninguna arista (ni de entrada ni de salida) no llegaría a ser nodo del grafo
+    hay_arista = pesos > 0
+    en_grafo = hay_arista.any(axis=0) | hay_arista.any(axis=1)
+
+    return {
+        'nombres': nombres,
+        'indice': {nombre: i for i, nombre in enumerate(nombres)},
+        'codigos': codigos,
+        'pesos': pesos,
+        'en_grafo': en_grafo,
+    }
+
+# Función para buscar el pokémon más fuerte (mismo resultado que la versión con el grafo)
+def encontrar_fuerte_contra(pokemon, matriz):
+    j = matriz['indice'].get(pokemon)
+    if j is None or not matriz['en_grafo'][j]:
+        return f"El Pokémon '{pokemon}' no está en la base de datos."
+
+    # argmax devuelve el primero de los empatados, igual que max() sobre los predecesores del grafo
+    columna = matriz['pesos'][:, j]
+    mejor = int(np.argmax(columna))
+    if columna[mejor] <= 0:
+        return "No se encontraron atacantes efectivos."
+
+    return matriz['nombres'][mejor], float(columna[mejor])
@@ -0,0 +1,141 @@
+"""
+Busca el mejor equipo de 6 contra un equipo rival, en vez de coger 6 pokemons al azar entre los que tienen algún tipo
+favorable (lo que hace encontrar_equipo_fuerte). La búsqueda se hace sobre las combinaciones de tipos del índice de
+clases_tipos.py (unas 170), no sobre los más de mil pokemons, y la puntuación de un equipo es:
+
+    ofensiva  = suma, para cada rival, de la mejor ponderación de algún miembro del equipo contra él
+    debilidad = suma, para cada miembro, de la peor ponderación que recibe de algún rival
+    puntuación = ofensiva - PESO_DEBILIDAD * debilidad
+
+Primero se construye un equipo voraz (cada hueco se llena con la clase que más sube la puntuación) y luego se mejora
+con búsqueda local (cambiar un miembro por otra clase mientras mejore). Después se repite `reinicios` veces desde
+equipos perturbados al azar y se queda el mejor. El número de reinicios es lo único que para la búsqueda, así que con la
+misma semilla sale siempre el mismo equipo; con `tiempo` (en segundos) se puede cortar antes, a cambio de que el
+resultado dependa de la velocidad de la máquina. De cada clase elegida se cogen los miembros con mejores estadísticas,
+como en ranking_counters.py.
+"""
+import random
+import time
+
+import numpy as np
+
+from counter_equipo_random import obtener_equipo_por_nombres
+from matriz_efectividad import calcular_ponderaciones, codificar_tipos
+
+TAMANO_EQUIPO = 6
+PESO_DEBILIDAD = 0.5
+
+# Puntuación de un equipo (lista de clases) según las tablas ataque (clase x rival) y debilidad (por clase).
+# Un equipo vacío no ataca ni recibe nada
+def puntuar(equipo, ataque, debilidad):
+    if not equipo:
+        return 0.0
+    return float(ataque[equipo].max(axis=0).sum() - PESO_DEBILIDAD * debilidad[equipo].sum())
+
+# Mejor cambio posible de un miembro por otra clase; devuelve (puntuación, hueco, clase) o None si ninguno mejora.
+# Con menos de dos miembros no hay resto con el que comparar (y el voraz ya ha elegido la mejor clase para un hueco),
+# así que el equipo se queda como está
+def _mejor_cambio(equipo, ataque, debilidad, disponibles, puntuacion):
+    if len(equipo) < 2:
+        return None
+    mejor = None
+    usados = np.bincount(equipo, minlength=len(disponibles))
+    for hueco in range(len(equipo)):
+        resto = equipo[:hueco] + equipo[hueco + 1:]
+        mejor_resto = ataque[resto].max(axis=0)
+        # Puntuación del equipo con cada clase posible en este hueco, todas a la vez
+        nuevas = (np.maximum(ataque, mejor_resto).sum(axis=1)
+                  - PESO_DEBILIDAD * (debilidad[resto].sum() + debilidad))
+        libres = disponibles - usados + (np.arange(len(disponibles)) == equipo[hueco])
+        nuevas[libres <= 0] = -np.inf
+        clase = int(np.argmax(nuevas))
+        if nuevas[clase] > puntuacion + 1e-9 and (mejor is None or nuevas[clase] > mejor[0]):
+            mejor = (float(nuevas[clase]), hueco, clase)
+    return mejor
+
+# Búsqueda local: aplica el mejor cambio mientras haya alguno que mejore
+def busqueda_local(equipo, ataque, debilidad, disponibles):
+    puntuacion = puntuar(equipo, ataque, debilidad)
+    while True:
+        cambio = _mejor_cambio(equipo, ataque, debilidad, disponibles, puntuacion)
+        if cambio is None:
+            return equipo, puntuacion
+        puntuacion, hueco, clase = cambio
+        equipo = equipo[:hueco] + [clase] + equipo[hueco + 1:]
+
+# Construcción voraz: cada hueco se llena con la clase que más sube la puntuación (empates al azar con rng)
+def equipo_voraz(ataque, debilidad, disponibles, rng, tamano):
+    equipo = []
+    mejor = np.zeros(ataque.shape[1])
+    usados = np.zeros(len(disponibles), dtype=int)
+    for _ in range(tamano):
+        ganancia = np.maximum(ataque, mejor).sum(axis=1) - PESO_DEBILIDAD * debilidad
+        ganancia[usados >= disponibles] = -np.inf
+        if not np.isfinite(ganancia.max()):
+            break
+        empatadas = np.flatnonzero(ganancia == ganancia.max())
+        clase = int(empatadas[rng.randrange(len(empatadas))])
+        equipo.append(clase)
+        usados[clase] += 1
+        mejor = np.maximum(mejor, ataque[clase])
+    return equipo
+
+# Optimiza a partir de las tablas ya calculadas: ataque (clase x rival) y debilidad (peor golpe que recibe cada clase).
+# Con tiempo=None (por defecto) se hacen siempre todos los reinicios
+def optimizar_tablas(ataque, debilidad, disponibles, rng, tiempo=None, reinicios=20, tamano=TAMANO_EQUIPO):
+    limite = time.perf_counter() + tiempo if tiempo is not None else None
+    tamano = min(tamano, int(disponibles.sum()))
+
+    equipo, puntuacion = busqueda_local(equipo_voraz(ataque, debilidad, disponibles, rng, tamano),
+                                         ataque, debilidad, disponibles)
+    for _ in range(reinicios):
+        if tamano < 2 or (limite is not None and time.perf_counter() >= limite):
+            break
+        # Perturbación: se cambian dos miembros por clases al azar (con sitio libre) y se vuelve a mejorar
+        candidato = list(equipo)
+        for hueco in rng.sample(range(tamano), 2):
+            usados = np.bincount(candidato, minlength=len(disponibles))
+            libres = np.flatnonzero(usados < disponibles)
+            if len(libres):
+                candidato[hueco] = int(libres[rng.randrange(len(libres))])
+        candidato, valor = busqueda_local(candidato, ataque, debilidad, disponibles)
+        if valor > puntuacion + 1e-9:
+            equipo, puntuacion = candidato, valor
+    return sorted(equipo), puntuacion
+
+# Devuelve las clases del mejor equipo encontrado y su puntuación
+def optimizar_clases(indice, tipos_rivales, disponibles, semilla=0, tiempo=None, reinicios=20, tamano=TAMANO_EQUIPO):
+    codigos_rivales = codificar_tipos(tipos_rivales)
+    ataque = calcular_ponderaciones(indice['codigos'], codigos_rivales)  # clase -> rival
+    debilidad = calcular_ponderaciones(codigos_rivales, indice['codigos']).max(axis=0)  # peor golpe que recibe cada clase
+    return optimizar_tablas(ataque, debilidad, disponibles, random.Random(semilla), tiempo, reinicios, tamano)
+
+# Elige los pokemons del equipo: de cada clase, los miembros con mejores estadísticas (sin repetir ni usar rivales)
+def elegir_miembros(indice, estadisticas, clases, excluidos=()):
+    excluidos = set(excluidos)
+    nombres = []
+    for clase in sorted(set(clases)):
+        miembros = [i for i in indice['miembros'][clase] if i not in excluidos]
+        miembros.sort(key=lambda i: (estadisticas[i], -i), reverse=True)
+        nombres.extend(indice['nombres'][i] for i in miembros[:clases.count(clase)])
+    return nombres
+
+# Nombres de los pokemons del equipo optimizado contra el rival (lista de diccionarios con 'name' y 'types')
+def elegir_equipo_optimo(equipo_rival, indice, estadisticas, semilla=0, tiempo=None):
+    if not equipo_rival:
+        return []
+    excluidos = [indice['indice'][p['name']] for p in equipo_rival if p.get('name') in indice['indice']]
+    disponibles = np.array([len(m) for m in indice['miembros']])
+    for i in excluidos:
+        disponibles[indice['clase_de'][i]] -= 1
+
+    clases, _ = optimizar_clases(indice, [p['types'] for p in equipo_rival], disponibles, semilla, tiempo)
+    return elegir_miembros(indice, estadisticas, clases, excluidos)
+
+# Igual que encontrar_equipo_fuerte, pero con el equipo optimizado; devuelve los pokemons con toda su información
+def encontrar_equipo_optimo(cursor, equipo_rival, indice, estadisticas, semilla=0, tiempo=None):
+    nombres = elegir_equipo_optimo(equipo_rival, indice, estadisticas, semilla, tiempo)
+    if not nombres:
+        return []
+    equipo, _ = obtener_equipo_por_nombres(cursor, nombres)
+    return equipo
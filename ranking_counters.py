@@ -0,0 +1,97 @@
+"""
+Ranking de los K mejores counters de un pokemon. Como las ponderaciones solo pueden valer 0, 0.0625, 0.125, 0.25, 0.5,
+1, 2, 4, 8 o 16 (el producto de las eficacias de hasta dos tipos atacantes contra hasta dos defensores), cientos de
+pokemons empatan con la máxima y max() se queda con uno cualquiera. Aquí los empates se deshacen con las estadísticas
+de pokemon_stats: primero el ataque que más le conviene (el mayor entre attack y special-attack), luego la velocidad y
+por último el total de estadísticas base (si todo coincide, el primero en el orden de carga).
+
+Se recorren los niveles de ponderación de mayor a menor sobre el índice por clases (los valores distintos que hay en la
+columna, sin suponer ningún rango), y dentro de cada nivel solo se eligen los que faltan con un heap (heapq.nlargest),
+sin ordenar a todos los candidatos.
+
+top_counters_movimientos hace lo mismo pero puntuando también los movimientos de cobertura (indice_movimientos.py).
+"""
+import heapq
+
+import numpy as np
+
+from clases_tipos import encontrar_fuerte_contra
+from indice_movimientos import nombre_movimiento, puntuaciones_con_movimientos
+
+# Carga las estadísticas de cada pokemon del índice como tuplas (ataque relevante, velocidad, total)
+def cargar_estadisticas(cursor, indice):
+    cursor.execute('''
+        SELECT p.name, s.name, ps.value
+        FROM pokemon_stats ps
+        JOIN stats s ON ps.stat_id = s.id
+        JOIN pokemon p ON ps.pokemon_id = p.id
+    ''')
+    por_pokemon = {}
+    for nombre, stat, valor in cursor.fetchall():
+        por_pokemon.setdefault(nombre, {})[stat] = valor
+
+    estadisticas = []
+    for nombre in indice['nombres']:
+        stats = por_pokemon.get(nombre, {})
+        ataque = max(stats.get('attack', 0), stats.get('special-attack', 0))
+        estadisticas.append((ataque, stats.get('speed', 0), sum(stats.values())))
+    return estadisticas
+
+# Los k mejores atacantes [(índice, ponderación), ...] según una columna de la tabla de clases, sin contar al excluido
+def _ranking_columna(indice, estadisticas, columna, k, excluido=-1):
+    # Clave de desempate: estadísticas de mayor a menor y, si coinciden, el primero en el orden de carga
+    clave = lambda i: (estadisticas[i], -i)
+
+    ranking = []
+    for nivel in np.unique(columna[columna > 0])[::-1]:
+        faltan = k - len(ranking)
+        if faltan <= 0:
+            break
+        candidatos = [i for c in np.flatnonzero(columna == nivel) for i in indice['miembros'][c] if i != excluido]
+        for i in heapq.nlargest(faltan, candidatos, key=clave):
+            ranking.append((i, float(nivel)))
+    return ranking
+
+# Devuelve los k mejores counters [(nombre, ponderación), ...] del pokemon, o el mismo mensaje que encontrar_fuerte_contra
+def top_counters(pokemon, indice, estadisticas, k=5):
+    # Los casos sin respuesta (no existe o nadie le afecta) se comprueban igual que en encontrar_fuerte_contra
+    resultado = encontrar_fuerte_contra(pokemon, indice)
+    if not isinstance(resultado, tuple):
+        return resultado
+
+    j = indice['indice'][pokemon]
+    columna = indice['pesos'][:, indice['clase_de'][j]]
+    return [(indice['nombres'][i], peso) for i, peso in _ranking_columna(indice, estadisticas, columna, k, j)]
+
+# Como top_counters, pero la puntuación de cada atacante es la mayor entre su ponderación por tipos y su mejor movimiento
+# (indice_movimientos.py). Devuelve [(nombre, puntuación, movimiento o None si basta con sus tipos), ...]
+def top_counters_movimientos(pokemon, indice, estadisticas, movimientos, k=5):
+    j = indice['indice'].get(pokemon)
+    if j is None:
+        return f"El Pokémon '{pokemon}' no está en la base de datos."
+    puntuaciones, tipo_mejor = puntuaciones_con_movimientos(indice, movimientos, j)
+    puntuaciones[j] = 0  # Sin lazos
+
+    clave = lambda i: (estadisticas[i], -i)
+    ranking = []
+    for nivel in np.unique(puntuaciones[puntuaciones > 0])[::-1]:
+        faltan = k - len(ranking)
+        if faltan <= 0:
+            break
+        for i in heapq.nlargest(faltan, np.flatnonzero(puntuaciones == nivel).tolist(), key=clave):
+            ranking.append((indice['nombres'][i], float(nivel), nombre_movimiento(movimientos, i, tipo_mejor[i])))
+    return ranking or "No se encontraron atacantes efectivos."
+
+# Ranking de todos los pokemons del índice: se calcula una vez por clase y a cada miembro se le quita a sí mismo
+def top_counters_todos(indice, estadisticas, k=5):
+    resultados = {}
+    for c, miembros in enumerate(indice['miembros']):
+        # k + 1 para que, al quitar al propio pokemon, sigan quedando k
+        ranking = _ranking_columna(indice, estadisticas, indice['pesos'][:, c], k + 1)
+        for j in miembros:
+            nombre = indice['nombres'][j]
+            resultado = encontrar_fuerte_contra(nombre, indice)
+            if isinstance(resultado, tuple):
+                resultado = [(indice['nombres'][i], peso) for i, peso in ranking if i != j][:k]
+            resultados[nombre] = resultado
+    return resultados
@@ -0,0 +1,204 @@
+"""
+Permite usar los counters sin el input() de grafo_pokemon_counter.py, para responder muchas consultas seguidas.
+El índice (y las estadísticas para desempatar) se carga una sola vez y luego se responde a:
+  - un pokemon: sus mejores counters (ranking_counters.py)
+  - un equipo (nombres separados por comas): el equipo fuerte contra él (optimizador_equipo.py)
+
+Tiene dos modos:
+  python servicio_counters.py lote [--entrada consultas.txt] [--salida respuestas.jsonl] [--top 5]
+      lee una consulta por línea (de un fichero o de la entrada estándar) y escribe una línea JSON por respuesta.
+  python servicio_counters.py servidor [--host 127.0.0.1] [--puerto 8000]
+      servidor HTTP local que responde en JSON a varias peticiones a la vez:
+      GET /counter?pokemon=pikachu&top=5   y   GET /equipo?pokemons=pikachu,onix,...&semilla=0
+      Responde 400 si top o semilla no son válidos, 404 si algún pokemon no existe (con sugerencias) y 500 (también en
+      JSON) ante cualquier otro error.
+"""
+import argparse
+import json
+import queue
+import sqlite3
+import sys
+import traceback
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cache_counters import cargar_indice
+from counter_equipo_random import obtener_equipo_por_nombres
+from indice_nombres import IndiceNombres, mensaje_no_encontrado
+from optimizador_equipo import encontrar_equipo_optimo
+from ranking_counters import cargar_estadisticas, top_counters
+
+class ServicioCounters:
+    """
+    Guarda el índice y las estadísticas en memoria (solo se leen, así que se pueden compartir entre hilos) y un pool
+    de conexiones a pokemon.db para las consultas de equipos.
+    """
+    def __init__(self, ruta_db, conexiones=4):
+        conexion = sqlite3.connect(ruta_db)
+        self.indice = cargar_indice(conexion)
+        self.estadisticas = cargar_estadisticas(conexion.cursor(), self.indice)
+        conexion.close()
+        self.nombres = IndiceNombres(self.indice['nombres'])
+
+        self.pool = queue.Queue()
+        for _ in range(conexiones):
+            self.pool.put(sqlite3.connect(ruta_db, check_same_thread=False))
+
+    # Presta una conexión del pool mientras dure el bloque with
+    @contextmanager
+    def conexion(self):
+        conexion = self.pool.get()
+        try:
+            yield conexion
+        finally:
+            self.pool.put(conexion)
+
+    # Mejores counters de un pokemon (si el nombre no es exacto se resuelve con indice_nombres.py)
+    def counter(self, pokemon, top=1):
+        pokemon = pokemon.strip().lower()
+        resuelto = self.nombres.resolver(pokemon)
+        if resuelto is None:
+            sugerencias = [nombre for nombre, _ in self.nombres.buscar(pokemon)]
+            return {'pokemon': pokemon, 'error': mensaje_no_encontrado(pokemon, sugerencias), 'sugerencias': sugerencias}
+        resultado = top_counters(resuelto, self.indice, self.estadisticas, top)
+        respuesta = {'pokemon': pokemon} if resuelto == pokemon else {'pokemon': pokemon, 'resuelto': resuelto}
+        if not isinstance(resultado, list):
+            return {**respuesta, 'error': resultado}
+        return {**respuesta,
+                'counters': [{'nombre': nombre, 'efectividad': ponderacion} for nombre, ponderacion in resultado]}
+
+    # Equipo fuerte contra un equipo dado por nombres (optimizador_equipo.py; misma semilla, mismo equipo)
+    def equipo(self, nombres, semilla=0):
+        nombres = [nombre.strip().lower() for nombre in nombres if nombre.strip()]
+        resueltos, dudosos = self.nombres.resolver_todos(nombres)
+        if dudosos:
+            return {'rival': nombres, 'error': f"No están en la base de datos: {', '.join(dudosos)}",
+                    'sugerencias': dudosos}
+        with self.conexion() as conexion:
+            cursor = conexion.cursor()
+            equipo_rival, no_encontrados = obtener_equipo_por_nombres(cursor, resueltos)
+            if no_encontrados:
+                return {'rival': nombres, 'error': f"No están en la base de datos: {', '.join(no_encontrados)}",
+                        'sugerencias': []}
+            equipo_fuerte = encontrar_equipo_optimo(cursor, equipo_rival, self.indice, self.estadisticas, semilla)
+        return {'rival': nombres, 'equipo': equipo_fuerte}
+
+    # Una línea de texto: si tiene comas es un equipo, si no un pokemon
+    def responder(self, linea, top=1):
+        if ',' in linea:
+            return self.equipo(linea.split(','))
+        return self.counter(linea, top)
+
+    def cerrar(self):
+        while not self.pool.empty():
+            self.pool.get().close()
+
+# Modo lote: una consulta por línea, una respuesta JSON por línea
+def procesar_lote(servicio, entrada, salida, top=1):
+    respondidas = 0
+    for linea in entrada:
+        linea = linea.strip()
+        if not linea or linea.startswith('#'):
+            continue
+        salida.write(json.dumps(servicio.responder(linea, top), ensure_ascii=False) + '\n')
+        respondidas += 1
+    return respondidas
+
+# Lee un parámetro entero de la petición (ValueError con un mensaje legible si no lo es o es menor que minimo)
+def parametro_entero(parametros, nombre, defecto, minimo=None):
+    valor = parametros.get(nombre, [str(defecto)])[0]
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"{nombre} tiene que ser un número entero, no '{valor}'") from None
+    if minimo is not None and numero < minimo:
+        raise ValueError(f"{nombre} tiene que ser al menos {minimo}")
+    return numero
+
+# Código HTTP de una respuesta del servicio: las de nombres que no existen llevan 'sugerencias'
+def codigo_respuesta(respuesta):
+    return 404 if 'sugerencias' in respuesta else 200
+
+# Crea la clase del manejador HTTP con el servicio ya cargado
+def crear_manejador(servicio):
+    class ManejadorCounters(BaseHTTPRequestHandler):
+        def _responder(self, codigo, datos):
+            cuerpo = json.dumps(datos, ensure_ascii=False).encode()
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parametros = parse_qs(url.query)
+            try:
+                if url.path == '/counter' and 'pokemon' in parametros:
+                    top = parametro_entero(parametros, 'top', 1, minimo=1)
+                    respuesta = servicio.counter(parametros['pokemon'][0], top)
+                elif url.path == '/equipo' and 'pokemons' in parametros:
+                    semilla = parametro_entero(parametros, 'semilla', 0)
+                    respuesta = servicio.equipo(parametros['pokemons'][0].split(','), semilla)
+                else:
+                    self._responder(404, {'error': "Usa /counter?pokemon=... o /equipo?pokemons=a,b,c"})
+                    return
+                self._responder(codigo_respuesta(respuesta), respuesta)
+            except ValueError as e:
+                self._responder(400, {'error': str(e)})
+            except KeyError as e:
+                self._responder(404, {'error': f"No está en la base de datos: {e.args[0] if e.args else ''}"})
+            except Exception as e:
+                # El cliente recibe JSON igualmente; el detalle queda en la salida de errores del servidor
+                traceback.print_exc()
+                self._responder(500, {'error': f"Error interno del servidor ({type(e).__name__})"})
+
+        # Sin log por petición: con miles de consultas por minuto solo ensucia la salida
+        def log_message(self, formato, *args):
+            pass
+
+    return ManejadorCounters
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas de counters por lotes o como servidor HTTP.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    modos = parser.add_subparsers(dest="modo", required=True)
+
+    lote = modos.add_parser("lote", help="responde las consultas de un fichero (o de la entrada estándar)")
+    lote.add_argument("--entrada", help="fichero con una consulta por línea (por defecto, la entrada estándar)")
+    lote.add_argument("--salida", help="fichero JSON lines de salida (por defecto, la salida estándar)")
+    lote.add_argument("--top", type=int, default=1, help="número de counters por pokemon")
+
+    servidor = modos.add_parser("servidor", help="servidor HTTP/JSON local")
+    servidor.add_argument("--host", default="127.0.0.1")
+    servidor.add_argument("--puerto", type=int, default=8000)
+    args = parser.parse_args()
+
+    servicio = ServicioCounters(args.db)
+    try:
+        if args.modo == "lote":
+            entrada = open(args.entrada, encoding='utf-8') if args.entrada else sys.stdin
+            salida = open(args.salida, 'w', encoding='utf-8') if args.salida else sys.stdout
+            try:
+                respondidas = procesar_lote(servicio, entrada, salida, args.top)
+            finally:
+                if args.entrada:
+                    entrada.close()
+                if args.salida:
+                    salida.close()
+            print(f"{respondidas} consultas respondidas.", file=sys.stderr)
+        else:
+            http = ThreadingHTTPServer((args.host, args.puerto), crear_manejador(servicio))
+            print(f"Servidor de counters en http://{args.host}:{args.puerto}", file=sys.stderr)
+            try:
+                http.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                http.server_close()
+    finally:
+        servicio.cerrar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Servidor HTTP local que hace de PokeAPI con respuestas grabadas (fixtures/pokeapi), para probar crear_pokemon.py sin
+conexión a internet y sin cargar la API real. Las respuestas son las de la PokeAPI recortadas a los campos que leen los
+scripts: fixtures/pokeapi/pokemon/<id>.json y fixtures/pokeapi/move/<nombre>.json. La lista paginada se arma a partir
+de los pokemons que haya, igual que la de la API (count, next, previous, results).
+
+Responde a:
+  GET /api/v2/pokemon?limit=100&offset=0   lista paginada (con --por-pagina se limita el tamaño de página)
+  GET /api/v2/pokemon/<id>/                detalles, con ETag (si coincide con If-None-Match responde 304)
+  GET /api/v2/move/<nombre>/               tipo, potencia y clase de daño del movimiento
+
+Con --fallos N cada ruta responde 503 las N primeras veces, para comprobar los reintentos.
+
+Uso: python servidor_fixtures.py [--puerto 8001] [--fallos 0] [--por-pagina 20]
+     python crear_pokemon.py --db prueba.db --api http://127.0.0.1:8001/api/v2
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pokeapi')
+PREFIJO = '/api/v2'
+
+class DatosFixtures:
+    """
+    Respuestas grabadas, ya leídas de disco, y el número de peticiones recibidas por ruta (las pruebas lo usan para
+    saber qué se ha descargado y cuántas veces).
+    """
+    def __init__(self, directorio=DIRECTORIO_FIXTURES, fallos=0, por_pagina=None):
+        self.pokemons = {}
+        for fichero in os.listdir(os.path.join(directorio, 'pokemon')):
+            with open(os.path.join(directorio, 'pokemon', fichero), encoding='utf-8') as entrada:
+                detalles = json.load(entrada)
+            self.pokemons[detalles['id']] = detalles
+        self.pokemons = dict(sorted(self.pokemons.items()))
+        self.movimientos = {}
+        for fichero in os.listdir(os.path.join(directorio, 'move')):
+            with open(os.path.join(directorio, 'move', fichero), encoding='utf-8') as entrada:
+                detalles = json.load(entrada)
+            self.movimientos[detalles['name']] = detalles
+        self.fallos = fallos
+        self.por_pagina = por_pagina
+        self.peticiones = Counter()
+        self._cerrojo = threading.Lock()
+
+    # Apunta una petición y devuelve cuántas van a esa ruta (los hilos del servidor atienden a la vez)
+    def registrar(self, ruta):
+        with self._cerrojo:
+            self.peticiones[ruta] += 1
+            return self.peticiones[ruta]
+
+    # Página de la lista de pokemons, con las url de los detalles apuntando a este servidor
+    def pagina(self, base, limite, desplazamiento):
+        if self.por_pagina:
+            limite = min(limite, self.por_pagina)
+        ids = list(self.pokemons)
+        siguiente = desplazamiento + limite
+        return {
+            'count': len(ids),
+            'next': f"{base}/pokemon?offset={siguiente}&limit={limite}" if siguiente < len(ids) else None,
+            'previous': f"{base}/pokemon?offset={max(desplazamiento - limite, 0)}&limit={limite}" if desplazamiento else None,
+            'results': [{'name': self.pokemons[i]['name'], 'url': f"{base}/pokemon/{i}/"}
+                        for i in ids[desplazamiento:siguiente]],
+        }
+
+# Crea la clase del manejador HTTP con las respuestas ya cargadas
+def crear_manejador(datos):
+    class ManejadorFixtures(BaseHTTPRequestHandler):
+        def _responder(self, codigo, contenido=None, etag=None):
+            cuerpo = json.dumps(contenido).encode() if contenido is not None else b''
+            self.send_response(codigo)
+            if etag:
+                self.send_header('ETag', etag)
+            if contenido is not None:
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if datos.registrar(self.path) <= datos.fallos:
+                self._responder(503, {'detail': 'Service Unavailable'})
+                return
+            partes = url.path[len(PREFIJO):].strip('/').split('/') if url.path.startswith(PREFIJO) else []
+            base = f"http://{self.headers['Host']}{PREFIJO}"
+            if partes == ['pokemon']:
+                parametros = parse_qs(url.query)
+                try:
+                    limite = int(parametros.get('limit', ['20'])[0])
+                    desplazamiento = int(parametros.get('offset', ['0'])[0])
+                except ValueError:
+                    self._responder(400, {'detail': 'limit y offset tienen que ser números'})
+                    return
+                self._responder(200, datos.pagina(base, limite, desplazamiento))
+            elif len(partes) == 2 and partes[0] == 'pokemon' and partes[1].isdigit() and int(partes[1]) in datos.pokemons:
+                detalles = datos.pokemons[int(partes[1])]
+                etag = '"' + hashlib.sha1(json.dumps(detalles, sort_keys=True).encode()).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self._responder(304, etag=etag)
+                else:
+                    self._responder(200, detalles, etag)
+            elif len(partes) == 2 and partes[0] == 'move' and partes[1] in datos.movimientos:
+                self._responder(200, datos.movimientos[partes[1]])
+            else:
+                self._responder(404, {'detail': 'Not found.'})
+
+        # Sin log por petición, como servicio_counters.py
+        def log_message(self, formato, *args):
+            pass
+
+    return ManejadorFixtures
+
+# Arranca el servidor en un hilo aparte (puerto 0: el que esté libre). Devuelve (servidor, url base de la API);
+# se para con servidor.shutdown() y servidor.server_close()
+def iniciar_servidor(datos, host='127.0.0.1', puerto=0):
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(datos))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}{PREFIJO}"
+
+def main():
+    parser = argparse.ArgumentParser(description="PokeAPI local con respuestas grabadas para probar crear_pokemon.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8001)
+    parser.add_argument("--fixtures", default=DIRECTORIO_FIXTURES, help="directorio con las respuestas grabadas")
+    parser.add_argument("--fallos", type=int, default=0, help="cada ruta responde 503 las primeras N veces")
+    parser.add_argument("--por-pagina", type=int, help="tamaño máximo de las páginas de la lista")
+    args = parser.parse_args()
+
+    datos = DatosFixtures(args.fixtures, args.fallos, args.por_pagina)
+    http = ThreadingHTTPServer((args.host, args.puerto), crear_manejador(datos))
+    print(f"PokeAPI de pruebas ({len(datos.pokemons)} pokemons, {len(datos.movimientos)} movimientos) en "
+          f"http://{args.host}:{args.puerto}{PREFIJO}", file=sys.stderr)
+    try:
+        http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Simulación de Monte Carlo para medir cómo de buena es cada estrategia de counter_equipo_random.py en conjunto, no en
+un solo equipo. Se generan muchos equipos rivales al azar (6 pokemons distintos, como generar_equipo_random), para
+cada uno se elige el equipo counter con la estrategia indicada y se enfrentan. Con --juez ventaja (por defecto):
+
+    ventaja del equipo = suma, para cada rival, de la mejor ponderación de algún miembro contra él
+    ventaja del rival  = lo mismo pero al revés
+    gana quien tenga más ventaja (puede haber empate)
+
+Con --juez combate cada enfrentamiento es un combate 6 contra 6 de simulador_combate.py (estadísticas a nivel 50, el
+mejor movimiento de cada tipo, STAB y tipos). Las estrategias que eligen clases cogen de cada clase los miembros con
+mejores estadísticas que no sean rivales, como optimizador_equipo.elegir_miembros, y todos los combates de un bloque
+se resuelven a la vez con numpy.
+
+Estrategias: 'aleatoria' (la de encontrar_equipo_fuerte: 6 al azar entre los que tienen algún tipo de obtener_tipos_fuertes),
+'voraz' (la construcción voraz de optimizador_equipo.py) y 'optima' (voraz + búsqueda local, sin reinicios).
+
+El trabajo se reparte en bloques entre procesos (ProcessPoolExecutor). Las tablas grandes (clase de cada pokemon,
+ponderaciones entre clases y, con el juez combate, las estadísticas, los tipos y la potencia de los movimientos de
+cada pokemon y los miembros de cada clase ordenados por estadísticas) se ponen una sola vez en memoria compartida y
+los procesos las leen de ahí, sin volver a consultar SQLite. Cada bloque tiene su propia semilla (derivada de
+--semilla), así que el resultado no depende del número de procesos.
+
+Uso: python simulacion_montecarlo.py [--equipos 1000000] [--procesos 8] [--estrategia voraz] [--juez combate]
+                                     [--salida resultado.json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cache_counters import cargar_indice
+from matriz_efectividad import ID_TIPO
+from optimizador_equipo import TAMANO_EQUIPO, busqueda_local, equipo_voraz
+from ranking_counters import cargar_estadisticas
+from simulador_combate import cargar_datos_combate, simular_combates
+from tabla_tipos import PONDERACIONES, efec
+
+# Histograma de la diferencia de ventaja (equipo - rival) en pasos de 1. Cada rival aporta como mucho la ponderación
+# máxima (16), así que el margen va de -96 a 96
+MARGEN_MAXIMO = TAMANO_EQUIPO * int(max(PONDERACIONES))
+BORDES_MARGEN = np.arange(-MARGEN_MAXIMO - 0.5, MARGEN_MAXIMO + 1.5, 1.0)
+# Con el juez combate, histograma de la fracción de PS que le queda al equipo counter (0 si pierde), de 10 en 10 %
+BORDES_PS = np.linspace(0, 1, 11)
+
+# Copia un array a un bloque de memoria compartida; devuelve el bloque y lo necesario para abrirlo desde otro proceso
+def compartir_array(array):
+    bloque = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=bloque.buf)[...] = array
+    return bloque, (bloque.name, array.shape, array.dtype.str)
+
+# Datos que cada proceso abre una sola vez al arrancar (se guardan en este diccionario global del proceso)
+_datos = {}
+
+def _iniciar_proceso(descripciones, extras):
+    for nombre, (nombre_bloque, forma, tipo) in descripciones.items():
+        bloque = shared_memory.SharedMemory(name=nombre_bloque)
+        _datos[nombre + '_bloque'] = bloque  # hay que mantener el bloque abierto mientras se use el array
+        _datos[nombre] = np.ndarray(forma, dtype=np.dtype(tipo), buffer=bloque.buf)
+    _datos.update(extras)
+
+# Máscaras de tipos para la estrategia aleatoria: qué tipos tiene cada clase y contra qué tipos es fuerte cada tipo
+def mascaras_tipos(indice):
+    tipos_clase = np.zeros(len(indice['clases']), dtype=np.uint32)
+    for c, clase in enumerate(indice['clases']):
+        for tipo in clase:
+            if tipo in ID_TIPO:
+                tipos_clase[c] |= 1 << ID_TIPO[tipo]
+    fuerte_contra = np.zeros(len(ID_TIPO), dtype=np.uint32)
+    for tipo, fila in efec.items():
+        for otro in fila['fuerte']:
+            fuerte_contra[ID_TIPO[tipo]] |= 1 << ID_TIPO[otro]
+    return tipos_clase, fuerte_contra
+
+# Miembros de cada clase ordenados como en optimizador_equipo.elegir_miembros (mejores estadísticas primero y, si
+# coinciden, el primero en el orden de carga), todos en un array con el inicio de cada clase para poder compartirlos
+def ordenar_miembros(indice, estadisticas):
+    orden = []
+    inicios = [0]
+    for miembros in indice['miembros']:
+        orden.extend(sorted(miembros, key=lambda i: (estadisticas[i], -i), reverse=True))
+        inicios.append(len(orden))
+    return np.array(orden, dtype=np.int32), np.array(inicios, dtype=np.int32)
+
+# Pokemons de un equipo dado por clases: de cada clase, sus mejores miembros que no sean rivales
+def _miembros_equipo(clases, rivales):
+    orden = _datos['miembros_ordenados']
+    inicios = _datos['inicio_clase']
+    equipo = []
+    for clase, cuantos in zip(*np.unique(clases, return_counts=True)):
+        miembros = orden[inicios[clase]:inicios[clase + 1]]
+        equipo.extend(miembros[~np.isin(miembros, rivales)][:cuantos])
+    return np.array(equipo, dtype=np.intp)
+
+# Equipo con la estrategia de encontrar_equipo_fuerte, devuelto como índices de pokemons
+def _equipo_aleatorio(rivales, generador):
+    clase_de = _datos['clase_de']
+    tipos_rivales = np.bitwise_or.reduce(_datos['tipos_clase'][clase_de[rivales]])
+    favorables = np.uint32(0)
+    for t in range(len(_datos['fuerte_contra'])):
+        if tipos_rivales >> t & 1:
+            favorables |= _datos['fuerte_contra'][t]
+    favorables &= ~tipos_rivales  # obtener_tipos_fuertes quita los tipos que ya tiene el rival
+    candidatos = np.flatnonzero(_datos['tipos_clase'][clase_de] & favorables)
+    if len(candidatos) == 0:
+        return candidatos
+    return generador.choice(candidatos, min(TAMANO_EQUIPO, len(candidatos)), replace=False)
+
+# Equipo con el optimizador (voraz, o voraz + búsqueda local), devuelto como clases
+def _equipo_optimizado(rivales, rng, mejorar):
+    pesos = _datos['pesos']
+    clases_rivales = _datos['clase_de'][rivales]
+    ataque = pesos[:, clases_rivales]
+    debilidad = pesos[clases_rivales, :].max(axis=0)
+    disponibles = _datos['tamanos'] - np.bincount(clases_rivales, minlength=len(pesos))
+    equipo = equipo_voraz(ataque, debilidad, disponibles, rng, TAMANO_EQUIPO)
+    if mejorar:
+        equipo, _ = busqueda_local(equipo, ataque, debilidad, disponibles)
+    return np.array(equipo, dtype=np.intp)
+
+# Resuelve con simulador_combate.py los combates acumulados de un bloque ({tamaño del equipo: (equipos, rivales)}).
+# Devuelve (victorias, empates, histograma de los PS que le quedan al equipo counter)
+def _resolver_combates(combates):
+    victorias = empates = 0
+    histograma = np.zeros(len(BORDES_PS) - 1, dtype=np.int64)
+    for equipos, rivales in combates.values():
+        resultado, _, ps_restantes = simular_combates(_datos, np.array(equipos), np.array(rivales))
+        victorias += int(np.count_nonzero(resultado == 1))
+        empates += int(np.count_nonzero(resultado == 0))
+        histograma += np.histogram(ps_restantes, BORDES_PS)[0]
+    return victorias, empates, histograma
+
+# Simula un bloque de equipos y devuelve sus contadores (victorias, empates, equipos, histograma)
+def simular_bloque(semilla, cantidad, estrategia, juez='ventaja'):
+    generador = np.random.default_rng(semilla)
+    rng = random.Random(int(generador.integers(2 ** 63)))
+    pesos = _datos['pesos']
+    clase_de = _datos['clase_de']
+    total = len(clase_de)
+
+    victorias = empates = 0
+    margenes = np.zeros(len(BORDES_MARGEN) - 1, dtype=np.int64)
+    combates = {}
+    sin_equipo = 0
+    for _ in range(cantidad):
+        rivales = generador.choice(total, TAMANO_EQUIPO, replace=False)
+        if estrategia == 'aleatoria':
+            equipo = _equipo_aleatorio(rivales, generador)
+            clases_equipo = clase_de[equipo]
+        else:
+            clases_equipo = _equipo_optimizado(rivales, rng, estrategia == 'optima')
+            equipo = None
+
+        if juez == 'combate':
+            if equipo is None:
+                equipo = _miembros_equipo(clases_equipo, rivales)
+            if len(equipo):
+                equipos, rivales_combate = combates.setdefault(len(equipo), ([], []))
+                equipos.append(equipo)
+                rivales_combate.append(rivales)
+            else:
+                sin_equipo += 1  # Sin equipo se pierde
+            continue
+
+        clases_rivales = clase_de[rivales]
+        if len(clases_equipo):
+            ventaja = pesos[np.ix_(clases_equipo, clases_rivales)].max(axis=0).sum()
+            ventaja_rival = pesos[np.ix_(clases_rivales, clases_equipo)].max(axis=0).sum()
+        else:
+            ventaja, ventaja_rival = 0.0, 0.0  # Sin equipo se pierde
+        margen = float(ventaja - ventaja_rival)
+        if margen > 0:
+            victorias += 1
+        elif margen == 0 and len(clases_equipo):
+            empates += 1
+        margenes[int(np.floor(margen + MARGEN_MAXIMO + 0.5))] += 1
+
+    if juez == 'combate':
+        victorias, empates, histograma = _resolver_combates(combates)
+        histograma[0] += sin_equipo
+        return victorias, empates, cantidad, histograma
+    return victorias, empates, cantidad, margenes
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de Monte Carlo de las estrategias de equipo counter.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--equipos", type=int, default=100000, help="número de equipos rivales a simular")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos en paralelo")
+    parser.add_argument("--bloque", type=int, default=5000, help="equipos por tarea")
+    parser.add_argument("--estrategia", choices=("aleatoria", "voraz", "optima"), default="voraz")
+    parser.add_argument("--juez", choices=("ventaja", "combate"), default="ventaja",
+                        help="ventaja: suma de ponderaciones por tipos; combate: combate 6 contra 6 de simulador_combate.py")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="fichero JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    conexion = sqlite3.connect(args.db)
+    indice = cargar_indice(conexion)
+    tipos_clase, fuerte_contra = mascaras_tipos(indice)
+    compartidos = {
+        'clase_de': indice['clase_de'].astype(np.int32),
+        'pesos': np.ascontiguousarray(indice['pesos'], dtype=np.float32),
+    }
+    extras = {
+        'tamanos': np.array([len(m) for m in indice['miembros']]),
+        'tipos_clase': tipos_clase,
+        'fuerte_contra': fuerte_contra,
+    }
+    if args.juez == 'combate':
+        datos_combate = cargar_datos_combate(conexion.cursor(), indice)
+        miembros_ordenados, inicio_clase = ordenar_miembros(indice, cargar_estadisticas(conexion.cursor(), indice))
+        compartidos['estadisticas'] = datos_combate['estadisticas']
+        compartidos['tipos'] = np.ascontiguousarray(datos_combate['tipos'])
+        compartidos['potencia'] = datos_combate['potencia']
+        compartidos['miembros_ordenados'] = miembros_ordenados
+        extras['inicio_clase'] = inicio_clase
+    conexion.close()
+
+    bloques = {}
+    descripciones = {}
+    try:
+        for nombre, array in compartidos.items():
+            bloques[nombre], descripciones[nombre] = compartir_array(array)
+
+        # Tamaños de los bloques y una semilla independiente para cada uno
+        cantidades = [args.bloque] * (args.equipos // args.bloque)
+        if args.equipos % args.bloque:
+            cantidades.append(args.equipos % args.bloque)
+        semillas = np.random.SeedSequence(args.semilla).spawn(len(cantidades))
+
+        print(f"Simulando {args.equipos} equipos ({args.estrategia}) con {args.procesos} procesos...")
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(args.procesos, initializer=_iniciar_proceso,
+                                 initargs=(descripciones, extras)) as ejecutor:
+            resultados = list(ejecutor.map(simular_bloque, semillas, cantidades,
+                                           [args.estrategia] * len(cantidades), [args.juez] * len(cantidades)))
+        segundos = time.perf_counter() - inicio
+    finally:
+        for bloque in bloques.values():
+            bloque.close()
+            bloque.unlink()
+
+    victorias = sum(r[0] for r in resultados)
+    empates = sum(r[1] for r in resultados)
+    histograma = sum(r[3] for r in resultados)
+    tasas_bloque = np.array([r[0] / r[2] for r in resultados])
+    resumen = {
+        'estrategia': args.estrategia,
+        'juez': args.juez,
+        'equipos': args.equipos,
+        'procesos': args.procesos,
+        'segundos': round(segundos, 3),
+        'equipos_por_segundo': round(args.equipos / segundos, 1),
+        'victorias': victorias / args.equipos,
+        'empates': empates / args.equipos,
+        'derrotas': (args.equipos - victorias - empates) / args.equipos,
+        'victorias_por_bloque': {f"p{p}": float(np.percentile(tasas_bloque, p)) for p in (0, 5, 50, 95, 100)},
+    }
+    if args.juez == 'combate':
+        resumen['histograma_ps'] = {f"{borde:.0%}": int(n) for borde, n in zip(BORDES_PS, histograma) if n}
+    else:
+        resumen['histograma_margen'] = {int(borde + 0.5): int(n) for borde, n in zip(BORDES_MARGEN, histograma) if n}
+
+    print(f"{resumen['equipos_por_segundo']:.0f} equipos/s en {segundos:.1f} s")
+    print(f"Victorias {resumen['victorias']:.1%}, empates {resumen['empates']:.1%}, derrotas {resumen['derrotas']:.1%}")
+    print("Victorias por bloque: " + ", ".join(f"{k}={v:.1%}" for k, v in resumen['victorias_por_bloque'].items()))
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as fichero:
+            json.dump(resumen, fichero, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Simulador de combates por turnos a partir de las estadísticas base (pokemon_stats) y los tipos, para no depender solo
+de la ponderación por tipos de calcular_ponderacion. Las reglas son una versión simplificada de la fórmula de daño:
+
+  - todos los pokemons a nivel 50, sin IVs ni EVs: PS = base + 60, resto de estadísticas = base + 5
+  - cada pokemon tiene, para cada tipo de ataque, el movimiento de daño más potente que aprende de ese tipo (la tabla
+    moves, con indice_movimientos.py), y en cada turno usa el que más daño hace al defensor. STAB x1.5 si el tipo del
+    movimiento es uno de los suyos. Los movimientos de potencia variable (power NULL) no cuentan
+  - un pokemon sin ningún movimiento de daño conocido (base de datos sin completar_movimientos, o el snapshot, que no
+    guarda movimientos) ataca con un movimiento de potencia POTENCIA de cada uno de sus tipos
+  - se usa su mejor estadística de ataque (físico o especial) contra la defensa correspondiente, sea cual sea la clase
+    de daño del movimiento
+  - daño = ((2 * 50 / 5 + 2) * potencia * ataque / defensa / 50 + 2) * STAB * multiplicador de tipos
+  - cada turno ataca primero el más rápido (si empatan, el del primer equipo); si el primero debilita al otro, este
+    no llega a atacar. Al caer un pokemon entra el siguiente de su equipo
+  - si en MAX_TURNOS nadie gana (por ejemplo, los dos son inmunes al otro), es empate
+
+Los datos de los pokemons se guardan como arrays de numpy (una fila por pokemon) y los combates se resuelven muchos
+a la vez: en cada turno se calcula el daño de todos los combates activos con operaciones sobre arrays. Sirve tanto
+para 1 contra 1 como para 6 contra 6 (equipos de forma (combates, tamaño)).
+"""
+import numpy as np
+
+from indice_movimientos import construir_indice_movimientos
+from matriz_efectividad import MULTIPLICADORES, SIN_TIPO
+from tabla_tipos import TIPOS
+
+ESTADISTICAS = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+HP, ATAQUE, DEFENSA, ATAQUE_ESP, DEFENSA_ESP, VELOCIDAD = range(6)
+NIVEL = 50
+POTENCIA = 80
+STAB = 1.5
+MAX_TURNOS = 200
+
+# Carga los datos de combate de todos los pokemons del índice (mismo orden que indice['nombres'])
+def cargar_datos_combate(cursor, indice):
+    cursor.execute('''
+        SELECT p.name, s.name, ps.value
+        FROM pokemon_stats ps
+        JOIN stats s ON ps.stat_id = s.id
+        JOIN pokemon p ON ps.pokemon_id = p.id
+    ''')
+    columna = {stat: k for k, stat in enumerate(ESTADISTICAS)}
+    base = np.zeros((len(indice['nombres']), len(ESTADISTICAS)), dtype=np.int16)
+    for nombre, stat, valor in cursor.fetchall():
+        i = indice['indice'].get(nombre)
+        if i is not None and stat in columna:
+            base[i, columna[stat]] = valor
+    return preparar_datos_combate(indice, base, construir_indice_movimientos(cursor, indice)['potencia'])
+
+# Igual, a partir de las estadísticas base ya cargadas (array (pokemons, ESTADISTICAS) en el orden del índice) y, si
+# se tiene, de la potencia del mejor movimiento de cada pokemon para cada tipo (indice_movimientos.py, -1 si ninguno)
+def preparar_datos_combate(indice, base, potencia_movimientos=None):
+    # Estadísticas a nivel 50 (sin IVs ni EVs)
+    estadisticas = (2 * base.astype(np.int32) * NIVEL) // 100 + 5
+    estadisticas[:, HP] += NIVEL + 5
+    tipos = indice['codigos'][indice['clase_de']]  # (pokemons, tipos) con SIN_TIPO de relleno
+    return {
+        'nombres': indice['nombres'],
+        'indice': indice['indice'],
+        'tipos': tipos,
+        'estadisticas': estadisticas.astype(np.int16),
+        'potencia': potencia_por_tipo(tipos, potencia_movimientos),
+    }
+
+# Potencia del movimiento de cada pokemon para cada tipo (pokemons, TIPOS), 0 si no tiene ninguno de ese tipo. Los
+# pokemons sin ningún movimiento de daño con potencia usan POTENCIA en sus propios tipos
+def potencia_por_tipo(tipos, potencia_movimientos=None):
+    potencia = np.zeros((len(tipos), len(TIPOS)), dtype=np.float32)
+    if potencia_movimientos is not None:
+        potencia[:] = np.clip(potencia_movimientos, 0, None)
+    sin_movimientos = np.flatnonzero(~(potencia > 0).any(axis=1))
+    for k in range(tipos.shape[1]):
+        propios = sin_movimientos[tipos[sin_movimientos, k] != SIN_TIPO]
+        potencia[propios, tipos[propios, k]] = POTENCIA
+    return potencia
+
+# Núcleo vectorizado: daño que hace cada atacante a su defensor (arrays de índices de la misma longitud)
+def calcular_dano(datos, atacantes, defensores):
+    estadisticas = datos['estadisticas']
+    ataque = estadisticas[atacantes].astype(np.float32)
+    defensa = estadisticas[defensores].astype(np.float32)
+
+    # Cada atacante usa su mejor estadística de ataque contra la defensa que le corresponde
+    fisico = ataque[:, ATAQUE] >= ataque[:, ATAQUE_ESP]
+    potencia_ataque = np.where(fisico, ataque[:, ATAQUE], ataque[:, ATAQUE_ESP])
+    potencia_defensa = np.maximum(np.where(fisico, defensa[:, DEFENSA], defensa[:, DEFENSA_ESP]), 1)
+    factor = (2 * NIVEL / 5 + 2) * potencia_ataque / potencia_defensa / 50
+
+    # Multiplicador de cada tipo de ataque contra el defensor (el relleno SIN_TIPO multiplica por 1)
+    tipos_defensor = datos['tipos'][defensores]
+    multiplicador = np.ones((len(atacantes), len(TIPOS)), dtype=np.float32)
+    for d in range(tipos_defensor.shape[1]):
+        multiplicador *= MULTIPLICADORES[:len(TIPOS), tipos_defensor[:, d]].T
+
+    # STAB de los tipos del propio atacante
+    tipos_atacante = datos['tipos'][atacantes]
+    filas = np.arange(len(atacantes))
+    for a in range(tipos_atacante.shape[1]):
+        propios = tipos_atacante[:, a] != SIN_TIPO
+        multiplicador[filas[propios], tipos_atacante[propios, a]] *= STAB
+
+    # Daño del movimiento de cada tipo (0 si no lo tiene) y el mejor
+    potencia = datos['potencia'][atacantes]
+    dano = (factor[:, None] * potencia + 2) * multiplicador
+    dano[potencia == 0] = 0
+    return dano.max(axis=1)
+
+# Resuelve muchos combates a la vez; equipos_a y equipos_b son arrays (combates, tamaño) de índices de pokemons (los
+# dos lados pueden tener distinto tamaño). Devuelve (resultado, turnos, ps_restantes): resultado 1 si gana a, -1 si
+# gana b y 0 si empatan; ps_restantes es la fracción de PS que le queda al equipo a
+def simular_combates(datos, equipos_a, equipos_b, max_turnos=MAX_TURNOS):
+    equipos_a = np.atleast_2d(equipos_a)
+    equipos_b = np.atleast_2d(equipos_b)
+    combates, tamano_a = equipos_a.shape
+    tamano_b = equipos_b.shape[1]
+    ps_maximos = datos['estadisticas'][:, HP].astype(np.float32)
+    velocidad = datos['estadisticas'][:, VELOCIDAD]
+    ps_a = ps_maximos[equipos_a].copy()
+    ps_b = ps_maximos[equipos_b].copy()
+    actual_a = np.zeros(combates, dtype=np.intp)  # qué miembro de cada equipo está combatiendo
+    actual_b = np.zeros(combates, dtype=np.intp)
+    turnos = np.zeros(combates, dtype=np.int32)
+    filas = np.arange(combates)
+
+    for _ in range(max_turnos):
+        activos = filas[(actual_a < tamano_a) & (actual_b < tamano_b)]
+        if len(activos) == 0:
+            break
+        turnos[activos] += 1
+        a = equipos_a[activos, actual_a[activos]]
+        b = equipos_b[activos, actual_b[activos]]
+        dano_a = calcular_dano(datos, a, b)
+        dano_b = calcular_dano(datos, b, a)
+        a_primero = velocidad[a] >= velocidad[b]
+
+        # Primer golpe del más rápido
+        ps_b[activos, actual_b[activos]] -= np.where(a_primero, dano_a, 0)
+        ps_a[activos, actual_a[activos]] -= np.where(a_primero, 0, dano_b)
+        # Segundo golpe, solo si el que lo da sigue en pie
+        vivo_a = ps_a[activos, actual_a[activos]] > 0
+        vivo_b = ps_b[activos, actual_b[activos]] > 0
+        ps_b[activos, actual_b[activos]] -= np.where(~a_primero & vivo_a & vivo_b, dano_a, 0)
+        ps_a[activos, actual_a[activos]] -= np.where(a_primero & vivo_a & vivo_b, dano_b, 0)
+
+        # Entra el siguiente de cada equipo que haya perdido a su pokemon
+        actual_a[activos] += ps_a[activos, actual_a[activos]] <= 0
+        actual_b[activos] += ps_b[activos, actual_b[activos]] <= 0
+
+    resultado = np.zeros(combates, dtype=np.int8)
+    resultado[(actual_b >= tamano_b) & (actual_a < tamano_a)] = 1
+    resultado[(actual_a >= tamano_a) & (actual_b < tamano_b)] = -1
+    ps_restantes = np.clip(ps_a, 0, None).sum(axis=1) / ps_maximos[equipos_a].sum(axis=1)
+    return resultado, turnos, ps_restantes
+
+# Combate 6 contra 6 (o de cualquier tamaño) entre dos equipos dados por nombres (lo usa counter_equipo_random.py)
+def combate_equipos(datos, nombres_a, nombres_b):
+    equipo_a = np.array([[datos['indice'][nombre] for nombre in nombres_a]])
+    equipo_b = np.array([[datos['indice'][nombre] for nombre in nombres_b]])
+    resultado, turnos, ps_restantes = simular_combates(datos, equipo_a, equipo_b)
+    return int(resultado[0]), int(turnos[0]), float(ps_restantes[0])
+
+# Ranking de counters por combate: enfrenta a todo el roster 1 contra 1 con el pokemon y ordena por
+# (gana, PS que le quedan, menos turnos). Devuelve [(nombre, resultado, ps_restantes), ...] o un mensaje de error
+def rankear_por_combate(pokemon, datos, k=5):
+    j = datos['indice'].get(pokemon)
+    if j is None:
+        return f"El Pokémon '{pokemon}' no está en la base de datos."
+    atacantes = np.array([i for i in range(len(datos['nombres'])) if i != j])
+    resultado, turnos, ps_restantes = simular_combates(datos, atacantes[:, None], np.full((len(atacantes), 1), j))
+
+    # lexsort ordena por la última clave primero; el orden de carga deshace los empates que queden
+    orden = np.lexsort((atacantes, turnos, -ps_restantes, -resultado))[:k]
+    return [(datos['nombres'][atacantes[i]], int(resultado[i]), float(ps_restantes[i])) for i in orden]
@@ -0,0 +1,331 @@
+"""
+Exporta los datos que usan las herramientas de consulta a un fichero binario (snapshot) que se abre con numpy.memmap,
+sin SQLite y sin construir diccionarios ni listas de cadenas al arrancar. Todo se lee directamente del fichero
+(el sistema operativo solo carga en memoria las páginas que se usan), así que arrancar lleva milisegundos.
+
+Formato (little-endian, versión VERSION):
+  - cabecera: MAGIA, versión, número de pokemons y número de secciones
+  - tabla de secciones: nombre, tipo de numpy, desplazamiento en el fichero, filas y columnas
+  - secciones (alineadas a 8 bytes):
+      nombres_datos / nombres_pos     tabla de nombres: los nombres en UTF-8 seguidos y dónde empieza cada uno
+      nombres_orden                   los pokemons ordenados por nombre, para buscar un nombre con búsqueda binaria
+      tipos                           uint8 (pokemons, tipos): índice de cada tipo en matriz_efectividad.TIPOS
+      estadisticas                    int16 (pokemons, 6): estadísticas base en el orden de simulador_combate.ESTADISTICAS
+      movimientos_pos / movimientos   listas de movimientos en formato CSR (los de i van de pos[i] a pos[i + 1])
+      movs_datos / movs_pos           tabla de nombres de los movimientos
+      habilidades_pos / habilidades   listas de habilidades en formato CSR
+      habs_datos / habs_pos           tabla de nombres de las habilidades
+      huella_db                       uint8 (32,): huella de la base de datos de la que se exportó (ver huella_db)
+
+Los pokemons van en el mismo orden que el índice de cache_counters.py (el de CONSULTA_TIPOS), así que los motores dan
+los mismos resultados, empates incluidos. El snapshot no se actualiza solo: después de crear_pokemon.py --sincronizar
+hay que volver a exportarlo. Los scripts que lo abren comparan su huella con la de --db (avisar_si_caducado) y avisan
+si la base de datos ha cambiado.
+
+Uso: python snapshot_pokemon.py [--db pokemon.db] [--salida pokemon.snap]
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import struct
+import time
+
+import numpy as np
+
+from grafo_pokemon_counter import CONSULTA_TIPOS, agrupar_tipos
+from matriz_efectividad import SIN_TIPO, TIPOS, calcular_ponderaciones, codificar_tipos
+from simulador_combate import ESTADISTICAS
+
+MAGIA = b'PKMNSNAP'
+VERSION = 2
+CABECERA = struct.Struct('<8sHHII')          # magia, versión, reservado, pokemons, secciones
+SECCION = struct.Struct('<24s4sQQQ')         # nombre, tipo, desplazamiento, filas, columnas
+ALINEACION = 8
+
+# Tabla de cadenas internadas: (bytes seguidos, posiciones de inicio con una posición final de más)
+def tabla_cadenas(cadenas):
+    codificadas = [cadena.encode('utf-8') for cadena in cadenas]
+    posiciones = np.zeros(len(codificadas) + 1, dtype=np.uint32)
+    np.cumsum([len(c) for c in codificadas], out=posiciones[1:])
+    return np.frombuffer(b''.join(codificadas), dtype=np.uint8), posiciones
+
+# Listas en formato CSR: (posiciones, valores) a partir de una lista de listas
+def listas_csr(listas, tipo):
+    posiciones = np.zeros(len(listas) + 1, dtype=np.uint32)
+    np.cumsum([len(lista) for lista in listas], out=posiciones[1:])
+    valores = np.fromiter((v for lista in listas for v in lista), dtype=tipo, count=int(posiciones[-1]))
+    return posiciones, valores
+
+# Relación pokemon -> lista de ids (movimientos o habilidades) con sus nombres internados en índices 0..n-1
+def _relacion_csr(cursor, consulta, tabla_nombres, id_a_fila):
+    cursor.execute(f"SELECT id, name FROM {tabla_nombres} ORDER BY id")
+    filas_nombres = cursor.fetchall()
+    interno = {id_: k for k, (id_, _) in enumerate(filas_nombres)}
+    listas = [[] for _ in id_a_fila]
+    cursor.execute(consulta)
+    for pokemon_id, id_ in cursor.fetchall():
+        if pokemon_id in id_a_fila and id_ in interno:
+            listas[id_a_fila[pokemon_id]].append(interno[id_])
+    tipo = np.uint16 if len(filas_nombres) < 2 ** 16 else np.uint32
+    return listas_csr(listas, tipo), tabla_cadenas([nombre for _, nombre in filas_nombres])
+
+# Huella de la base de datos (sha256 como array de 32 bytes): los pokemons (id y nombre) y la huella del contenido de
+# cada uno que guarda crear_pokemon.py --sincronizar. Cambia al añadir, quitar, renombrar o sincronizar pokemons, pero
+# no al escribir la caché de cache_counters.py ni al ejecutar ANALYZE
+def huella_db(conexion):
+    huella = hashlib.sha256()
+    for fila in conexion.execute("SELECT id, name FROM pokemon ORDER BY id"):
+        huella.update(repr(fila).encode())
+    try:
+        for fila in conexion.execute("SELECT pokemon_id, huella FROM pokemon_sync ORDER BY pokemon_id"):
+            huella.update(repr(fila).encode())
+    except sqlite3.OperationalError:
+        pass  # Base de datos anterior a la sincronización incremental
+    return np.frombuffer(huella.digest(), dtype=np.uint8)
+
+# Lee pokemon.db y devuelve las secciones del snapshot (nombre -> array)
+def leer_secciones(conexion):
+    cursor = conexion.cursor()
+    cursor.execute(CONSULTA_TIPOS)
+    datos = cursor.fetchall()
+    tipos_por_pokemon = agrupar_tipos(datos)
+    nombres = list(tipos_por_pokemon)
+    fila_de = {nombre: i for i, nombre in enumerate(nombres)}
+    id_a_fila = {}
+    for pokemon_id, nombre, _ in datos:
+        id_a_fila.setdefault(pokemon_id, fila_de[nombre])
+
+    nombres_datos, nombres_pos = tabla_cadenas(nombres)
+    orden = sorted(range(len(nombres)), key=lambda i: nombres[i].encode('utf-8'))
+
+    estadisticas = np.zeros((len(nombres), len(ESTADISTICAS)), dtype=np.int16)
+    columna = {stat: k for k, stat in enumerate(ESTADISTICAS)}
+    cursor.execute("SELECT ps.pokemon_id, s.name, ps.value FROM pokemon_stats ps JOIN stats s ON ps.stat_id = s.id")
+    for pokemon_id, stat, valor in cursor.fetchall():
+        if pokemon_id in id_a_fila and stat in columna:
+            estadisticas[id_a_fila[pokemon_id], columna[stat]] = valor
+
+    (movimientos_pos, movimientos), (movs_datos, movs_pos) = _relacion_csr(
+        cursor, "SELECT DISTINCT pokemon_id, move_id FROM pokemon_moves ORDER BY pokemon_id, move_id",
+        'moves', id_a_fila)
+    (habilidades_pos, habilidades), (habs_datos, habs_pos) = _relacion_csr(
+        cursor, "SELECT pokemon_id, ability_id FROM pokemon_abilities ORDER BY pokemon_id, ability_id",
+        'abilities', id_a_fila)
+
+    return {
+        'nombres_datos': nombres_datos,
+        'nombres_pos': nombres_pos,
+        'nombres_orden': np.array(orden, dtype=np.uint32),
+        'tipos': codificar_tipos(list(tipos_por_pokemon.values())).astype(np.uint8),
+        'estadisticas': estadisticas,
+        'movimientos_pos': movimientos_pos,
+        'movimientos': movimientos,
+        'movs_datos': movs_datos,
+        'movs_pos': movs_pos,
+        'habilidades_pos': habilidades_pos,
+        'habilidades': habilidades,
+        'habs_datos': habs_datos,
+        'habs_pos': habs_pos,
+        'huella_db': huella_db(conexion),
+    }
+
+# Escribe las secciones en el fichero (primero en uno temporal, para no dejar nunca un snapshot a medias)
+def escribir_snapshot(ruta, secciones):
+    pokemons = len(secciones['nombres_orden'])
+    desplazamiento = CABECERA.size + SECCION.size * len(secciones)
+    tabla = []
+    for nombre, array in secciones.items():
+        desplazamiento += -desplazamiento % ALINEACION
+        filas = array.shape[0]
+        columnas = array.shape[1] if array.ndim > 1 else 0
+        tabla.append(SECCION.pack(nombre.encode(), array.dtype.str.encode(), desplazamiento, filas, columnas))
+        desplazamiento += array.nbytes
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as fichero:
+        fichero.write(CABECERA.pack(MAGIA, VERSION, 0, pokemons, len(secciones)))
+        fichero.write(b''.join(tabla))
+        for array in secciones.values():
+            fichero.write(b'\0' * (-fichero.tell() % ALINEACION))
+            fichero.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temporal, ruta)
+
+# Exporta pokemon.db a un snapshot; devuelve el tamaño del fichero
+def exportar_snapshot(conexion, ruta):
+    escribir_snapshot(ruta, leer_secciones(conexion))
+    return os.path.getsize(ruta)
+
+# Abre un snapshot: devuelve un diccionario sección -> array de numpy que apunta al fichero (sin copiar nada)
+def abrir_snapshot(ruta):
+    mapa = np.memmap(ruta, dtype=np.uint8, mode='r')
+    magia, version, _, pokemons, n_secciones = CABECERA.unpack_from(mapa, 0)
+    if magia != MAGIA:
+        raise ValueError(f"'{ruta}' no es un snapshot de pokemons")
+    if version != VERSION:
+        raise ValueError(f"'{ruta}' tiene la versión {version} del formato y se esperaba la {VERSION}: vuelve a exportarlo")
+
+    snapshot = {'pokemons': pokemons}
+    for k in range(n_secciones):
+        nombre, tipo, desplazamiento, filas, columnas = SECCION.unpack_from(mapa, CABECERA.size + k * SECCION.size)
+        forma = (filas, columnas) if columnas else (filas,)
+        snapshot[nombre.rstrip(b'\0').decode()] = np.ndarray(forma, dtype=np.dtype(tipo.rstrip(b'\0').decode()),
+                                                             buffer=mapa, offset=desplazamiento)
+    return snapshot
+
+# Comprueba si el snapshot se exportó de la base de datos de ruta_db tal como está ahora. Devuelve None si no se puede
+# comprobar (no existe la base de datos), True si coincide y False si ha cambiado
+def comprobar_vigencia(snapshot, ruta_db):
+    if not os.path.exists(ruta_db):
+        return None
+    conexion = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    try:
+        return huella_db(conexion).tobytes() == snapshot['huella_db'].tobytes()
+    finally:
+        conexion.close()
+
+# Avisa si la base de datos ha cambiado desde que se exportó el snapshot (el snapshot se sigue usando)
+def avisar_si_caducado(snapshot, ruta_snapshot, ruta_db):
+    if comprobar_vigencia(snapshot, ruta_db) is False:
+        print(f"Aviso: {ruta_db} ha cambiado desde que se exportó {ruta_snapshot}; los resultados pueden estar "
+              f"desactualizados (vuelve a exportarlo con 'python snapshot_pokemon.py --db {ruta_db} "
+              f"--salida {ruta_snapshot}')")
+
+# Decodifica la cadena k de una tabla de cadenas
+def _cadena(datos, posiciones, k):
+    return datos[posiciones[k]:posiciones[k + 1]].tobytes().decode('utf-8')
+
+class NombresSnapshot:
+    """Lista de solo lectura con los nombres de los pokemons: cada nombre se decodifica al pedirlo."""
+    def __init__(self, snapshot):
+        self.datos = snapshot['nombres_datos']
+        self.posiciones = snapshot['nombres_pos']
+
+    def __len__(self):
+        return len(self.posiciones) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return _cadena(self.datos, self.posiciones, int(i) % len(self))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class IndiceNombresSnapshot:
+    """Diccionario de solo lectura nombre -> posición, con búsqueda binaria sobre nombres_orden."""
+    def __init__(self, snapshot):
+        self.nombres = NombresSnapshot(snapshot)
+        self.orden = snapshot['nombres_orden']
+
+    # Nombre (en bytes) del pokemon que ocupa la posición k en orden alfabético
+    def _clave(self, k):
+        i = self.orden[k]
+        return self.nombres.datos[self.nombres.posiciones[i]:self.nombres.posiciones[i + 1]].tobytes()
+
+    def get(self, nombre, defecto=None):
+        clave = nombre.encode('utf-8')
+        inicio, fin = 0, len(self.orden)
+        while inicio < fin:
+            medio = (inicio + fin) // 2
+            if self._clave(medio) < clave:
+                inicio = medio + 1
+            else:
+                fin = medio
+        if inicio < len(self.orden) and self._clave(inicio) == clave:
+            return int(self.orden[inicio])
+        return defecto
+
+    def __getitem__(self, nombre):
+        i = self.get(nombre)
+        if i is None:
+            raise KeyError(nombre)
+        return i
+
+    def __contains__(self, nombre):
+        return self.get(nombre) is not None
+
+    def __len__(self):
+        return len(self.orden)
+
+    def __iter__(self):
+        return iter(self.nombres)
+
+    def items(self):
+        return ((nombre, i) for i, nombre in enumerate(self.nombres))
+
+# Índice por clases (el mismo diccionario que clases_tipos.construir_indice_clases) a partir del snapshot.
+# Solo se calcula lo que depende de las ~170 combinaciones de tipos; lo demás son vistas del fichero.
+def indice_desde_snapshot(snapshot):
+    tipos = snapshot['tipos']
+    # Clave de cada pokemon: sus códigos ordenados (como las tuplas ordenadas de construir_indice_clases)
+    claves = np.sort(tipos, axis=1)
+    unicas, primera, clase_de = np.unique(claves, axis=0, return_index=True, return_inverse=True)
+    # Las clases se numeran por orden de aparición, igual que al construir el índice desde la base de datos
+    orden = np.argsort(primera, kind='stable')
+    renumerar = np.empty_like(orden)
+    renumerar[orden] = np.arange(len(orden))
+    clase_de = renumerar[clase_de.reshape(-1)].astype(np.intp)
+    codigos = unicas[orden].astype(np.intp)
+
+    clases = [tuple(sorted(TIPOS[t] for t in fila if t != SIN_TIPO)) for fila in codigos]
+    miembros = [[] for _ in clases]
+    for i, clase in enumerate(clase_de.tolist()):
+        miembros[clase].append(i)
+
+    indice = IndiceNombresSnapshot(snapshot)
+    return {
+        'nombres': indice.nombres,
+        'indice': indice,
+        'clases': clases,
+        'id_clase': {clase: c for c, clase in enumerate(clases)},
+        'clase_de': clase_de,
+        'miembros': miembros,
+        'primero': np.array([m[0] for m in miembros], dtype=np.intp),
+        'segundo': np.array([m[1] if len(m) > 1 else -1 for m in miembros], dtype=np.intp),
+        'codigos': codigos,
+        'pesos': calcular_ponderaciones(codigos, codigos),
+    }
+
+# Estadísticas para desempatar como ranking_counters.cargar_estadisticas: (ataque relevante, velocidad, total)
+def estadisticas_desde_snapshot(snapshot):
+    base = snapshot['estadisticas'].astype(np.int32)
+    columna = {stat: k for k, stat in enumerate(ESTADISTICAS)}
+    ataque = np.maximum(base[:, columna['attack']], base[:, columna['special-attack']])
+    return list(zip(ataque.tolist(), base[:, columna['speed']].tolist(), base.sum(axis=1).tolist()))
+
+# Información de un pokemon con la misma forma que counter_equipo_random.obtener_informacion_equipo:
+# una habilidad y hasta 4 movimientos distintos al azar (generador es un random.Random)
+def informacion_pokemon(snapshot, i, generador):
+    nombres = NombresSnapshot(snapshot)
+    movimientos = snapshot['movimientos'][snapshot['movimientos_pos'][i]:snapshot['movimientos_pos'][i + 1]]
+    habilidades = snapshot['habilidades'][snapshot['habilidades_pos'][i]:snapshot['habilidades_pos'][i + 1]]
+    elegidos = generador.sample(movimientos.tolist(), min(4, len(movimientos)))
+    return {
+        'name': nombres[i],
+        'types': [TIPOS[t] for t in snapshot['tipos'][i] if t != SIN_TIPO],
+        'ability': (_cadena(snapshot['habs_datos'], snapshot['habs_pos'], generador.choice(habilidades.tolist()))
+                    if len(habilidades) else None),
+        'moves': [_cadena(snapshot['movs_datos'], snapshot['movs_pos'], m) for m in elegidos],
+        'stats': {stat: int(valor) for stat, valor in zip(ESTADISTICAS, snapshot['estadisticas'][i])},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta pokemon.db a un snapshot binario para arrancar más rápido.")
+    parser.add_argument("--db", default="pokemon.db", help="ruta de la base de datos")
+    parser.add_argument("--salida", default="pokemon.snap", help="fichero del snapshot")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    conexion = sqlite3.connect(args.db)
+    tamano = exportar_snapshot(conexion, args.salida)
+    conexion.close()
+    print(f"Snapshot guardado en {args.salida} ({tamano / 1024:.0f} KB) en {time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    indice = indice_desde_snapshot(abrir_snapshot(args.salida))
+    print(f"{len(indice['nombres'])} pokemons y {len(indice['clases'])} combinaciones de tipos; "
+          f"se carga en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Tabla de efectividades entre tipos compartida por todos los scripts. Antes estaba copiada en grafo_pokemon_counter.py y
+en counter_equipo_random.py, y cada consulta recorría sus listas con 'in' (hasta tres por pareja de tipos).
+
+Al importar el módulo la tabla se comprueba (comprobar_tabla lanza ValueError si un tipo no existe o aparece en dos
+categorías del mismo atacante) y se compila una sola vez:
+  - ids enteros de los tipos (TIPOS, ID_TIPO) y SIN_TIPO como relleno que multiplica por 1
+  - MULTIPLICADORES: lista plana de ANCHO x ANCHO con el multiplicador de cada tipo atacante contra cada defensor
+  - COMBINACIONES: todas las combinaciones de hasta dos tipos, y PONDERACIONES con la ponderación de cada combinación
+    atacante contra cada combinación defensora (la misma que calcular_ponderacion)
+
+Así multiplicador() y ponderacion_combinaciones() son un acceso a una lista, sin bucles.
+"""
+from itertools import combinations_with_replacement
+
+# Efectividades entre tipos: contra qué tipos es fuerte, débil o no tiene efecto cada tipo atacante
+efec = {
+    'normal': {'fuerte': [], 'debil': ['rock', 'steel'], 'inmune': ['ghost']},
+    'fire': {'fuerte': ['grass', 'ice', 'bug', 'steel'], 'debil': ['fire', 'water', 'rock', 'dragon'], 'inmune': []},
+    'water': {'fuerte': ['fire', 'ground', 'rock'], 'debil': ['water', 'grass', 'dragon'], 'inmune': []},
+    'electric': {'fuerte': ['water', 'flying'], 'debil': ['electric', 'grass', 'dragon'], 'inmune': ['ground']},
+    'grass': {'fuerte': ['water', 'ground', 'rock'], 'debil': ['fire', 'grass', 'poison', 'flying', 'bug', 'dragon', 'steel'], 'inmune': []},
+    'ice': {'fuerte': ['grass', 'ground', 'flying', 'dragon'], 'debil': ['fire', 'water', 'ice', 'steel'], 'inmune': []},
+    'fighting': {'fuerte': ['normal', 'ice', 'rock', 'dark', 'steel'], 'debil': ['poison', 'flying', 'psychic', 'bug', 'fairy'], 'inmune': ['ghost']},
+    'poison': {'fuerte': ['grass', 'fairy'], 'debil': ['poison', 'ground', 'rock', 'ghost'], 'inmune': ['steel']},
+    'ground': {'fuerte': ['fire', 'electric', 'poison', 'rock', 'steel'], 'debil': ['grass', 'bug'], 'inmune': ['flying']},
+    'flying': {'fuerte': ['grass', 'fighting', 'bug'], 'debil': ['electric', 'rock', 'steel'], 'inmune': []},
+    'psychic': {'fuerte': ['fighting', 'poison'], 'debil': ['psychic', 'steel'], 'inmune': ['dark']},
+    'bug': {'fuerte': ['grass', 'psychic', 'dark'], 'debil': ['fire', 'fighting', 'poison', 'flying', 'ghost', 'steel', 'fairy'], 'inmune': []},
+    'rock': {'fuerte': ['fire', 'ice', 'flying', 'bug'], 'debil': ['fighting', 'ground', 'steel'], 'inmune': []},
+    'ghost': {'fuerte': ['ghost', 'psychic'], 'debil': ['dark'], 'inmune': ['normal']},
+    'dragon': {'fuerte': ['dragon'], 'debil': ['steel'], 'inmune': ['fairy']},
+    'dark': {'fuerte': ['psychic', 'ghost'], 'debil': ['fighting', 'dark', 'fairy'], 'inmune': []},
+    'steel': {'fuerte': ['ice', 'rock', 'fairy'], 'debil': ['fire', 'water', 'electric', 'steel'], 'inmune': ['poison']},
+    'fairy': {'fuerte': ['fighting', 'dragon', 'dark'], 'debil': ['fire', 'poison', 'steel'], 'inmune': []}
+}
+
+# Multiplicador de cada categoría
+VALORES = {'fuerte': 2.0, 'debil': 0.5, 'inmune': 0.0}
+
+# Comprueba que la tabla es coherente: las tres categorías en cada tipo, solo tipos conocidos, sin repetidos y
+# cada defensor en una sola categoría de cada atacante (si no, el resultado dependería del orden de comprobación)
+def comprobar_tabla(tabla):
+    for atacante, fila in tabla.items():
+        if set(fila) != set(VALORES):
+            raise ValueError(f"El tipo '{atacante}' debe tener exactamente las categorías {', '.join(VALORES)}")
+        vistos = {}
+        for categoria, defensores in fila.items():
+            for defensor in defensores:
+                if defensor not in tabla:
+                    raise ValueError(f"Tipo desconocido '{defensor}' en {atacante}['{categoria}']")
+                if defensor in vistos:
+                    raise ValueError(f"'{defensor}' aparece en {atacante}['{vistos[defensor]}'] y en "
+                                     f"{atacante}['{categoria}']")
+                vistos[defensor] = categoria
+
+comprobar_tabla(efec)
+
+TIPOS = tuple(efec)
+ID_TIPO = {tipo: i for i, tipo in enumerate(TIPOS)}
+# Índice de relleno para los pokemons con un solo tipo (o tipos que no están en efec): multiplica por 1 contra todo
+SIN_TIPO = len(TIPOS)
+ANCHO = len(TIPOS) + 1
+
+# Compila la tabla en una lista plana: el multiplicador de atacante contra defensor está en atacante * ANCHO + defensor
+def compilar_multiplicadores(tabla):
+    multiplicadores = [1.0] * (ANCHO * ANCHO)
+    for atacante, fila in tabla.items():
+        for categoria, defensores in fila.items():
+            for defensor in defensores:
+                multiplicadores[ID_TIPO[atacante] * ANCHO + ID_TIPO[defensor]] = VALORES[categoria]
+    return multiplicadores
+
+MULTIPLICADORES = compilar_multiplicadores(efec)
+
+# Tipos contra los que es fuerte cada tipo (lo que usa obtener_tipos_fuertes)
+FUERTE_CONTRA = {tipo: frozenset(fila['fuerte']) for tipo, fila in efec.items()}
+
+# Multiplicador de un tipo atacante contra un tipo defensor
+def multiplicador(atacante, defensor):
+    return MULTIPLICADORES[ID_TIPO.get(atacante, SIN_TIPO) * ANCHO + ID_TIPO.get(defensor, SIN_TIPO)]
+
+# Todas las combinaciones de hasta dos tipos como tuplas ordenadas de ids (la vacía es la de los tipos desconocidos)
+COMBINACIONES = [()] + [(t,) for t in range(len(TIPOS))] + list(combinations_with_replacement(range(len(TIPOS)), 2))
+ID_COMBINACION = {combinacion: i for i, combinacion in enumerate(COMBINACIONES)}
+NUM_COMBINACIONES = len(COMBINACIONES)
+
+# Ponderación de una combinación de ids contra otra: producto de los multiplicadores de cada pareja de tipos
+def _ponderar_ids(ids_atacante, ids_defensor):
+    ponderacion = 1.0
+    for atacante in ids_atacante:
+        for defensor in ids_defensor:
+            ponderacion *= MULTIPLICADORES[atacante * ANCHO + defensor]
+    return ponderacion
+
+# Lista plana: la ponderación de la combinación a contra la combinación d está en a * NUM_COMBINACIONES + d
+PONDERACIONES = [_ponderar_ids(atacante, defensor) for atacante in COMBINACIONES for defensor in COMBINACIONES]
+
+# Código de la combinación de cada tupla de nombres de tipos ya vista (en el orden en que vienen de la base de datos)
+_codigos = {}
+# Marca de "aún no calculado" para _codigos: ni 0 (un código válido) ni None (más de dos tipos) sirven
+_SIN_CALCULAR = object()
+
+# Código de la combinación de una lista de nombres de tipos (None si tiene más de dos tipos conocidos)
+def codigo_combinacion(tipos):
+    clave = tuple(tipos)
+    if clave not in _codigos:
+        _codigos[clave] = ID_COMBINACION.get(tuple(sorted(ID_TIPO[tipo] for tipo in clave if tipo in ID_TIPO)))
+    return _codigos[clave]
+
+# Ponderación entre dos códigos de combinación
+def ponderacion_combinaciones(atacante, defensor):
+    return PONDERACIONES[atacante * NUM_COMBINACIONES + defensor]
+
+# Ponderación entre dos listas de nombres de tipos (por la tabla de combinaciones si tienen hasta dos tipos)
+def ponderacion(tipos_atacante, tipos_defensor):
+    atacante = _codigos.get(tuple(tipos_atacante), _SIN_CALCULAR)
+    if atacante is _SIN_CALCULAR:
+        atacante = codigo_combinacion(tipos_atacante)
+    defensor = _codigos.get(tuple(tipos_defensor), _SIN_CALCULAR)
+    if defensor is _SIN_CALCULAR:
+        defensor = codigo_combinacion(tipos_defensor)
+    if atacante is None or defensor is None:
+        return _ponderar_ids([ID_TIPO.get(t, SIN_TIPO) for t in tipos_atacante],
+                             [ID_TIPO.get(t, SIN_TIPO) for t in tipos_defensor])
+    return PONDERACIONES[atacante * NUM_COMBINACIONES + defensor]
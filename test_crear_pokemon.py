@@ -0,0 +1,107 @@
+"""
+Pruebas de la descarga de crear_pokemon.py contra la PokeAPI local de servidor_fixtures.py (no necesitan internet).
+
+Uso: python -m unittest test_crear_pokemon (o python -m pytest)
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import crear_pokemon
+from servidor_fixtures import DatosFixtures, iniciar_servidor
+
+class PruebaDescarga(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta_db = os.path.join(directorio.name, 'pokemon.db')
+
+    # Arranca un servidor de fixtures para esta prueba
+    def arrancar(self, **opciones):
+        self.datos = DatosFixtures(**opciones)
+        servidor, self.api = iniciar_servidor(self.datos)
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+
+    def conectar(self):
+        conexion = sqlite3.connect(self.ruta_db)
+        crear_pokemon.crear_tablas(conexion.cursor())
+        conexion.commit()
+        return conexion
+
+    # Ids de los pokemons cuyos detalles se han pedido al servidor
+    def detalles_pedidos(self):
+        return {int(ruta.split('/')[-2]) for ruta in self.datos.peticiones if ruta.startswith('/api/v2/pokemon/')}
+
+    def test_descarga_completa_reintentando_los_503(self):
+        self.arrancar(fallos=1, por_pagina=4)
+        pokemons = crear_pokemon.obtener_pokemons(self.api)
+        self.assertEqual([pokemon['name'] for pokemon in pokemons],
+                         [detalles['name'] for detalles in self.datos.pokemons.values()])
+
+        conexion = self.conectar()
+        self.addCleanup(conexion.close)
+        self.assertEqual(crear_pokemon.ingerir_pokemons(conexion, pokemons, hilos=4, lote=4), len(self.datos.pokemons))
+        self.assertEqual(crear_pokemon.completar_movimientos(conexion, self.api, hilos=4),
+                         (len(self.datos.movimientos), 0))
+
+        # Cada ruta (las dos páginas de la lista, los detalles y los movimientos) respondió 503 y se reintentó una vez
+        self.assertEqual(len(self.datos.peticiones), 2 + len(self.datos.pokemons) + len(self.datos.movimientos))
+        self.assertEqual(set(self.datos.peticiones.values()), {2})
+
+        tipos = conexion.execute('''
+            SELECT t.name FROM pokemon_types pt JOIN types t ON pt.type_id = t.id
+            WHERE pt.pokemon_id = 74 ORDER BY t.name
+        ''').fetchall()
+        self.assertEqual(tipos, [('ground',), ('rock',)])
+        velocidad = conexion.execute('''
+            SELECT ps.value FROM pokemon_stats ps JOIN stats s ON ps.stat_id = s.id
+            WHERE ps.pokemon_id = 25 AND s.name = 'speed'
+        ''').fetchone()
+        self.assertEqual(velocidad, (90,))
+        movimiento = conexion.execute('''
+            SELECT t.name, m.power, m.damage_class FROM moves m JOIN types t ON m.type_id = t.id
+            WHERE m.name = 'ice-beam'
+        ''').fetchone()
+        self.assertEqual(movimiento, ('ice', 90, 'special'))
+
+    def test_reanuda_una_descarga_interrumpida(self):
+        self.arrancar()
+        pokemons = crear_pokemon.obtener_pokemons(self.api)
+        descargar = crear_pokemon.obtener_detalles_pokemon
+        descargados = []
+
+        # El tercer pokemon no llega: se corta como con Ctrl+C, después del commit del primer lote
+        def cortar_en_el_tercero(url):
+            if len(descargados) == 2:
+                raise KeyboardInterrupt
+            descargados.append(url)
+            return descargar(url)
+
+        conexion = self.conectar()
+        with mock.patch('crear_pokemon.obtener_detalles_pokemon', cortar_en_el_tercero):
+            with self.assertRaises(KeyboardInterrupt):
+                crear_pokemon.ingerir_pokemons(conexion, pokemons, hilos=1, lote=2)
+        conexion.close()  # lo que no llegó al commit se pierde, como si se hubiera matado el proceso
+
+        conexion = sqlite3.connect(self.ruta_db)
+        self.addCleanup(conexion.close)
+        guardados = {fila[0] for fila in conexion.execute("SELECT id FROM pokemon")}
+        self.assertEqual(guardados, {int(url.split('/')[-2]) for url in descargados})
+
+        # Al volver a lanzarla solo se descargan los que faltaban
+        self.datos.peticiones.clear()
+        restantes = set(self.datos.pokemons) - guardados
+        self.assertEqual(crear_pokemon.ingerir_pokemons(conexion, pokemons, hilos=2, lote=2), len(restantes))
+        self.assertEqual(self.detalles_pedidos(), restantes)
+
+        self.assertEqual(conexion.execute("SELECT COUNT(*) FROM pokemon").fetchone()[0], len(self.datos.pokemons))
+        self.assertEqual(conexion.execute("SELECT COUNT(*) FROM pokemon_types").fetchone()[0],
+                         sum(len(detalles['types']) for detalles in self.datos.pokemons.values()))
+        self.assertEqual(conexion.execute("SELECT COUNT(*) FROM pokemon_moves").fetchone()[0],
+                         sum(len(detalles['moves']) for detalles in self.datos.pokemons.values()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Pruebas de los planes de las consultas más usadas (EXPLAIN QUERY PLAN) sobre una base de datos sintética en memoria que
+se crea para la prueba, con las mismas comprobaciones que comprobar_planes.py (que además puede revisar una copia de
+pokemon.db).
+
+Uso: python -m unittest test_planes (o python -m pytest)
+"""
+import sqlite3
+import unittest
+
+from comprobar_planes import (capturar_consultas, comprobar_respuestas, consultas_calientes, crear_base_datos,
+                              fallos_plan, obtener_plan)
+from crear_pokemon import INDICES, crear_tablas, migrar_esquema
+from indice_movimientos import CONSULTA_COBERTURA
+
+class PruebaPlanes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.conexion = crear_base_datos(1300, semilla=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conexion.close()
+
+    def test_consultas_calientes_usan_sus_indices(self):
+        for descripcion, funcion, argumentos, esperados, permitir_scan in consultas_calientes(self.conexion):
+            with self.subTest(descripcion):
+                sentencias = capturar_consultas(self.conexion, funcion, *argumentos)
+                self.assertEqual(len(sentencias), len(esperados))
+                for sql, esperado in zip(sentencias, esperados):
+                    plan = obtener_plan(self.conexion, sql)
+                    self.assertEqual(fallos_plan(plan, esperado, permitir_scan), [], ' | '.join(plan))
+
+    def test_cobertura_usa_idx_moves_type_y_no_un_indice_automatico(self):
+        plan = obtener_plan(self.conexion, CONSULTA_COBERTURA)
+        self.assertIn('SEARCH m USING COVERING INDEX idx_moves_type (damage_class=?)', plan)
+        self.assertEqual([linea for linea in plan if 'AUTOMATIC' in linea], [])
+
+    def test_los_indices_no_cambian_las_respuestas(self):
+        self.assertEqual(comprobar_respuestas(self.conexion), 0)
+
+    def test_migrar_esquema_rehace_los_indices_que_han_cambiado(self):
+        conexion = sqlite3.connect(':memory:')
+        self.addCleanup(conexion.close)
+        crear_tablas(conexion.cursor())
+        # Definiciones anteriores de los índices
+        conexion.execute("CREATE INDEX idx_pokemon_name ON pokemon (name, id)")
+        conexion.execute("CREATE INDEX idx_moves_type ON moves (type_id, id)")
+        migrar_esquema(conexion)
+        migrar_esquema(conexion)  # se puede repetir
+        indices = dict(conexion.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"))
+        self.assertEqual(indices, {nombre: f"CREATE INDEX {nombre} ON {definicion}" for nombre, definicion in INDICES.items()})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Pruebas del servidor HTTP de servicio_counters.py sobre una base de datos sintética (comprobar_planes.crear_base_datos)
+guardada en una carpeta temporal: códigos de respuesta y cuerpos JSON de los casos buenos y de los errores.
+
+Uso: python -m unittest test_servicio_counters (o python -m pytest)
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+from comprobar_planes import crear_base_datos
+from servicio_counters import ServicioCounters, crear_manejador
+
+class PruebaServidor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.TemporaryDirectory()
+        ruta_db = os.path.join(cls.directorio.name, 'pokemon.db')
+        memoria = crear_base_datos(300, semilla=0)
+        destino = sqlite3.connect(ruta_db)
+        memoria.backup(destino)
+        destino.close()
+        memoria.close()
+
+        cls.servicio = ServicioCounters(ruta_db, conexiones=2)
+        cls.http = ThreadingHTTPServer(('127.0.0.1', 0), crear_manejador(cls.servicio))
+        threading.Thread(target=cls.http.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.http.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.http.shutdown()
+        cls.http.server_close()
+        cls.servicio.cerrar()
+        cls.directorio.cleanup()
+
+    # Hace la petición y devuelve (código, cuerpo JSON), también para las respuestas de error
+    def pedir(self, ruta):
+        try:
+            with urllib.request.urlopen(self.url + ruta, timeout=10) as respuesta:
+                return respuesta.status, json.load(respuesta)
+        except urllib.error.HTTPError as error:
+            with error:
+                return error.code, json.load(error)
+
+    def test_counter_de_un_pokemon(self):
+        codigo, datos = self.pedir('/counter?pokemon=pokemon-1&top=3')
+        self.assertEqual(codigo, 200)
+        self.assertEqual(datos['pokemon'], 'pokemon-1')
+        self.assertEqual(len(datos['counters']), 3)
+
+    def test_top_no_valido_responde_400(self):
+        for top in ('abc', '0', '-2'):
+            with self.subTest(top=top):
+                codigo, datos = self.pedir(f'/counter?pokemon=pokemon-1&top={top}')
+                self.assertEqual(codigo, 400)
+                self.assertIn('top', datos['error'])
+
+    def test_nombre_desconocido_responde_404(self):
+        codigo, datos = self.pedir('/counter?pokemon=no-existe-de-ninguna-manera')
+        self.assertEqual(codigo, 404)
+        self.assertIn('error', datos)
+        self.assertIn('sugerencias', datos)
+
+        codigo, datos = self.pedir('/equipo?pokemons=pokemon-1,no-existe-de-ninguna-manera')
+        self.assertEqual(codigo, 404)
+        self.assertIn('no-existe-de-ninguna-manera', datos['error'])
+
+    def test_errores_de_busqueda_responden_404(self):
+        with mock.patch.object(self.servicio, 'counter', side_effect=KeyError('pokemon-1')):
+            codigo, datos = self.pedir('/counter?pokemon=pokemon-1')
+        self.assertEqual(codigo, 404)
+        self.assertIn('pokemon-1', datos['error'])
+
+    def test_otros_errores_responden_500_en_json(self):
+        with mock.patch.object(self.servicio, 'counter', side_effect=RuntimeError('fallo')), \
+             mock.patch('servicio_counters.traceback.print_exc'):
+            codigo, datos = self.pedir('/counter?pokemon=pokemon-1')
+        self.assertEqual(codigo, 500)
+        self.assertEqual(datos, {'error': "Error interno del servidor (RuntimeError)"})
+
+if __name__ == "__main__":
+    unittest.main()